@@ -0,0 +1,137 @@
+"""Threshold alerts on the displayed rates, e.g. "down < 10 KB/s for 30s" or "saturated: up > 50 MB/s".
+
+Rules are parsed and compiled once into a flat table of (slot, metric, above, threshold, hold) tuples; evaluating
+a sample is one pass over that table with no parsing, lookups or allocation unless an alert changes state.
+Must not import tkinter.
+"""
+import json
+import math
+import os
+import re
+from collections import namedtuple
+
+from collector import format_speed
+
+Rule = namedtuple("Rule", "name metric above threshold hold text inclusive", defaults=(False,))
+
+METRICS = {"up": 0, "upload": 0, "down": 1, "download": 1, "total": 2}
+METRIC_NAMES = ("up", "down", "total")
+_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "m": 1024**2, "mb": 1024**2, "g": 1024**3, "gb": 1024**3}
+_HOLD_UNITS = {"": 1, "s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600}
+_RULE = re.compile(r"^\s*(?:(?P<name>[^:<>]+?)\s*:\s*)?(?P<metric>[a-z]+)\s*(?P<op>[<>]=?)\s*(?P<value>\d+(?:\.\d*)?)\s*(?P<unit>[kmg]?b?)(?:/s)?"
+                   r"(?:\s+for\s+(?P<hold>\d+(?:\.\d*)?)\s*(?P<hold_unit>sec|min|s|m|h)?)?\s*$", re.I)
+
+def parse_rule(text):
+    """ "[name:] up|down|total <|<=|>|>= NUMBER [B|KB|MB|GB][/s] [for NUMBER [s|m|h]]" -> Rule; raises ValueError. """
+    m = _RULE.match(text or "")
+    if not m or m["metric"].lower() not in METRICS: raise ValueError(f"cannot parse alert rule {text!r}")
+    threshold = float(m["value"]) * _UNITS[m["unit"].lower()]
+    hold = float(m["hold"] or 0) * _HOLD_UNITS[(m["hold_unit"] or "").lower()]
+    op = m["op"]
+    return Rule(m["name"] or text.strip(), METRICS[m["metric"].lower()], op[0] == ">", threshold, hold, text.strip(), op.endswith("="))
+
+def _strict_threshold(rule):
+    """ v >= x is exactly v > nextafter(x, -inf) (and likewise for <=), so the table only ever compares strictly. """
+    if not rule.inclusive: return rule.threshold
+    return math.nextafter(rule.threshold, -math.inf if rule.above else math.inf)
+
+def parse_rules(lines):
+    """ Parse what parses; returns (rules, [error messages]). """
+    rules, errors = [], []
+    for line in lines or ():
+        if not line.strip() or line.lstrip().startswith("#"): continue
+        try: rules.append(parse_rule(line))
+        except ValueError as e: errors.append(str(e))
+    return rules, errors
+
+def describe(rule):
+    hold = f" for {rule.hold:g}s" if rule.hold else ""
+    return f"{METRIC_NAMES[rule.metric]} {'>' if rule.above else '<'}{'=' if rule.inclusive else ''} {format_speed(rule.threshold)}{hold}"
+
+class AlertEngine:
+    """Evaluates compiled rules on every Reading and notifies on each firing/resolved transition.
+
+    A rule fires once its condition has held continuously for `hold` seconds and resolves as soon as it stops
+    holding. `active` is a tuple of the firing rules, replaced (never mutated) so other threads can read it
+    without locking; the rules, their table and their state are likewise published as one tuple, so a
+    `set_rules` from the Tk thread never pairs a new table with old state mid-evaluation. Notification hooks run on a single worker thread so a slow command never delays sampling:
+    `command` is run through the shell with NETWORK_OVERLAY_ALERT_* variables set, and `socket_addr` receives
+    one JSON datagram per transition ("host:port" for UDP, otherwise a Unix socket path).
+    """
+
+    def __init__(self, collector=None, rules=(), command=None, socket_addr=None):
+        self.collector, self.command, self.socket_addr = collector, command, socket_addr
+        self.handlers = []  # callables(rule, firing, value) run on the sampling thread
+        self.fired = self.evaluations = 0
+        self._pool = None
+        self.set_rules(rules)
+        if collector is not None: collector.listeners.append(self.check)
+
+    def set_rules(self, rules):
+        """ Compile rules (Rule objects or rule strings) into the evaluation table; resets all alert state. """
+        rules = [parse_rule(r) if isinstance(r, str) else r for r in rules]
+        table = [(i, r.metric, r.above, _strict_threshold(r), r.hold) for i, r in enumerate(rules)]
+        self._state = (rules, table, [None] * len(rules), [False] * len(rules))
+        self.active = ()
+
+    @property
+    def rules(self): return self._state[0]
+
+    # --- Evaluation (sampling thread) ---
+    def check(self, reading):
+        """ Collector listener: evaluate one Reading at the source's monotonic time. """
+        if self._state[1] and reading.elapsed: self.evaluate(self.collector.source.monotonic(), reading.sent_s, reading.recv_s, reading.t)
+
+    def evaluate(self, t, sent_s, recv_s, wall=None):
+        """ t: monotonic seconds. Returns [(rule, firing, value), ...] for the rules that changed state. """
+        self.evaluations += 1
+        state = self._state
+        rules, table, since, firing = state
+        values, changes = (sent_s, recv_s, sent_s + recv_s), None
+        for i, metric, above, threshold, hold in table:
+            v = values[metric]
+            if (v > threshold) if above else (v < threshold):
+                start = since[i]
+                if start is None: since[i] = start = t
+                if not firing[i] and t - start >= hold:
+                    firing[i] = True; changes = changes or []; changes.append((rules[i], True, v))
+            elif since[i] is not None:
+                since[i] = None
+                if firing[i]: firing[i] = False; changes = changes or []; changes.append((rules[i], False, v))
+        if not changes: return ()
+        if self._state is state: self.active = tuple(r for r, f in zip(rules, firing) if f)  # else set_rules reset it
+        for rule, on, v in changes:
+            self.fired += on
+            for handler in self.handlers:
+                try: handler(rule, on, v)
+                except Exception as e: print(f"Warning: Alert handler failed. {e}")
+            if self.command or self.socket_addr: self._notify(rule, on, v, wall)
+        return changes
+
+    # --- Notification hooks (worker thread) ---
+    def _notify(self, rule, firing, value, wall):
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor  # hooks are rare; keep the import off the start-up path
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-hooks")
+        event = {"rule": rule.name, "state": "firing" if firing else "resolved", "condition": describe(rule),
+                 "metric": METRIC_NAMES[rule.metric], "value": value, "threshold": rule.threshold, "t": wall}
+        self._pool.submit(self._deliver, event)
+
+    def _deliver(self, event):
+        import socket
+        import subprocess
+        if self.command:
+            env = dict(os.environ, **{f"NETWORK_OVERLAY_ALERT_{k.upper()}": str(v) for k, v in event.items()})
+            try: subprocess.run(self.command, shell=True, env=env, timeout=30, stdin=subprocess.DEVNULL)
+            except (OSError, subprocess.SubprocessError) as e: print(f"Warning: Alert command failed. {e}")
+        if self.socket_addr:
+            host, _, port = self.socket_addr.rpartition(":")
+            udp = bool(host) and port.isdigit()
+            try:
+                with socket.socket((socket.AF_INET6 if ":" in host else socket.AF_INET) if udp else socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+                    s.sendto(json.dumps(event).encode() + b"\n", (host.strip("[]"), int(port)) if udp else self.socket_addr)
+            except (OSError, AttributeError) as e: print(f"Warning: Alert socket {self.socket_addr} unreachable. {e}")
+
+    def close(self):
+        if self.collector is not None and self.check in self.collector.listeners: self.collector.listeners.remove(self.check)
+        if self._pool: self._pool.shutdown(wait=False)
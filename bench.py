@@ -0,0 +1,471 @@
+"""Headless benchmarks for the sampling path. Run: python bench.py <name> [options]"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from collector import Collector, format_speed, parse_patterns
+from nic_sampler import NUMPY_AVAILABLE, NicSampler
+from rate_engine import AdaptiveInterval, RateEngine, Ticker, timed_read
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+_Counters = namedtuple("_Counters", "bytes_sent bytes_recv")
+
+def _synthetic_reader():
+    """ Stand-in for psutil.net_io_counters() that advances ~1 MB per call. """
+    state = [0, 0]
+    def read():
+        state[0] += 250_000; state[1] += 1_000_000
+        return _Counters(*state)
+    return read
+
+def _summary(values_ns):
+    values = sorted(v / 1e3 for v in values_ns)  # -> µs
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return f"mean {statistics.fmean(values):8.1f}µs  p50 {pick(.5):8.1f}µs  p99 {pick(.99):8.1f}µs  max {values[-1]:8.1f}µs"
+
+# --- Benchmarks ---
+def bench_jitter(args):
+    """ Tick lateness against absolute deadlines and per-tick sampling overhead. """
+    live = PSUTIL_AVAILABLE and not args.synthetic
+    read = psutil.net_io_counters if live else _synthetic_reader()
+    print(f"source: {'psutil' if live else 'synthetic'}")
+    for hz in args.hz:
+        engine, ticker = RateEngine(), Ticker(1 / hz)
+        engine.sample(read)
+        lateness, overhead = [], []
+        n = max(1, int(args.seconds * hz))
+        start = time.monotonic_ns()
+        for _ in range(n):
+            lateness.append(ticker.wait())
+            t0 = time.perf_counter_ns(); engine.sample(read); overhead.append(time.perf_counter_ns() - t0)
+        drift_ms = ((time.monotonic_ns() - start) / 1e9 - n / hz) * 1e3
+        print(f"{hz:>5g} Hz x {n} ticks  drift {drift_ms:+.2f}ms  missed {ticker.missed}")
+        print(f"    jitter   {_summary(lateness)}")
+        print(f"    overhead {_summary(overhead)}")
+
+def bench_nics(args):
+    """ Cost of one batched per-interface sample on a synthetic host with many virtual NICs. """
+    names = ["lo", "eth0", "docker0"] + [f"veth{i:04x}" for i in range(args.count)]
+    state = {n: [0, 0] for n in names}
+    def read():
+        for i, v in enumerate(state.values()): v[0] += i; v[1] += 2 * i
+        return {n: _Counters(*v) for n, v in state.items()}
+    sampler = NicSampler(exclude=parse_patterns(args.exclude), read=lambda: timed_read(read))
+    sampler.sample()
+    cost = []
+    for _ in range(args.iterations):
+        t0 = time.perf_counter_ns(); sampler.sample(); sampler.top(3); cost.append(time.perf_counter_ns() - t0)
+    read_cost = []
+    for _ in range(args.iterations):
+        t0 = time.perf_counter_ns(); read(); read_cost.append(time.perf_counter_ns() - t0)
+    print(f"{len(names)} interfaces, {len(sampler.names)} after filters, backend: {'numpy' if NUMPY_AVAILABLE else 'array'}")
+    print(f"    sample+top {_summary(cost)}")
+    print(f"    (of which synthetic read {_summary(read_cost)})")
+
+def bench_headless(args):
+    """ Start-up time to first reading and peak RSS of the headless collector. """
+    here = os.path.dirname(os.path.abspath(__file__))
+    cmd = [sys.executable, os.path.join(here, "network_overlay.py"), "--headless", "--count", "1", "--interval", str(args.interval)]
+    try: import resource
+    except ImportError: resource = None  # Windows: peak working set via psutil while the child is alive
+    first, peak = [], 0
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        proc.stdout.readline(); first.append(time.perf_counter() - t0 - args.interval)
+        if resource is None and PSUTIL_AVAILABLE:
+            try: mem = psutil.Process(proc.pid).memory_info(); peak = max(peak, getattr(mem, "peak_wset", mem.rss))
+            except psutil.Error: pass
+        proc.wait()
+    rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if resource else peak / 1024  # KB on Linux
+    probe = "import sys, collector; print(sorted(m for m in ('tkinter', 'PIL', 'numpy') if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", probe], cwd=here, capture_output=True, text=True).stdout.strip()
+    print(f"{args.runs} runs: start-up to first reading (excluding the {args.interval}s first interval)")
+    print(f"    mean {statistics.fmean(first) * 1e3:.1f}ms  min {min(first) * 1e3:.1f}ms  max {max(first) * 1e3:.1f}ms")
+    print(f"    peak RSS {f'{rss_kb / 1024:.1f} MB' if rss_kb else 'n/a'}   GUI/heavy modules imported by collector: {loaded}")
+
+def bench_metrics(args):
+    """ Hammer the metrics endpoint with concurrent keep-alive clients while the collector samples. """
+    import threading
+    from metrics_server import MetricsServer
+    collector = Collector(1 / args.hz)
+    server = MetricsServer(collector, port=0).start()
+    reads = [0]
+    nic = collector.nic_sampler; real_read = nic.read
+    def counting_read(): reads[0] += 1; return real_read()
+    nic.read = counting_read
+    threading.Thread(target=collector.run, args=(lambda r: None,), daemon=True).start()
+    latencies = []
+    async def client(path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        for _ in range(args.requests):
+            t0 = time.perf_counter_ns()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter_ns() - t0)
+        writer.close()
+    async def storm():
+        await asyncio.gather(*(client("/metrics" if i % 2 else "/metrics.json") for i in range(args.clients)))
+    t0 = time.perf_counter(); asyncio.run(storm()); wall = time.perf_counter() - t0
+    collector.stop(); server.stop()
+    print(f"{args.clients} clients x {args.requests} requests in {wall:.2f}s ({len(latencies) / wall:,.0f} req/s)")
+    print(f"    latency  {_summary(latencies)}")
+    print(f"    counter reads {reads[0]} for {server.publishes - 1} ticks (served {server.requests} requests)")
+
+def _simulate(policy, duration, bursts, burst_len, burst_rate, idle_rate, detect):
+    """ Run one sampling policy over a virtual-time traffic trace; returns (samples, detection latencies). """
+    def counter(t):  # bytes received up to virtual time t
+        total = idle_rate * t
+        for start in bursts: total += burst_rate * min(max(t - start, 0.0), burst_len)
+        return int(total)
+    engine, t = RateEngine(), 0.0
+    engine.update(0, 0, 0)
+    samples, latencies, pending = 0, [], list(bursts)
+    while t < duration:
+        t += policy.interval if isinstance(policy, AdaptiveInterval) else policy
+        rate = engine.update(0, counter(t), int(t * 1e9)); samples += 1
+        if isinstance(policy, AdaptiveInterval): policy.update(rate.sent_s, rate.recv_s)
+        while pending and pending[0] < t and rate.recv_s > detect: latencies.append(t - pending.pop(0))
+        while pending and pending[0] + burst_len < t: pending.pop(0)  # burst came and went unseen
+    return samples, latencies
+
+def bench_adaptive(args):
+    """ Fixed vs adaptive sampling on a synthetic bursty trace: CPU cost and burst-detection latency. """
+    import random
+    rng = random.Random(args.seed)
+    bursts = sorted(rng.uniform(0, args.duration - args.burst_len) for _ in range(args.bursts))
+    read = psutil.net_io_counters if PSUTIL_AVAILABLE else _synthetic_reader()
+    engine, n = RateEngine(), 2000
+    t0 = time.process_time()
+    for _ in range(n): engine.sample(read)
+    per_sample = (time.process_time() - t0) / n
+    print(f"{args.duration / 3600:g} h trace, {args.bursts} bursts of {args.burst_len:g}s at {args.burst_rate / 1024**2:g} MB/s; "
+          f"measured cost {per_sample * 1e6:.0f}µs CPU per sample")
+    policies = [(f"fixed {iv:g}s", iv) for iv in args.fixed] + [(f"adaptive {args.fast:g}-{args.slow:g}s", AdaptiveInterval(args.fast, args.slow))]
+    for name, policy in policies:
+        samples, lat = _simulate(policy, args.duration, bursts, args.burst_len, args.burst_rate, 1024, args.burst_rate / 10)
+        missed = args.bursts - len(lat)
+        lat_text = f"mean {statistics.fmean(lat):6.2f}s  max {max(lat):6.2f}s" if lat else "n/a"
+        print(f"    {name:<18} samples {samples:>7,}  CPU {samples * per_sample * 1e3:8.1f}ms  detection {lat_text}  missed {missed}")
+
+def _write_synthetic_trace(path, snapshots, ifaces, interval):
+    import random
+    from sources import Counters, TraceWriter
+    rng, writer = random.Random(7), TraceWriter(path)
+    names = ["eth0", "wlan0", "docker0"] + [f"veth{i:04x}" for i in range(max(0, ifaces - 3))]
+    totals = {n: [0, 0] for n in names[:ifaces]}
+    t_ns, step = 0, int(interval * 1e9)
+    for _ in range(snapshots):
+        t_ns += step + rng.randrange(-step // 50, step // 50)  # ±2% jitter like a real sampler
+        for v in totals.values(): v[0] += rng.randrange(0, 200_000); v[1] += rng.randrange(0, 2_000_000)
+        writer.write(t_ns, {n: Counters(*v) for n, v in totals.items()})
+    writer.close()
+
+def bench_replay(args):
+    """ Replay a recorded trace through the rate engine, NIC sampler, stats and formatters as fast as possible. """
+    import tempfile
+    import tracemalloc
+    from history import History
+    from sources import TraceReader, TraceSource
+    path = args.trace
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"bench_{args.snapshots}x{args.ifaces}.nettrace")
+        if not os.path.exists(path):
+            t0 = time.perf_counter(); _write_synthetic_trace(path, args.snapshots, args.ifaces, args.interval)
+            print(f"wrote {path} in {time.perf_counter() - t0:.1f}s")
+    reader = TraceReader(path)
+    records, span = len(reader), None
+    snaps = reader.snapshots(); first = next(snaps)[0]
+    for last, _ in snaps: pass
+    span = (last - first) / 1e9; snaps.close(); reader.close()
+    print(f"trace: {records:,} records ({os.path.getsize(path) / 1024**2:.1f} MB), {span / 3600:.1f} h of recorded time")
+    for mode, want_stats in [("total", False), ("total", True), ("top", True)]:
+        source = TraceSource(path)
+        collector = Collector(mode=mode, exclude=["lo"], history=History(3600), source=source)
+        collector.want_stats = want_stats
+        count = [0]
+        def consume(r):
+            count[0] += 1; format_speed(r.sent_s); format_speed(r.recv_s)
+            for _, u, d in r.rows: format_speed(u); format_speed(d)
+        t0 = time.perf_counter(); collector.replay(consume); wall = time.perf_counter() - t0
+        samples = count[0]; source.close()
+        # Allocation profile over a prefix of the trace (tracemalloc slows everything down, so it runs separately).
+        source = TraceSource(path)
+        collector = Collector(mode=mode, exclude=["lo"], history=History(3600), source=source); collector.want_stats = want_stats
+        n, warm = args.alloc_samples, 1000
+        for _ in range(warm): collector.sample()
+        tracemalloc.start(); tracemalloc.reset_peak()
+        base_blocks, base_mem = sys.getallocatedblocks(), tracemalloc.get_traced_memory()[0]
+        for _ in range(n): consume(collector.sample())
+        mem, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+        blocks = sys.getallocatedblocks() - base_blocks
+        source.close()
+        label = f"{mode}{' +stats' if want_stats else ''}"
+        print(f"    {label:<12} {samples:>9,} samples in {wall:6.2f}s  {samples / wall:>9,.0f} samples/s  "
+              f"{records / wall:>10,.0f} records/s  {span / wall:>8,.0f}x real time")
+        print(f"    {'':<12} retained {(mem - base_mem) / n:+.1f} B/sample, net blocks {blocks / n:+.2f}/sample, "
+              f"transient peak {(peak - base_mem) / 1024:.0f} KB over {n:,} samples")
+
+def bench_alerts(args):
+    """ Per-sample cost of evaluating compiled alert rules on a synthetic rate series. """
+    import random
+    from alerts import AlertEngine
+    rng = random.Random(args.seed)
+    series = [(rng.expovariate(1 / 2e6), rng.expovariate(1 / 20e6)) for _ in range(args.samples)]
+    metrics, units = ("up", "down", "total"), ("KB/s", "MB/s")
+    for count in args.rules:
+        rules = [f"r{i}: {rng.choice(metrics)} {rng.choice(('<', '<=', '>', '>='))} {rng.randint(1, 999)} {rng.choice(units)} for {rng.randint(0, 60)}s" for i in range(count)]
+        engine = AlertEngine(rules=rules)
+        t0 = time.perf_counter_ns()
+        for i, (up, down) in enumerate(series): engine.evaluate(i * 0.1, up, down)
+        per = (time.perf_counter_ns() - t0) / len(series)
+        print(f"{count:>4} rules  {per / 1e3:7.2f}µs/sample  {per / max(count, 1):6.0f}ns/rule  transitions {engine.fired}")
+
+def bench_config(args):
+    """ Caller-side cost of a burst of config saves: synchronous json.dump vs the debounced atomic store. """
+    import json
+    import tempfile
+    from config_store import ConfigStore
+    defaults = {f"key_{i}": i for i in range(args.keys)} | {"x": 0, "y": 0}
+    with tempfile.TemporaryDirectory(dir=args.dir) as d:
+        path, sync = os.path.join(d, "config.json"), []
+        for i in range(args.saves):
+            t0 = time.perf_counter_ns()
+            with open(path, "w") as f: json.dump(defaults | {"x": i}, f, indent=2)
+            sync.append(time.perf_counter_ns() - t0)
+        store, queued = ConfigStore(path, defaults, delay=args.delay), []
+        for i in range(args.saves):
+            t0 = time.perf_counter_ns(); store["x"] = i; store.save(); queued.append(time.perf_counter_ns() - t0)
+        unchanged = time.perf_counter_ns(); store.save(); unchanged = time.perf_counter_ns() - unchanged
+        time.sleep(args.delay * 2); store.close()
+        print(f"{args.saves} saves of a {args.keys}-key config in {d}")
+        print(f"    synchronous  {_summary(sync)}  writes {args.saves}")
+        print(f"    store.save() {_summary(queued)}  writes {store.writes} (fsync'd, atomic)")
+        print(f"    unchanged save {unchanged / 1e3:.1f}µs, no write")
+
+# Runs the real overlay in a scratch HOME and reports the moment the first real reading has been drawn.
+_FIRST_PAINT_PROBE = """
+import network_overlay as no
+draw = no.NetworkOverlay.safe_update_label
+def probe(self, *args, **kwargs):
+    draw(self, *args, **kwargs); self.root.update_idletasks()
+    if not getattr(self, "_probed", False): self._probed = True; print("painted", flush=True); self.root.after_idle(self.on_closing)
+no.NetworkOverlay.safe_update_label = probe
+no.NetworkOverlay()
+"""
+
+BUDGET_IMPORT_MS, BUDGET_FIRST_MS = 150, 600  # also enforced by tests/test_startup.py
+
+def import_times(runs, module="network_overlay"):
+    """ ([total import ms per run], {direct import: mean cumulative ms}) from `python -X importtime`. """
+    here, imports, top = os.path.dirname(os.path.abspath(__file__)), [], {}
+    for _ in range(runs):
+        err = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=here, capture_output=True, text=True).stderr
+        rows = [line.split("|") for line in err.splitlines() if line.startswith("import time:") and "cumulative" not in line]
+        imports.append(int(rows[-1][1]) / 1e3)
+        for _, cumulative, name in rows:
+            if name.startswith("   ") and not name.startswith("    "): top[name.strip()] = top.get(name.strip(), 0) + int(cumulative) / 1e3 / runs
+    return imports, top
+
+def first_paint_times(runs):
+    """ ([ms from process start to the first painted reading per run], None), or ([], why) if the overlay can't start. """
+    import tempfile
+    here, firsts = os.path.dirname(os.path.abspath(__file__)), []
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, USERPROFILE=home)  # own lock file and config; never touches a running overlay
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, "-c", _FIRST_PAINT_PROBE], cwd=here, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            line = proc.stdout.readline(); elapsed = time.perf_counter() - t0
+            _, err = proc.communicate(timeout=30)
+            if line.strip() != "painted": return [], (err.strip().splitlines() or ["no output"])[-1]
+            firsts.append(elapsed * 1e3)
+    return firsts, None
+
+def bench_startup(args):
+    """ Cold-start cost: import time of the GUI module (-X importtime) and time until the first reading is painted. """
+    imports, top = import_times(args.runs)
+    import_ms = statistics.median(imports)
+    print(f"import network_overlay: median {import_ms:.1f}ms over {args.runs} runs (budget {args.budget_import_ms:g}ms)")
+    print("    slowest direct imports: " + ", ".join(f"{n} {ms:.1f}ms" for n, ms in sorted(top.items(), key=lambda kv: -kv[1])[:args.show]))
+    failed = import_ms > args.budget_import_ms
+    firsts, why = first_paint_times(args.runs)
+    if why: print(f"first paint: skipped, the overlay did not start ({why})")
+    if firsts:
+        first_ms = statistics.median(firsts)
+        print(f"process start to first painted reading: median {first_ms:.0f}ms  min {min(firsts):.0f}ms  max {max(firsts):.0f}ms (budget {args.budget_first_ms:g}ms)")
+        failed |= first_ms > args.budget_first_ms
+    if failed: print("FAIL: start-up budget exceeded")
+    return 1 if failed else 0
+
+_THEME_PROBE = """
+import json, sys, time, tracemalloc
+import tkinter.font as tkfont
+import network_overlay as no
+switches, image = int(sys.argv[1]), sys.argv[2] or None
+def cycle(self):
+    if image: self.config["background_image"] = image; self._setup_themes()
+    names, times = list(self.themes), []
+    def objects(): return len(self.root.tk.call("image", "names")), len(tkfont.names(self.root)), len(self.root.winfo_children())
+    for i in range(switches // 2): self.change_theme(names[i % len(names)]); self.root.update_idletasks()
+    tracemalloc.start(); before, counts = tracemalloc.get_traced_memory()[0], objects()
+    for i in range(switches // 2, switches):
+        t0 = time.perf_counter(); self.change_theme(names[i % len(names)]); self.root.update_idletasks(); times.append(time.perf_counter() - t0)
+    grown = tracemalloc.get_traced_memory()[0] - before
+    print(json.dumps({"times": times, "grown": grown, "before": counts, "after": objects(), "hits": self.resources.hits, "misses": self.resources.misses}), flush=True)
+    self.on_closing()
+no.NetworkOverlay.watch_topmost = lambda self, real=no.NetworkOverlay.watch_topmost: (real(self), self.root.after(200, cycle, self))
+no.NetworkOverlay()
+"""
+
+def bench_themes(args):
+    """ Theme switch latency and Python/Tk object growth over repeated switches (needs a display). """
+    import json
+    import tempfile
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        proc = subprocess.run([sys.executable, "-c", _THEME_PROBE, str(args.switches), args.image or ""], cwd=here, env=env, capture_output=True, text=True, timeout=120)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if not lines: return print(f"skipped, the overlay did not start ({(proc.stderr.strip().splitlines() or ['no output'])[-1]})")
+    r = json.loads(lines[-1])
+    print(f"{len(r['times'])} timed theme switches{' with background image ' + args.image if args.image else ''}")
+    print(f"    switch   {_summary([t * 1e9 for t in r['times']])}")
+    print(f"    Python heap {r['grown'] / 1024:+.1f} KB over the timed half;  Tk images/fonts/widgets {tuple(r['before'])} -> {tuple(r['after'])}")
+    print(f"    resource cache hits {r['hits']}, misses {r['misses']}")
+
+# Aggregator in its own process so its CPU time is measured separately from the simulated senders.
+_AGGREGATOR_PROBE = """
+import json, sys, time
+from fleet import Aggregator
+agg = Aggregator(port=0, stale_after=float(sys.argv[1])).start()
+print(agg.port, flush=True)
+for line in sys.stdin:
+    print(json.dumps({"cpu": time.process_time(), "hosts": len(agg.hosts()), "batches": agg.batches, "samples": agg.samples,
+                      "lost": sum(h.lost for h in list(agg.state.values())), "malformed": agg.malformed, "expired": agg.expired}), flush=True)
+agg.stop()
+"""
+
+def bench_fleet(args):
+    """ Many simulated senders (plus optional real headless collectors) pushing to one aggregator on localhost. """
+    from fleet import PushSender
+    here = os.path.dirname(os.path.abspath(__file__))
+    agg = subprocess.Popen([sys.executable, "-c", _AGGREGATOR_PROBE, str(args.stale_after)], cwd=here, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    port = int(agg.stdout.readline())
+    def query():
+        agg.stdin.write("stats\n"); agg.stdin.flush()
+        import json
+        return json.loads(agg.stdout.readline())
+    transports = ["udp", "tcp"] if args.transport == "mixed" else [args.transport]
+    senders = [PushSender(address=("127.0.0.1", port), transport=transports[i % len(transports)], name=f"sim-{i:04d}",
+                          batch_size=args.batch, flush_interval=args.flush).start() for i in range(args.senders)]
+    # Real collectors: they must start even though this process (and maybe an overlay) is running.
+    collectors = [subprocess.Popen([sys.executable, os.path.join(here, "network_overlay.py"), "--headless", "--quiet", "--push", f"127.0.0.1:{port}",
+                                    "--name", f"collector-{i}", "--interval", "0.2"], cwd=here) for i in range(args.collectors)]
+    def pump(active, seconds):
+        step, t_end, n = 1 / args.hz, time.monotonic() + seconds, 0
+        ticker = Ticker(step)
+        while time.monotonic() < t_end and ticker.wait() is not None:
+            now = time.time()
+            for i, s in enumerate(active): s.add(now, 1000.0 * i, 4000.0 * i)
+            n += len(active)
+        return n
+    pump(senders, 1.0); time.sleep(args.flush * 1.5)  # warm-up: every sender connects, registers and drains its queue
+    before = query(); t0 = time.monotonic()
+    sent = pump(senders, args.seconds)
+    time.sleep(args.flush * 1.5); after = query(); wall = time.monotonic() - t0
+    batches, samples = after["batches"] - before["batches"], after["samples"] - before["samples"]
+    print(f"{args.senders} simulated senders ({args.transport}) + {args.collectors} headless collectors -> 127.0.0.1:{port}, "
+          f"{args.hz:g} Hz samples, batches of up to {args.batch} every {args.flush:g}s")
+    print(f"    received {samples:,} samples for {sent:,} simulated (plus the collectors' own) in {batches:,} batches ({batches / wall:,.0f} batches/s), "
+          f"lost {after['lost']}, malformed {after['malformed']}")
+    print(f"    aggregator CPU {(after['cpu'] - before['cpu']) / wall * 100:.1f}% of one core  ({(after['cpu'] - before['cpu']) / max(batches, 1) * 1e6:.1f}µs/batch)")
+    print(f"    hosts tracked {after['hosts']}  (expected {args.senders + args.collectors})")
+    half = senders[: len(senders) // 2]
+    for s in senders[len(senders) // 2:]: s.close()
+    for p in collectors: p.terminate(); p.wait()
+    pump(half, args.stale_after * 2)
+    expired = query()
+    print(f"    after silencing {len(senders) - len(half)} senders and all collectors for {args.stale_after * 2:g}s: "
+          f"{expired['hosts']} hosts tracked (expected {len(half)}), {expired['expired']} expired")
+    for s in half: s.close()
+    agg.stdin.close(); agg.wait()
+
+BENCHMARKS = {"jitter": bench_jitter, "nics": bench_nics, "headless": bench_headless, "metrics": bench_metrics, "adaptive": bench_adaptive, "replay": bench_replay, "alerts": bench_alerts, "config": bench_config, "startup": bench_startup, "themes": bench_themes, "fleet": bench_fleet}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="name", required=True)
+    p = sub.add_parser("jitter", help=bench_jitter.__doc__)
+    p.add_argument("--hz", type=float, nargs="+", default=[10, 100])
+    p.add_argument("--seconds", type=float, default=5)
+    p.add_argument("--synthetic", action="store_true", help="don't touch psutil")
+    p = sub.add_parser("nics", help=bench_nics.__doc__)
+    p.add_argument("--count", type=int, default=250, help="number of virtual interfaces")
+    p.add_argument("--exclude", default="lo", help="exclude globs, e.g. 'lo, veth*'")
+    p.add_argument("--iterations", type=int, default=1000)
+    p = sub.add_parser("headless", help=bench_headless.__doc__)
+    p.add_argument("--runs", type=int, default=10)
+    p.add_argument("--interval", type=float, default=0.05)
+    p = sub.add_parser("metrics", help=bench_metrics.__doc__)
+    p.add_argument("--clients", type=int, default=50)
+    p.add_argument("--requests", type=int, default=200, help="requests per client")
+    p.add_argument("--hz", type=float, default=10, help="collector sampling rate during the run")
+    p = sub.add_parser("adaptive", help=bench_adaptive.__doc__)
+    p.add_argument("--duration", type=float, default=3600, help="virtual seconds")
+    p.add_argument("--bursts", type=int, default=30)
+    p.add_argument("--burst-len", type=float, default=5)
+    p.add_argument("--burst-rate", type=float, default=5 * 1024**2, help="bytes/s during a burst")
+    p.add_argument("--fixed", type=float, nargs="+", default=[0.1, 1, 5], help="fixed intervals to compare")
+    p.add_argument("--fast", type=float, default=0.1)
+    p.add_argument("--slow", type=float, default=2)
+    p.add_argument("--seed", type=int, default=1)
+    p = sub.add_parser("replay", help=bench_replay.__doc__)
+    p.add_argument("--trace", help="trace to replay (default: generate a synthetic one in the temp dir)")
+    p.add_argument("--snapshots", type=int, default=500_000, help="synthetic trace length in snapshots")
+    p.add_argument("--ifaces", type=int, default=4, help="interfaces per synthetic snapshot")
+    p.add_argument("--interval", type=float, default=1.0, help="synthetic sampling interval in seconds")
+    p.add_argument("--alloc-samples", type=int, default=20_000)
+    p = sub.add_parser("alerts", help=bench_alerts.__doc__)
+    p.add_argument("--rules", type=int, nargs="+", default=[0, 1, 10, 50, 200])
+    p.add_argument("--samples", type=int, default=200_000)
+    p.add_argument("--seed", type=int, default=1)
+    p = sub.add_parser("config", help=bench_config.__doc__)
+    p.add_argument("--saves", type=int, default=200, help="saves in the burst (e.g. one drag)")
+    p.add_argument("--keys", type=int, default=60)
+    p.add_argument("--delay", type=float, default=1.0, help="store debounce delay in seconds")
+    p.add_argument("--dir", help="directory to test in (e.g. a network home; default: the temp dir)")
+    p = sub.add_parser("startup", help=bench_startup.__doc__)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--show", type=int, default=6, help="direct imports listed")
+    p.add_argument("--budget-import-ms", type=float, default=BUDGET_IMPORT_MS, help="fail (exit 1) if the median import takes longer")
+    p.add_argument("--budget-first-ms", type=float, default=BUDGET_FIRST_MS, help="fail (exit 1) if the median first paint takes longer")
+    p = sub.add_parser("themes", help=bench_themes.__doc__)
+    p.add_argument("--switches", type=int, default=400)
+    p.add_argument("--image", help="background image for the customizable theme")
+    p = sub.add_parser("fleet", help=bench_fleet.__doc__)
+    p.add_argument("--senders", type=int, default=300)
+    p.add_argument("--collectors", type=int, default=3, help="real headless collectors pushing alongside the simulated senders")
+    p.add_argument("--transport", choices=("udp", "tcp", "mixed"), default="mixed")
+    p.add_argument("--hz", type=float, default=10, help="samples per second per sender")
+    p.add_argument("--batch", type=int, default=16)
+    p.add_argument("--flush", type=float, default=1.0, help="sender flush interval in seconds")
+    p.add_argument("--seconds", type=float, default=5)
+    p.add_argument("--stale-after", type=float, default=3)
+    args = parser.parse_args(argv)
+    return BENCHMARKS[args.name](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Sampling core shared by the overlay and the headless CLI. Must not import tkinter or PIL."""
+import argparse
+import json
+import sys
+from collections import namedtuple
+
+from rate_engine import AdaptiveInterval, RateEngine, Ticker
+from sources import PsutilSource, RecordingSource, TraceSource
+from stats import RateStats
+
+MODES = ("total", "top", "single")
+
+# rows: [(iface, sent_s, recv_s), ...] in per-interface modes, [] in total mode.
+# stats: RateStats.snapshot() of the displayed rates after this sample.
+Reading = namedtuple("Reading", "t sent_s recv_s elapsed rows stats", defaults=(None,))
+
+def format_speed(s):
+    if s<1024: return f"{s:.1f} B/s"
+    if s<1024**2: return f"{s/1024:.1f} KB/s"
+    if s<1024**3: return f"{s/1024**2:.1f} MB/s"
+    return f"{s/1024**3:.1f} GB/s"
+
+def format_size(b):
+    if b<1024: return f"{b:.0f} B"
+    if b<1024**2: return f"{b/1024:.1f} KB"
+    if b<1024**3: return f"{b/1024**2:.1f} MB"
+    return f"{b/1024**3:.2f} GB"
+
+def parse_patterns(text):
+    """ "veth*, lo" -> ["veth*", "lo"] """
+    return [p.strip() for p in (text or "").replace(";", ",").split(",") if p.strip()]
+
+class Mailbox:
+    """Single-slot "latest value" handoff: the producer overwrites, the consumer takes on its own schedule.
+
+    Values the consumer never saw are counted as dropped instead of queueing up behind a busy consumer.
+    """
+
+    def __init__(self):
+        self._slot, self.posted, self.seen, self.dropped = None, 0, 0, 0
+
+    def post(self, value):
+        self.posted += 1
+        self._slot = (self.posted, value)  # one reference store: never torn
+
+    def take(self):
+        """ (value, count of posts since the last take), or (None, 0) if nothing new arrived. """
+        slot = self._slot
+        if slot is None or slot[0] == self.seen: return None, 0
+        missed, self.seen = slot[0] - self.seen, slot[0]
+        self.dropped += missed - 1
+        return slot[1], missed
+
+class Collector:
+    """Samples counters on a drift-free ticker and hands each Reading to a callback."""
+
+    def __init__(self, interval=1.0, mode="total", nic_name=None, top_n=3, include=(), exclude=(), history=None, traffic_log=None, stats_window=60.0, half_life=5.0, source=None):
+        self.interval, self.mode, self.nic_name, self.top_n = interval, mode, nic_name, top_n
+        self.include, self.exclude = list(include), list(exclude)
+        self.history, self.traffic_log = history, traffic_log
+        self.source, self._next_source = source or PsutilSource(), None
+        self.stats = RateStats(stats_window, half_life)
+        self.want_stats = False  # attach a stats snapshot to every Reading (the quantile scan isn't free)
+        self.rate_engine, self.ticker = RateEngine(), Ticker(interval)
+        self._nic_sampler = None
+        self.per_nic = False  # also sample every interface in total mode (for exporters)
+        self.adaptive = None  # AdaptiveInterval, overrides `interval` while set
+        self.listeners = []   # extra callables fed every Reading after the main callback
+        self.running, self.errors, self._last_error = False, 0, None
+        if isinstance(self.source, PsutilSource):  # replayed traces establish their own baseline
+            try: self._sample_total()
+            except Exception: pass
+
+    @property
+    def nic_sampler(self):
+        # Imported on first use: NumPy is only worth loading for the per-interface modes.
+        if self._nic_sampler is None:
+            from nic_sampler import NicSampler
+            self._nic_sampler = NicSampler(self.include, self.exclude, read=self.source.pernic)
+        return self._nic_sampler
+
+    @property
+    def current_interval(self):
+        adaptive = self.adaptive  # may be swapped by the Tk thread at any moment
+        return adaptive.interval if adaptive else self.interval
+
+    def set_adaptive(self, enabled, fast=0.1, slow=2.0):
+        self.adaptive = AdaptiveInterval(fast, slow) if enabled else None
+
+    def set_filters(self, include=(), exclude=()):
+        self.include, self.exclude = list(include), list(exclude)
+        if self._nic_sampler: self._nic_sampler.set_filters(self.include, self.exclude)
+
+    def set_source(self, source):
+        """ Switch counter source (e.g. start/stop recording); applied by the sampling thread at its next tick. """
+        self._next_source = source
+
+    def _swap_source(self):
+        old, self.source, self._next_source = self.source, self._next_source, None
+        if self._nic_sampler: self._nic_sampler.read = self.source.pernic
+        if hasattr(old, "close") and old is not getattr(self.source, "inner", None): old.close()
+
+    def _sample_total(self):
+        counters, t_ns = self.source.total()
+        return self.rate_engine.update(counters.bytes_sent, counters.bytes_recv, t_ns)
+
+    def sample(self):
+        """ Take one reading in the current mode; also feeds the history and traffic log. """
+        if self._next_source is not None: self._swap_source()
+        self.source.tick()
+        now = self.source.time()
+        mode = self.mode  # read once: the Tk thread may switch it mid-sample
+        nic = self.nic_sampler if self.per_nic or mode != "total" or self.traffic_log else None
+        nic_ok = nic.sample() if nic else False
+        if mode == "total":
+            rate = self._sample_total()
+            sent_s, recv_s, elapsed, rows = (*rate, []) if rate else (0.0, 0.0, 0.0, [])
+        else:
+            elapsed = nic.elapsed if nic_ok else 0.0
+            rows = nic.top(self.top_n) if mode == "top" else list(filter(None, [nic.get(self.nic_name)]))
+            sent_s, recv_s = sum(r[1] for r in rows), sum(r[2] for r in rows)
+        # Data usage always counts the filtered interfaces, whatever the view shows: the system total includes
+        # loopback and bridges (bridged traffic twice), so switching views would change "today" on a metered link.
+        if self.traffic_log and nic_ok: self.traffic_log.record(now, *(r * nic.elapsed for r in nic.total()))
+        if self.history is not None: self.history.append(now, sent_s, recv_s)
+        if elapsed: self.stats.add(self.source.monotonic(), sent_s, recv_s)
+        return Reading(now, sent_s, recv_s, elapsed, rows, self.stats.snapshot() if self.want_stats else None)
+
+    def run(self, callback, first_interval=None):
+        """ Sample forever (until stop()), calling callback(reading) after every tick.
+
+        first_interval, if given, shortens only the first tick so a display gets real numbers quickly.
+        """
+        self.running = True
+        first = min(first_interval, self.current_interval) if first_interval else None
+        while self.running:
+            self.ticker.interval = first or self.current_interval; first = None
+            if self.ticker.wait() is None: break
+            adaptive = self.adaptive
+            try:
+                reading = self.sample(); callback(reading)
+                if adaptive: adaptive.update(reading.sent_s, reading.recv_s)
+            except (EOFError, BrokenPipeError): break  # a finite source ran out, or stdout went away
+            except Exception as e:
+                # A transient failure (e.g. a full disk under a trace recording) must not end sampling for good.
+                self.errors += 1
+                if repr(e) != self._last_error: self._last_error = repr(e); print(f"Warning: Sampling failed, retrying. {e!r}")
+                continue
+            self._last_error = None
+            for listener in self.listeners:
+                try: listener(reading)
+                except Exception as e: print(f"Warning: {getattr(listener, '__qualname__', listener)} failed. {e}")
+
+    def replay(self, callback):
+        """ Drain a finite source (e.g. a TraceSource) as fast as possible, without the ticker. """
+        self.running = True
+        try:
+            while self.running:
+                reading = self.sample(); callback(reading)
+                for listener in self.listeners: listener(reading)
+        except (EOFError, BrokenPipeError): pass
+
+    def stop(self):
+        self.running = False; self.ticker.stop()
+
+# --- Headless CLI ---
+def _json_writer(out, with_stats=False, rows_key="interfaces"):
+    def write(r):
+        line = {"t": round(r.t, 3), "up": round(r.sent_s, 1), "down": round(r.recv_s, 1)}
+        if r.stats and with_stats: line["stats"] = {k: {m: round(v, 1) for m, v in d.items()} for k, d in r.stats.items()}
+        if r.rows: line[rows_key] = {n: {"up": round(u, 1), "down": round(d, 1)} for n, u, d in r.rows}
+        out.write(json.dumps(line, separators=(",", ":")) + "\n"); out.flush()
+    return write
+
+STAT_COLUMNS = ("avg", "peak", "p50", "p95", "p99")
+
+def _csv_writer(out, with_stats=False, rows_key="interfaces"):
+    out.write(f"t,{'host' if rows_key == 'hosts' else 'iface'},up,down" + "".join(f",{k}_{m}" for k in ("up", "down") for m in STAT_COLUMNS) * with_stats + "\n")
+    def write(r):
+        rows = r.rows or [("total", r.sent_s, r.recv_s)]
+        extra = "".join(f",{r.stats[k][m]:.1f}" for k in ("up", "down") for m in STAT_COLUMNS) if with_stats and r.stats else ""
+        out.write("".join(f"{r.t:.3f},{n},{u:.1f},{d:.1f}{extra}\n" for n, u, d in rows)); out.flush()
+    return write
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Stream network throughput to stdout without a GUI.")
+    p.add_argument("--headless", action="store_true", help="accepted for symmetry with network_overlay.py")
+    p.add_argument("--interval", type=float, default=1.0, help="seconds between samples (default 1)")
+    p.add_argument("--adaptive", action="store_true", help="sample every 0.1 s while traffic changes, back off to --max-interval when quiet")
+    p.add_argument("--max-interval", type=float, default=2.0, help="slowest adaptive interval (default 2)")
+    p.add_argument("--format", choices=("json", "csv"), default="json", help="line-delimited JSON or CSV")
+    p.add_argument("--stats", action="store_true", help="add EWMA average, rolling peak and p50/p95/p99 to each line")
+    p.add_argument("--stats-window", type=float, default=60.0, help="seconds covered by peak/percentiles (default 60)")
+    p.add_argument("--half-life", type=float, default=5.0, help="EWMA half-life in seconds (default 5)")
+    p.add_argument("--mode", choices=MODES, default="total")
+    p.add_argument("--nic", help="interface for --mode single")
+    p.add_argument("--top", type=int, default=3, help="interfaces shown in --mode top")
+    p.add_argument("--include", type=parse_patterns, default=[], help="interface globs, e.g. 'eth*, wl*'")
+    p.add_argument("--exclude", type=parse_patterns, default=["lo"], help="interface globs, e.g. 'lo, veth*'")
+    p.add_argument("--count", type=int, default=0, help="stop after N samples (0 = run forever)")
+    p.add_argument("--log", metavar="DB", help="also record usage to this traffic log database")
+    p.add_argument("--record", metavar="TRACE", help="append every per-interface snapshot to this trace file")
+    p.add_argument("--replay", metavar="TRACE", help="read counters from a recorded trace instead of the OS (runs as fast as possible)")
+    p.add_argument("--alert", action="append", default=[], metavar="RULE", help="e.g. 'quiet: down < 10 KB/s for 30s' (repeatable); transitions go to stderr")
+    p.add_argument("--alert-command", metavar="CMD", help="shell command run on every alert transition (NETWORK_OVERLAY_ALERT_* in its environment)")
+    p.add_argument("--alert-socket", metavar="ADDR", help="send each alert transition as a JSON datagram to host:port (UDP) or a Unix socket path")
+    p.add_argument("--push", metavar="HOST:PORT", help="also push every reading to a multi-host aggregator (default port 9718)")
+    p.add_argument("--push-transport", choices=("udp", "tcp"), default="udp")
+    p.add_argument("--name", help="host name reported to the aggregator (default: this machine's hostname)")
+    p.add_argument("--aggregate", metavar="[HOST:]PORT", help="receive pushed readings and print the combined view (local + every live host) each interval; a bare port listens on localhost only")
+    p.add_argument("--stale-after", type=float, default=15.0, help="seconds of silence before an aggregated host is dropped (default 15)")
+    p.add_argument("--quiet", action="store_true", help="don't print readings (e.g. a pure --push sender)")
+    p.add_argument("--metrics-port", type=int, metavar="PORT", help="serve /metrics and /metrics.json on 127.0.0.1:PORT")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not 0.05 <= args.interval <= 3600: sys.exit("--interval must be between 0.05 and 3600 seconds")
+    traffic_log = None
+    if args.log:
+        from traffic_log import TrafficLog
+        traffic_log = TrafficLog(args.log)
+    source = TraceSource(args.replay) if args.replay else PsutilSource()
+    if args.record: source = RecordingSource(source, args.record)
+    collector = Collector(args.interval, args.mode, args.nic, args.top, args.include, args.exclude, traffic_log=traffic_log,
+                          stats_window=args.stats_window, half_life=args.half_life, source=source)
+    collector.set_adaptive(args.adaptive, slow=args.max_interval)
+    collector.want_stats = args.stats
+    alerts = None
+    if args.alert:
+        from alerts import AlertEngine, describe, parse_rules
+        rules, errors = parse_rules(args.alert)
+        if errors: sys.exit("\n".join(errors))
+        alerts = AlertEngine(collector, rules, args.alert_command, args.alert_socket)
+        alerts.handlers.append(lambda rule, firing, v: print(f"alert {'firing' if firing else 'resolved'}: {rule.name} ({describe(rule)}) at {format_speed(v)}", file=sys.stderr, flush=True))
+    sender = aggregator = None
+    if args.push or args.aggregate:
+        from fleet import Aggregator, PushSender, parse_address
+        try: push, listen = (parse_address(a) if a else None for a in (args.push, args.aggregate))
+        except ValueError as e: sys.exit(str(e))
+        if args.push: sender = PushSender(collector, push, args.push_transport, args.name).start()
+        if args.aggregate: aggregator = Aggregator(collector, *listen, stale_after=args.stale_after, name=args.name).start()
+    metrics = None
+    if args.metrics_port is not None:
+        from metrics_server import MetricsServer
+        metrics = MetricsServer(collector, port=args.metrics_port).start()
+    write = (_json_writer if args.format == "json" else _csv_writer)(sys.stdout, args.stats, "hosts" if aggregator else "interfaces")
+    remaining = [args.count]
+    def emit(reading):
+        if aggregator:
+            rows = [(n, u, d) for n, u, d, _ in aggregator.hosts()]
+            reading = reading._replace(sent_s=sum((r[1] for r in rows), 0.0), recv_s=sum((r[2] for r in rows), 0.0), rows=rows)
+        if not args.quiet: write(reading)
+        remaining[0] -= 1
+        if remaining[0] == 0: collector.stop()
+    try: (collector.replay if args.replay else collector.run)(emit)
+    except KeyboardInterrupt: pass
+    finally:
+        if hasattr(source, "close"): source.close()
+        if metrics: metrics.stop()
+        if alerts: alerts.close()
+        if sender: sender.close()
+        if aggregator: aggregator.stop()
+        if traffic_log: traffic_log.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+
+class ConfigStore(dict):
+    """The settings dict, persisted atomically on a background thread.
+
+    Assignments only mark the store dirty when a value actually changes. save() snapshots a dirty store and
+    returns at once; the writer thread waits until `delay` seconds pass without another save(), then writes the
+    newest snapshot to a temp file in the same directory and os.replace()s it over the config, so a crash never
+    leaves a truncated file and a drag that saves fifty times writes once. close() flushes synchronously.
+    Values loaded from disk are checked against the defaults' types (or `schema`), enumerated keys against
+    `choices` and numeric keys against their inclusive `ranges`; bad ones fall back to the default.
+    """
+
+    def __init__(self, path, defaults, schema=None, delay=1.0, choices=None, ranges=None):
+        super().__init__(defaults)
+        self.path, self.delay = str(path), delay
+        self.schema = {k: (float, int) if type(v) in (int, float) else (type(v),) for k, v in defaults.items() if v is not None}
+        self.schema.update(schema or {})
+        self.choices = {k: frozenset(v) for k, v in (choices or {}).items()}
+        self.ranges = dict(ranges or {})  # key -> (low, high), both inclusive
+        self.dirty, self.writes, self.saves = False, 0, 0
+        self._pending, self._due, self._closing = None, 0.0, False
+        self._generation = self._written = 0  # snapshot numbers; an older snapshot never replaces a newer one on disk
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.load()
+
+    # --- Loading ---
+    def validate(self, key, value):
+        """ True if value is acceptable for key (unknown keys and None for nullable keys always are). """
+        types = self.schema.get(key)
+        if types is None or (value is None and self.get(key) is None): return True
+        if isinstance(value, bool) and bool not in types: return False  # bool is an int subclass; don't let True pass as a size
+        if not isinstance(value, types): return False
+        if key in self.choices and value not in self.choices[key]: return False
+        if key in self.ranges and not self.ranges[key][0] <= value <= self.ranges[key][1]: return False  # NaN fails too
+        return not isinstance(value, list) or all(isinstance(v, str) for v in value)
+
+    def load(self):
+        if not os.path.exists(self.path): return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: data = json.load(f)
+            if not isinstance(data, dict): raise ValueError("top level is not an object")
+        except (OSError, ValueError) as e: return print(f"Config load error: {e}; using defaults")
+        for key, value in data.items():
+            if self.validate(key, value): dict.__setitem__(self, key, value)
+            else: print(f"Config: ignoring invalid {key}={value!r}, using {self.get(key)!r}")
+
+    # --- Change tracking ---
+    def __setitem__(self, key, value):
+        if key in self and self[key] == value and type(self[key]) is type(value): return
+        dict.__setitem__(self, key, value); self.dirty = True
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key); self.dirty = True
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items(): self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self: self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self: self.dirty = True
+        return dict.pop(self, key, *default)
+
+    # --- Persistence ---
+    def save(self):
+        """ Schedule a write if anything changed; never blocks on disk. """
+        self.saves += 1
+        if not self.dirty: return False
+        snapshot, self.dirty = dict(self), False
+        with self._cond:
+            self._generation += 1
+            self._pending, self._due = (self._generation, snapshot), time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, name="config-writer", daemon=True); self._thread.start()
+            self._cond.notify()
+        return True
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing: self._cond.wait()
+                while self._pending is not None and not self._closing and self._due > time.monotonic(): self._cond.wait(self._due - time.monotonic())
+                if self._pending is None: return
+                pending, self._pending = self._pending, None
+            self._write(*pending)
+
+    def _write(self, generation, snapshot):
+        with self._write_lock:
+            if generation <= self._written: return  # flush() already wrote something newer
+            tmp = f"{self.path}.{os.getpid()}.tmp"  # same directory, so os.replace() is a rename, never a copy
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, indent=2); f.flush(); os.fsync(f.fileno())
+                os.replace(tmp, self.path); self.writes += 1; self._written = generation
+            except Exception as e:
+                print(f"Warning: Could not save config to {self.path}. {e}")
+                try: os.unlink(tmp)
+                except OSError: pass
+                self.dirty = True  # retried by the next save()
+
+    def flush(self):
+        """ Write anything unsaved now, on the calling thread. """
+        self.save()
+        with self._cond: pending, self._pending = self._pending, None
+        if pending is not None: self._write(*pending)
+
+    def close(self):
+        self.flush()
+        with self._cond: self._closing = True; self._cond.notify()
+        if self._thread: self._thread.join(timeout=5)
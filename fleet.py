@@ -0,0 +1,284 @@
+"""Multi-host view: collectors push batched readings to one aggregator over a compact binary protocol.
+
+Batch layout (little-endian), one per UDP datagram or per length-prefixed TCP frame (u32 byte count first):
+    header   13 bytes: b"NOPS", u8 version, u8 flags (0), u16 sample count, u32 batch sequence, u8 host name length
+    host     the sender's name, UTF-8, up to 255 bytes
+    samples  16 bytes each: f64 wall-clock seconds, f32 upload B/s, f32 download B/s
+A batch carries at most MAX_BATCH samples so it always fits one unfragmented datagram. Must not import tkinter.
+"""
+import asyncio
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+MAGIC, VERSION = b"NOPS", 1
+HEADER = struct.Struct("<4sBBHIB")
+SAMPLE = struct.Struct("<dff")
+FRAME = struct.Struct("<I")
+MAX_BATCH = 64  # 13 + 255 + 64 * 16 = 1292 bytes worst case
+MAX_FRAME = HEADER.size + 255 + MAX_BATCH * SAMPLE.size
+DEFAULT_PORT = 9718
+
+def parse_address(text, default_host="127.0.0.1", default_port=DEFAULT_PORT):
+    """ "host:port", "[v6]:port", ":port", "port" or "host" -> (host, port); raises ValueError.
+
+    A bare port binds or sends to localhost. IPv6 addresses must be bracketed, since "::1" can't be told apart
+    from a host and a port.
+    """
+    text = str(text).strip()
+    if text.startswith("["):
+        host, sep, rest = text[1:].partition("]")
+        if not sep or not host or (rest and not rest.startswith(":")): raise ValueError(f"bad address {text!r}")
+        port = rest[1:]
+    elif text.count(":") > 1:
+        raise ValueError(f"bad address {text!r}: write IPv6 addresses in brackets, e.g. [::1]:{default_port}")
+    else:
+        host, sep, port = text.rpartition(":")
+        if not sep: host, port = ("", text) if text.isdigit() else (text, "")
+    if port and not (port.isdigit() and int(port) < 65536): raise ValueError(f"bad port in {text!r}")
+    return host or default_host, int(port) if port else default_port
+
+def encode_batch(host, seq, samples):
+    """ host: bytes (<= 255); samples: [(t, sent_s, recv_s), ...] (<= MAX_BATCH). """
+    return b"".join([HEADER.pack(MAGIC, VERSION, 0, len(samples), seq & 0xFFFFFFFF, len(host)), host] + [SAMPLE.pack(*s) for s in samples])
+
+def decode_batch(data):
+    """ -> (host, seq, [(t, sent_s, recv_s), ...]); raises ValueError on anything malformed. """
+    if len(data) < HEADER.size: raise ValueError("short batch")
+    magic, version, _, count, seq, name_len = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION: raise ValueError("not a push batch")
+    start = HEADER.size + name_len
+    if len(data) != start + count * SAMPLE.size: raise ValueError("batch length mismatch")
+    view = memoryview(data)
+    return bytes(view[HEADER.size:start]).decode("utf-8", "replace"), seq, list(SAMPLE.iter_unpack(view[start:]))
+
+# --- Sending (collector side) ---
+class PushSender:
+    """Batches readings and pushes them to an aggregator from a background thread.
+
+    Readings are appended to a bounded queue (oldest dropped first when the aggregator is unreachable) and sent
+    every `flush_interval` seconds, or sooner once `batch_size` are waiting. One socket is kept for the sender's
+    lifetime: a connected UDP socket, or a persistent TCP connection that is re-established with exponential
+    backoff after a failure. Sampling never waits on the network.
+    """
+
+    def __init__(self, collector=None, address=("127.0.0.1", DEFAULT_PORT), transport="udp", name=None, batch_size=16, flush_interval=1.0, max_pending=1024):
+        if transport not in ("udp", "tcp"): raise ValueError(f"unknown transport {transport!r}")
+        self.collector, self.address, self.transport = collector, tuple(address), transport
+        self.name = (name or socket.gethostname()).encode("utf-8")[:255]
+        self.batch_size, self.flush_interval = max(1, min(batch_size, MAX_BATCH)), flush_interval
+        self.pending = deque(maxlen=max_pending)
+        self.seq = self.sent = self.dropped = self.connects = 0
+        self._sock, self._retry_at, self._backoff = None, 0.0, 0.5
+        self._wake, self._stop, self._thread = threading.Event(), threading.Event(), None
+        self._lock = threading.Lock()  # a requeue and a concurrent add() must agree on the free space
+        if collector is not None: collector.listeners.append(self.publish)
+
+    def publish(self, reading):
+        """ Collector listener: queue one Reading. """
+        if reading.elapsed: self.add(reading.t, reading.sent_s, reading.recv_s)
+
+    def add(self, t, sent_s, recv_s):
+        with self._lock:
+            if len(self.pending) == self.pending.maxlen: self.dropped += 1
+            self.pending.append((t, sent_s, recv_s))
+        if len(self.pending) >= self.batch_size: self._wake.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="push-sender", daemon=True); self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval); self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """ Send everything queued, in batches; stops early (keeping the rest queued) while the link is down. """
+        while self.pending:
+            batch = [self.pending.popleft() for _ in range(min(len(self.pending), self.batch_size))]
+            if not self._send(encode_batch(self.name, self.seq, batch)):
+                self._requeue(batch); return False
+            self.seq += 1; self.sent += len(batch)
+        return True
+
+    def _requeue(self, batch):
+        """ Put an unsent batch back in front, in order. If samples arrived meanwhile, its oldest ones are dropped. """
+        with self._lock:
+            lost = max(len(batch) - (self.pending.maxlen - len(self.pending)), 0)
+            self.dropped += lost
+            self.pending.extendleft(reversed(batch[lost:]))
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self._retry_at: return None
+        try:
+            if self.transport == "udp":
+                sock = socket.socket(socket.AF_INET6 if ":" in self.address[0] else socket.AF_INET, socket.SOCK_DGRAM)
+                sock.connect(self.address)
+            else:
+                sock = socket.create_connection(self.address, timeout=2)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock, self._backoff = sock, 0.5
+            self.connects += 1
+        except OSError:
+            self._retry_at, self._backoff = now + self._backoff, min(self._backoff * 2, 30.0)
+        return self._sock
+
+    def _send(self, data):
+        sock = self._sock or self._connect()
+        if sock is None: return False
+        try:
+            if self.transport == "udp": sock.send(data)
+            else: sock.sendall(FRAME.pack(len(data)) + data)
+            return True
+        except OSError:
+            sock.close(); self._sock = None
+            self._retry_at, self._backoff = time.monotonic() + self._backoff, min(self._backoff * 2, 30.0)
+            return False
+
+    def close(self):
+        self._stop.set(); self._wake.set()
+        if self._thread: self._thread.join(timeout=5)
+        self.flush()
+        if self._sock: self._sock.close(); self._sock = None
+        if self.collector is not None and self.publish in self.collector.listeners: self.collector.listeners.remove(self.publish)
+
+# --- Aggregating (overlay side) ---
+class Host:
+    """Latest samples and link health for one sender."""
+    __slots__ = ("name", "samples", "last_seen", "seq", "batches", "lost", "addr")
+
+    def __init__(self, name, buffer):
+        self.name, self.samples = name, deque(maxlen=buffer)
+        self.last_seen, self.seq, self.batches, self.lost, self.addr = 0.0, None, 0, 0, None
+
+class Aggregator:
+    """asyncio receiver for pushed batches (UDP and TCP on the same port) with bounded per-host state.
+
+    Each host keeps at most `buffer` recent samples; hosts silent for `stale_after` seconds are dropped, and at
+    most `max_hosts` are tracked at once. Decoding is a struct.iter_unpack over the datagram, so one core keeps
+    up with hundreds of senders. If given a collector, the local readings are included under `name`. Runs its
+    own event loop on a daemon thread; hosts() may be called from any thread.
+    """
+
+    def __init__(self, collector=None, host="127.0.0.1", port=DEFAULT_PORT, buffer=120, stale_after=15.0, max_hosts=1024, name=None):
+        self.collector, self.host, self.port = collector, host, port
+        self.buffer, self.stale_after, self.max_hosts = buffer, stale_after, max_hosts
+        self.name = name or socket.gethostname()
+        self.state = {}
+        self.batches = self.samples = self.malformed = self.rejected = self.expired = 0
+        self.loop, self._udp, self._tcp, self._thread = None, None, None, None
+        if collector is not None: collector.listeners.append(self.publish)
+
+    # --- Ingest ---
+    def publish(self, reading):
+        """ Collector listener: the local host's own readings. """
+        if reading.elapsed: self._record(self.name, None, [(reading.t, reading.sent_s, reading.recv_s)], None)
+
+    def ingest(self, data, addr=None):
+        """ Account one received batch; returns False if it was malformed or refused. """
+        try: name, seq, samples = decode_batch(data)
+        except ValueError: self.malformed += 1; return False
+        return self._record(name, seq, samples, addr)
+
+    def _record(self, name, seq, samples, addr):
+        h = self.state.get(name)
+        if h is None:
+            if len(self.state) >= self.max_hosts: self.rejected += 1; return False
+            h = self.state[name] = Host(name, self.buffer)
+        if seq is not None and h.seq is not None:
+            gap = (seq - h.seq - 1) & 0xFFFFFFFF
+            if gap < 1 << 16: h.lost += gap  # a larger jump is a restarted sender, not loss
+        h.seq, h.addr, h.last_seen = seq, addr, time.monotonic()
+        h.samples.extend(samples); h.batches += 1
+        self.batches += 1; self.samples += len(samples)
+        return True
+
+    def expire(self, now=None):
+        """ Drop hosts that have been silent for stale_after seconds; returns how many went. """
+        cutoff = (now or time.monotonic()) - self.stale_after
+        stale = [name for name, h in list(self.state.items()) if h.last_seen < cutoff]
+        for name in stale: self.state.pop(name, None)
+        self.expired += len(stale)
+        return len(stale)
+
+    def hosts(self):
+        """ [(name, sent_s, recv_s, age_seconds), ...] from each live host's newest sample, busiest first. """
+        now, rows = time.monotonic(), []
+        for name, h in list(self.state.items()):  # snapshot: the loop thread may add or expire hosts meanwhile
+            if h.samples: _, up, down = h.samples[-1]; rows.append((name, up, down, now - h.last_seen))
+        rows.sort(key=lambda r: r[1] + r[2], reverse=True)
+        return rows
+
+    def totals(self):
+        rows = self.hosts()
+        return sum(r[1] for r in rows), sum(r[2] for r in rows), len(rows)
+
+    # --- Serving (asyncio thread) ---
+    class _Datagrams(asyncio.DatagramProtocol):
+        def __init__(self, aggregator): self.aggregator = aggregator
+        def datagram_received(self, data, addr): self.aggregator.ingest(data, addr)
+
+    async def _handle_stream(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        try:
+            while True:
+                size, = FRAME.unpack(await reader.readexactly(FRAME.size))
+                if size > MAX_FRAME: self.malformed += 1; break
+                if not self.ingest(await reader.readexactly(size), addr): break  # malformed or refused: drop the connection
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError): pass
+        finally:
+            writer.close()
+
+    async def _expire_forever(self):
+        while True:
+            await asyncio.sleep(max(self.stale_after / 4, 0.05))
+            self.expire()
+
+    async def _serve(self, ready):
+        loop = asyncio.get_running_loop()
+        self._tcp = await asyncio.start_server(self._handle_stream, self.host, self.port, reuse_address=True)
+        self.port = self._tcp.sockets[0].getsockname()[1]  # resolves port=0; UDP binds the same number
+        sock = socket.socket(self._tcp.sockets[0].family, socket.SOCK_DGRAM)
+        try: sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)  # absorb bursts from many senders
+        except OSError: pass
+        try:
+            sock.bind((self.host, self.port))
+            self._udp, _ = await loop.create_datagram_endpoint(lambda: self._Datagrams(self), sock=sock)
+        except BaseException:
+            sock.close(); self._tcp.close(); await self._tcp.wait_closed()  # don't leave the TCP port bound
+            raise
+        expiry = loop.create_task(self._expire_forever())
+        ready.set()
+        try:
+            async with self._tcp: await self._tcp.serve_forever()
+        finally: expiry.cancel(); self._udp.close()
+
+    def start(self):
+        """ Start receiving on a daemon thread; returns once both sockets are bound. """
+        ready, errors = threading.Event(), []
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try: self.loop.run_until_complete(self._serve(ready))
+            except asyncio.CancelledError: pass
+            except Exception as e: errors.append(e); ready.set()
+            finally: self.loop.close()
+        self._thread = threading.Thread(target=run, name="aggregator", daemon=True); self._thread.start()
+        ready.wait(5)
+        if errors: raise errors[0]
+        return self
+
+    async def _shutdown(self):
+        self._tcp.close()
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task(): task.cancel()
+
+    def stop(self):
+        if self.loop and self._tcp and not self.loop.is_closed():
+            try: asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            except RuntimeError: pass  # loop already stopped
+        if self._thread: self._thread.join(timeout=5)
+        if self.collector is not None and self.publish in self.collector.listeners: self.collector.listeners.remove(self.publish)
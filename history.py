@@ -0,0 +1,49 @@
+from array import array
+
+class History:
+    """Fixed-size ring buffer of (timestamp, up, down) samples stored in flat `array('d')` columns.
+
+    append() is O(1) and never allocates; window() returns zero-copy memoryviews in
+    chronological order. 3600 samples (1 hour at 1 Hz) take ~84 KB.
+    """
+
+    def __init__(self, capacity=3600):
+        self.capacity = capacity
+        self.t, self.up, self.down = (array("d", bytes(8 * capacity)) for _ in range(3))
+        self.head = 0  # next write position
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, t, up, down):
+        i = self.head
+        self.t[i], self.up[i], self.down[i] = t, up, down
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity: self.count += 1
+
+    def clear(self):
+        self.head = self.count = 0
+
+    def _segments(self, n):
+        """ (start, stop) index ranges covering the newest n samples, oldest first. """
+        n = min(n, self.count)
+        start = (self.head - n) % self.capacity
+        if n == 0: return []
+        if start + n <= self.capacity: return [(start, start + n)]
+        return [(start, self.capacity), (0, self.head)]
+
+    def window(self, n=None):
+        """ Newest n samples as a list of (t, up, down) memoryview triples, oldest segment first. """
+        views = [memoryview(c) for c in (self.t, self.up, self.down)]
+        return [tuple(v[a:b] for v in views) for a, b in self._segments(self.count if n is None else n)]
+
+    def latest(self):
+        """ (t, up, down) of the newest sample, or None if empty. """
+        if not self.count: return None
+        i = (self.head - 1) % self.capacity
+        return self.t[i], self.up[i], self.down[i]
+
+    def peak(self, n=None):
+        """ Largest up or down rate over the newest n samples. """
+        return max((max(max(up, default=0.0), max(down, default=0.0)) for _, up, down in self.window(n)), default=0.0)
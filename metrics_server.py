@@ -0,0 +1,123 @@
+import asyncio
+import json
+import threading
+
+DEFAULT_PORT = 9717
+PREFIX = "network_overlay"
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _response(status, content_type, body):
+    head = f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\nCache-Control: no-store\r\n\r\n"
+    return head.encode() + body
+
+NOT_FOUND = _response("404 Not Found", "text/plain; charset=utf-8", b"not found\n")
+BAD_REQUEST = _response("400 Bad Request", "text/plain; charset=utf-8", b"bad request\n")
+
+class MetricsServer:
+    """Localhost HTTP endpoint serving the latest reading as Prometheus text (/metrics) and JSON (/metrics.json).
+
+    Both responses are rendered once per sampling tick in publish() and swapped in atomically, so
+    request handling is a dictionary lookup plus a socket write: any number of scrapes costs no extra
+    counter reads and never touches the collector thread. The server runs its own asyncio loop on a
+    daemon thread.
+    """
+
+    def __init__(self, collector=None, host="127.0.0.1", port=DEFAULT_PORT):
+        self.collector, self.host, self.port = collector, host, port
+        self.requests = self.publishes = 0
+        self._responses = {}
+        self.publish(None)
+        self.loop, self._server, self._thread = None, None, None
+        if collector is not None:
+            collector.per_nic = collector.want_stats = True
+            collector.listeners.append(self.publish)
+
+    # --- Rendering (sampling thread) ---
+    def publish(self, reading):
+        """ Pre-render both endpoints for `reading` (a collector Reading, or None before the first tick). """
+        nic = self.collector.nic_sampler if self.collector is not None and self.collector.per_nic else None
+        rates = {n: (u, d) for n, u, d in nic.rows()} if nic else {}
+        counters = {n: (s, r) for n, s, r in nic.counters()} if nic else {}
+        metrics = [
+            ("transmit_bytes_per_second", "gauge", "Upload rate per interface.", {n: v[0] for n, v in rates.items()}),
+            ("receive_bytes_per_second", "gauge", "Download rate per interface.", {n: v[1] for n, v in rates.items()}),
+            ("transmit_bytes_total", "counter", "Bytes sent per interface.", {n: v[0] for n, v in counters.items()}),
+            ("receive_bytes_total", "counter", "Bytes received per interface.", {n: v[1] for n, v in counters.items()}),
+        ]
+        lines = []
+        for name, kind, help_text, values in metrics:
+            lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} {kind}"]
+            lines += [f'{PREFIX}_{name}{{interface="{_label(n)}"}} {v}' for n, v in values.items()]
+        if reading is not None:
+            lines += [f"# HELP {PREFIX}_displayed_transmit_bytes_per_second Upload rate shown by the overlay.",
+                      f"# TYPE {PREFIX}_displayed_transmit_bytes_per_second gauge",
+                      f"{PREFIX}_displayed_transmit_bytes_per_second {reading.sent_s}",
+                      f"# HELP {PREFIX}_displayed_receive_bytes_per_second Download rate shown by the overlay.",
+                      f"# TYPE {PREFIX}_displayed_receive_bytes_per_second gauge",
+                      f"{PREFIX}_displayed_receive_bytes_per_second {reading.recv_s}",
+                      f"# HELP {PREFIX}_displayed_bytes_per_second_stat Smoothed (avg), rolling peak and percentiles of the displayed rates.",
+                      f"# TYPE {PREFIX}_displayed_bytes_per_second_stat gauge"]
+            if reading.stats:
+                lines += [f'{PREFIX}_displayed_bytes_per_second_stat{{direction="{d}",stat="{k}"}} {v}'
+                          for d, values in reading.stats.items() for k, v in values.items() if k != "now"]
+            lines += [f"# HELP {PREFIX}_last_sample_timestamp_seconds Wall-clock time of the last sample.",
+                      f"# TYPE {PREFIX}_last_sample_timestamp_seconds gauge",
+                      f"{PREFIX}_last_sample_timestamp_seconds {reading.t:.3f}"]
+        doc = {"t": reading.t if reading else None, "up": reading.sent_s if reading else 0.0, "down": reading.recv_s if reading else 0.0,
+               "stats": reading.stats if reading else None,
+               "interfaces": {n: {"up": rates[n][0], "down": rates[n][1], "bytes_sent": counters[n][0], "bytes_recv": counters[n][1]} for n in rates}}
+        self._responses = {  # single reference swap; handlers never see a half-built dict
+            "/metrics": _response("200 OK", "text/plain; version=0.0.4; charset=utf-8", ("\n".join(lines) + "\n").encode()),
+            "/metrics.json": _response("200 OK", "application/json", json.dumps(doc, separators=(",", ":")).encode()),
+        }
+        self.publishes += 1
+
+    # --- Serving (asyncio thread) ---
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                parts = request.split(b"\r\n", 1)[0].split()
+                self.requests += 1
+                if len(parts) < 2: writer.write(BAD_REQUEST); break
+                path = parts[1].decode("latin-1").split("?", 1)[0]
+                writer.write(self._responses.get(path, NOT_FOUND))
+                await writer.drain()
+                if parts[-1] == b"HTTP/1.0" or b"connection: close" in request.lower(): break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.CancelledError, ConnectionError): pass
+        finally:
+            writer.close()
+
+    async def _serve(self, ready):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, reuse_address=True)
+        self.port = self._server.sockets[0].getsockname()[1]  # resolves port=0
+        ready.set()
+        async with self._server: await self._server.serve_forever()
+
+    def start(self):
+        """ Start serving on a daemon thread; returns once the socket is bound. """
+        ready, errors = threading.Event(), []
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try: self.loop.run_until_complete(self._serve(ready))
+            except asyncio.CancelledError: pass
+            except Exception as e: errors.append(e); ready.set()
+            finally: self.loop.close()
+        self._thread = threading.Thread(target=run, daemon=True); self._thread.start()
+        ready.wait(5)
+        if errors: raise errors[0]
+        return self
+
+    async def _shutdown(self):
+        self._server.close()
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task(): task.cancel()
+
+    def stop(self):
+        if self.loop and self._server and not self.loop.is_closed():
+            try: asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            except RuntimeError: pass  # loop already stopped
+        if self._thread: self._thread.join(timeout=5)
+        if self.collector is not None and self.publish in self.collector.listeners: self.collector.listeners.remove(self.publish)
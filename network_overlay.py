@@ -1,16 +1,26 @@
+import sys
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Collector-only mode for servers: stream readings to stdout, never import tkinter or PIL. It never takes the
+    # GUI's single-instance lock, so any number of collectors (e.g. --push senders) can run beside the overlay.
+    from collector import main
+    sys.exit(main(sys.argv[1:]))
+
 import tkinter as tk
 import tkinter.messagebox as messagebox
-import tkinter.colorchooser as colorchooser
-import tkinter.filedialog as filedialog
-import tkinter.font as tkfont
-import tkinter.ttk as ttk
 import psutil
 import threading
 import time
-import json
 import os
-import sys
+import importlib.util
 from pathlib import Path
+from collector import MODES, Collector, Mailbox, format_size, format_speed, parse_patterns
+from history import History
+from sparkline import Sparkline
+from traffic_log import TrafficLog
+from alerts import AlertEngine, describe, parse_rules
+from config_store import ConfigStore
+from resources import ResourceCache
+from sources import PsutilSource, RecordingSource
 
 # --- PyInstaller Resource Handling ---
 def resource_path(relative_path):
@@ -24,17 +34,24 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 # --- Dependency Checks ---
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
-try:
-    import winreg
-    WINDOWS_REGISTRY_AVAILABLE = True
-except ImportError:
-    WINDOWS_REGISTRY_AVAILABLE = False
+# Only probed here; Pillow, winreg and the dialog modules are imported where they are first used so they don't delay start-up.
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+WINDOWS_REGISTRY_AVAILABLE = sys.platform == "win32"
+
+# Always-on-top re-check backoff: starts at 1 s after any z-order event, doubles up to 5 min while undisturbed.
+TOPMOST_MIN_MS, TOPMOST_MAX_MS = 1000, 300000
+ALERT_BLINK_MS = 500
+FIRST_SAMPLE_S = 0.1  # the first reading covers a short window so real numbers replace the placeholder right away
+
+THEMES = {
+    "modern": {"bg":"#2D2D2D","fg":"#FFFFFF","font":("Segoe UI",10,"bold"),"border":1,"relief":"flat","transparency":"#2D2D2D","opacity":0.9},
+    "glass":  {"bg":"#000000","fg":"#00FF00","font":("Consolas",9),"border":0,"relief":"flat","transparency":"#000000","opacity":0.8},
+    "neon":   {"bg":"#0A0A0A","fg":"#00FFFF","font":("Arial",10,"bold"),"border":2,"relief":"raised","transparency":"#0A0A0A","opacity":0.95},
+    "classic":{"bg":"SystemButtonFace","fg":"SystemButtonText","font":("TkDefaultFont",9),"border":1,"relief":"raised","transparency":None,"opacity":1.0},
+    "dark_pro":{"bg":"#1E1E1E","fg":"#D4D4D4","font":("Cascadia Code",9),"border":1,"relief":"solid","transparency":"#1E1E1E","opacity":0.92},
+}
+POSITIONS = (("Free Movement","free"),("Bottom Left","bottom_left"),("Bottom Middle","bottom_middle"),("Bottom Right","bottom_right"),("Top Left","top_left"),("Top Right","top_right"),("Center","center"))
+RELIEFS = ("flat","raised","sunken","solid","ridge","groove")
 
 class NetworkOverlay:
     """A customizable desktop network monitoring tool."""
@@ -62,12 +79,12 @@ class NetworkOverlay:
         self._initialize_variables()
         self._setup_themes()
 
-        # --- UI and Events ---
-        self.setup_ui()
-
         # --- Network Monitoring ---
         self._initialize_network_counters()
 
+        # --- UI and Events ---
+        self.setup_ui()
+
         # --- Start Background Threads ---
         self.update_running = True
         self._start_threads()
@@ -95,28 +112,29 @@ class NetworkOverlay:
 
     def _load_configuration(self):
         self.config_file = Path(os.path.expanduser("~")) / ".network_overlay_config.json"
-        defaults = {"theme":"modern","positioning":"free","x":50,"y":None,"update_interval":1,"custom_bg":"#FF5733","custom_fg":"#FFFFFF","custom_font":"Arial","custom_size":10,"custom_style":"normal","custom_border":1,"custom_relief":"flat","custom_opacity":0.9,"up_icon":"↑","down_icon":"↓","background_image":None,"always_on_top":True,"auto_start":False}
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f: data = json.load(f)
-                defaults.update(data)
-            except Exception as e: print(f"Config load error: {e}")
-        self.config = defaults
+        defaults = {"theme":"modern","positioning":"free","x":50,"y":None,"update_interval":1,"custom_bg":"#FF5733","custom_fg":"#FFFFFF","custom_font":"Arial","custom_size":10,"custom_style":"normal","custom_border":1,"custom_relief":"flat","custom_opacity":0.9,"alert_rules":[],"alert_fg":"#FFFFFF","alert_bg":"#C0392B","alert_flash":True,"alert_command":None,"alert_socket":None,"up_icon":"↑","down_icon":"↓","background_image":None,"always_on_top":True,"auto_start":False,"nic_mode":"total","nic_name":None,"nic_top_n":3,"nic_include":"","nic_exclude":"lo, veth*","show_graph":False,"metrics_port":None,"adaptive_interval":False,"adaptive_max_interval":2,"show_stats":False,"stats_window":60,"ewma_half_life":5,"trace_record":None,"fleet_listen":None,"fleet_push":None,"fleet_transport":"udp","fleet_name":None,"fleet_stale_seconds":15,"fleet_top_n":5}
+        nullable = {"y":(int,float),"nic_name":(str,),"metrics_port":(int,),"background_image":(str,),"trace_record":(str,),"alert_command":(str,),"alert_socket":(str,),"fleet_listen":(str,),"fleet_push":(str,),"fleet_name":(str,)}
+        choices = {"theme": [*THEMES, "customizable"], "positioning": [m for _, m in POSITIONS], "nic_mode": MODES,
+                   "fleet_transport": ("udp", "tcp"), "custom_relief": RELIEFS}
+        ranges = {"update_interval": (0.1, 10), "adaptive_max_interval": (1, 600), "stats_window": (1, 86400), "ewma_half_life": (0.1, 3600),
+                  "custom_opacity": (0.1, 1.0), "custom_size": (6, 72), "custom_border": (0, 20), "nic_top_n": (1, 100),
+                  "metrics_port": (1, 65535), "fleet_stale_seconds": (1, 3600), "fleet_top_n": (1, 100)}
+        self.config = ConfigStore(self.config_file, defaults, nullable, choices=choices, ranges=ranges)
 
     def _initialize_variables(self):
         self.current_theme = self.config.get("theme", "modern")
         self.positioning_mode = self.config.get("positioning", "free")
         self.update_interval = self.config.get("update_interval", 1)
         self.dragging, self.start_x, self.start_y = False, 0, 0
-        self.label, self.main_frame, self.context_menu = None, None, None
+        self.label, self.main_frame, self.context_menu, self.sparkline = None, None, None, None
+        self.history = History(3600)
+        self.mailbox, self.ui_frames = Mailbox(), {"drawn": 0, "skipped": 0}
+        self.resources, self.last_reading = ResourceCache(self.root), None
+        self._alert_job, self._alert_on = None, False
 
     def _setup_themes(self):
-        self.themes = {
-            "modern": {"bg":"#2D2D2D","fg":"#FFFFFF","font":("Segoe UI",10,"bold"),"border":1,"relief":"flat","transparency":"#2D2D2D","opacity":0.9},
-            "glass":  {"bg":"#000000","fg":"#00FF00","font":("Consolas",9),"border":0,"relief":"flat","transparency":"#000000","opacity":0.8},
-            "neon":   {"bg":"#0A0A0A","fg":"#00FFFF","font":("Arial",10,"bold"),"border":2,"relief":"raised","transparency":"#0A0A0A","opacity":0.95},
-            "classic":{"bg":"SystemButtonFace","fg":"SystemButtonText","font":("TkDefaultFont",9),"border":1,"relief":"raised","transparency":None,"opacity":1.0},
-            "dark_pro":{"bg":"#1E1E1E","fg":"#D4D4D4","font":("Cascadia Code",9),"border":1,"relief":"solid","transparency":"#1E1E1E","opacity":0.92},
+        self.themes = {name: dict(t) for name, t in THEMES.items()}  # per-instance copies: Opacity edits them
+        self.themes.update({
             "customizable":{
                 "bg":self.config.get("custom_bg"), "fg":self.config.get("custom_fg"),
                 "font":(self.config.get("custom_font"),self.config.get("custom_size"),self.config.get("custom_style")),
@@ -125,75 +143,154 @@ class NetworkOverlay:
                 "up_icon":self.config.get("up_icon"),"down_icon":self.config.get("down_icon"),
                 "background_image":self.config.get("background_image"),
             }
-        }
+        })
     
     def _initialize_network_counters(self):
-        try:
-            net_io = psutil.net_io_counters()
-            self.prev_bytes_sent, self.prev_bytes_recv = net_io.bytes_sent, net_io.bytes_recv
-        except Exception:
-            self.prev_bytes_sent, self.prev_bytes_recv = 0, 0
-            
+        c = self.config
+        self.traffic_log, self.metrics_server = None, None  # opened by _start_services once the first reading is up
+        self.aggregator, self.push_sender = None, None
+        self.collector = Collector(self.update_interval, c.get("nic_mode","total"), c.get("nic_name"), c.get("nic_top_n",3),
+                                   parse_patterns(c.get("nic_include")), parse_patterns(c.get("nic_exclude")), self.history, None,
+                                   c.get("stats_window",60), c.get("ewma_half_life",5))
+        self.collector.want_stats = bool(c.get("show_stats"))
+        self.collector.set_adaptive(c.get("adaptive_interval"), slow=c.get("adaptive_max_interval", 2))
+        rules, errors = parse_rules(c.get("alert_rules"))
+        for e in errors: print(f"Warning: Alert rule skipped, {e}")
+        self.alerts = AlertEngine(self.collector, rules, c.get("alert_command"), c.get("alert_socket"))
+
     def _start_threads(self):
         threading.Thread(target=self.update_throughput, daemon=True).start()
-        threading.Thread(target=self.maintain_topmost, daemon=True).start()
+        self.root.after(20, self.drain_mailbox)
+        self.root.after_idle(self._start_services)
+        self.watch_topmost()
+
+    def _start_services(self):
+        """ Everything the first paint doesn't need: the traffic log, trace recording and the metrics server. """
+        c = self.config
+        try: self.traffic_log = self.collector.traffic_log = TrafficLog(Path(os.path.expanduser("~")) / ".network_overlay_traffic.db")
+        except Exception as e: print(f"Warning: Traffic log disabled. {e}")
+        if c.get("trace_record"):
+            try: self.collector.set_source(RecordingSource(PsutilSource(), c["trace_record"]))
+            except Exception as e: print(f"Warning: Trace recording disabled. {e}")
+        if c.get("metrics_port"): self._start_metrics_server()
+        if c.get("fleet_listen") or c.get("fleet_push"): self._start_fleet()
+        self.resources.prefetch_families()
 
     # --- UI Setup ---
     def setup_ui(self):
-        for widget in self.root.winfo_children(): widget.destroy()
-        theme = self.themes[self.current_theme]
+        """ Build the widgets once; apply_theme() restyles them in place on every theme change. """
+        self.system_bg = self.root.cget("bg")  # "SystemButtonFace" stand-in, read before any theme recolors the root
+        self.main_frame = tk.Frame(self.root)
+        self.main_frame.pack(fill="both", expand=True)
+        self.label = tk.Label(self.main_frame, justify="left", compound="center")
+        self.label.pack(padx=5, pady=2)
+        self.context_menu = None  # built on the first right-click
+        self.setup_events()
+        self.apply_theme()
 
-        if theme.get("transparency"): self.root.attributes("-transparentcolor", theme["transparency"])
+    def apply_theme(self):
+        theme = self.themes[self.current_theme]
+        custom = self.current_theme == "customizable"
+        try: self.root.attributes("-transparentcolor", theme.get("transparency") or "")
+        except tk.TclError: pass  # Windows only
         try: self.root.attributes("-alpha", theme["opacity"])
         except tk.TclError: pass
 
-        bg_color = theme["bg"] if theme["bg"] != "SystemButtonFace" else self.root.cget("bg")
+        bg_color = self._theme_bg(theme)
         self.root.config(bg=bg_color)
-        
-        self.main_frame = tk.Frame(self.root, bg=bg_color, bd=theme["border"], relief=theme["relief"])
-        self.main_frame.pack(fill="both", expand=True)
-        text = f"{theme.get('up_icon', '↑')}: 0.0 B/s\n{theme.get('down_icon', '↓')}: 0.0 B/s"
-        
-        self.label = tk.Label(self.main_frame, text=text, font=theme["font"], fg=theme["fg"], bg=bg_color, justify="left")
-        self.label.pack(padx=5, pady=2)
-        
-        self.context_menu = tk.Menu(self.root, tearoff=0)
-        self.setup_context_menu()
-        self.setup_events()
+        self.main_frame.config(bg=bg_color, bd=theme["border"], relief=theme["relief"])
+        self.icons = (theme.get('up_icon','↑'), theme.get('down_icon','↓')) if custom else ("Up:", "Dn:")
+        text = self._format_reading(self.last_reading) if self.last_reading else f"{self.icons[0]} 0.0 B/s\n{self.icons[1]} 0.0 B/s"
+        font = self.resources.font(*theme["font"])
+        image = self.resources.image(theme["background_image"], self._text_box(font, text)) if custom and theme.get("background_image") else None
+        self.label.config(text=text, font=font, fg=theme["fg"], bg=bg_color, image=image or "")
+        self.shown_text, self._alert_on = text, False  # widgets are back in theme colors
+        self._update_graph(theme, bg_color)
+        self._sync_customize_menu()
         self.position_overlay()
 
+    def _theme_bg(self, theme):
+        return theme["bg"] if theme["bg"] != "SystemButtonFace" else self.system_bg
+
+    def _text_box(self, font, text):
+        """ Size the background image for the label: widest of the text and a typical reading, in 16 px steps so it rarely rescales. """
+        lines = text.split("\n")
+        width = max(font.measure(l) for l in lines + [f"{self.icons[0]} 1023.9 KB/s"])
+        return (-(-width // 16) * 16 + 10, font.metrics("linespace") * len(lines) + 4)
+
+    def _update_graph(self, theme, bg_color):
+        down_color = theme["fg"] if theme["fg"].startswith("#") else "#00BFFF"
+        if not self.config.get("show_graph"):
+            if self.sparkline: self.sparkline.canvas.destroy(); self.sparkline = None
+        elif self.sparkline: self.sparkline.restyle(bg_color, self.sparkline.up_color, down_color)
+        else:
+            self.sparkline = Sparkline(self.main_frame, self.history, bg=bg_color, down_color=down_color)
+            self.sparkline.pack(padx=5, pady=(0, 3))
+
     def setup_context_menu(self):
-        menu=self.context_menu; menu.delete(0,"end")
+        menu=self.context_menu
+        if menu is None: return  # not built yet; show_context_menu builds it with the current state
+        menu.delete(0,"end")
         pos_menu=tk.Menu(menu,tearoff=0)
-        positions = [("Free Movement","free"),("Bottom Left","bottom_left"),("Bottom Middle","bottom_middle"),("Bottom Right","bottom_right"),("Top Left","top_left"),("Top Right","top_right"),("Center","center")]
-        for lbl,mode in positions: pos_menu.add_command(label=lbl,command=lambda m=mode:self.set_positioning(m))
+        for lbl,mode in POSITIONS: pos_menu.add_command(label=lbl,command=lambda m=mode:self.set_positioning(m))
         menu.add_cascade(label="Position",menu=pos_menu)
 
         theme_menu=tk.Menu(menu,tearoff=0)
         for t in self.themes: theme_menu.add_command(label=t.replace("_"," ").title(),command=lambda th=t:self.change_theme(th))
         menu.add_cascade(label="Themes",menu=theme_menu)
 
+        nic_menu=tk.Menu(menu,tearoff=0)
+        nic_menu.add_command(label="All (Total)",command=lambda:self.set_nic_mode("total"))
+        nic_menu.add_command(label=f"Top {self.config.get('nic_top_n',3)} Busiest",command=lambda:self.set_nic_mode("top"))
+        nic_menu.add_command(label="Filters...",command=self.set_nic_filters)
+        names = self._interface_names()
+        if names: nic_menu.add_separator()
+        for n in names: nic_menu.add_command(label=n,command=lambda n=n:self.set_nic_mode("single",n))
+        menu.add_cascade(label="Interfaces",menu=nic_menu)
+
         settings_menu=tk.Menu(menu,tearoff=0)
         settings_menu.add_command(label="Update Interval...",command=self.set_update_interval)
+        settings_menu.add_command(label=f"Adaptive Interval ({'On' if self.config.get('adaptive_interval') else 'Off'})",command=self.toggle_adaptive_interval)
         settings_menu.add_command(label="Opacity...",command=self.set_opacity)
+        settings_menu.add_command(label=f"Alerts ({len(self.alerts.rules)})...",command=self.set_alerts)
         settings_menu.add_command(label="Toggle Always On Top",command=self.toggle_always_on_top)
+        settings_menu.add_command(label="Toggle Graph",command=self.toggle_graph)
+        settings_menu.add_command(label="Toggle Now / Avg / Peak",command=self.toggle_stats)
+        settings_menu.add_command(label="Toggle Metrics Server",command=self.toggle_metrics_server)
+        settings_menu.add_command(label=f"Multi-Host View ({'On' if self.aggregator else 'Off'})...",command=self.set_multi_host)
+        settings_menu.add_command(label=f"Record Trace ({'On' if self.config.get('trace_record') else 'Off'})...",command=self.toggle_trace_recording)
         if WINDOWS_REGISTRY_AVAILABLE: settings_menu.add_command(label="Toggle Auto Start",command=self.toggle_auto_start)
         menu.add_cascade(label="Settings",menu=settings_menu)
-        
-        if self.current_theme=="customizable":
-            cust_menu=tk.Menu(menu,tearoff=0)
-            cust_menu.add_command(label="Colors...",command=self.customize_colors)
-            cust_menu.add_command(label="Icons & Text...",command=self.customize_icons) # Restored
-            cust_menu.add_command(label="Font & Style...",command=self.customize_font) # Restored
-            cust_menu.add_command(label="Background Image...",command=self.set_background) # Restored
-            cust_menu.add_command(label="Border & Effects...",command=self.customize_border) # Restored
-            cust_menu.add_separator()
-            cust_menu.add_command(label="Reset to Default",command=self.reset_customization)
-            menu.add_cascade(label="Customize",menu=cust_menu)
-            
+        menu.add_command(label="Data Usage...",command=self.show_usage)
+        menu.add_command(label="Top Talkers...",command=self.show_top_talkers)
+
+        cust_menu=self.customize_menu=tk.Menu(menu,tearoff=0)
+        cust_menu.add_command(label="Colors...",command=self.customize_colors)
+        cust_menu.add_command(label="Icons & Text...",command=self.customize_icons) # Restored
+        cust_menu.add_command(label="Font & Style...",command=self.customize_font) # Restored
+        cust_menu.add_command(label="Background Image...",command=self.set_background) # Restored
+        cust_menu.add_command(label="Border & Effects...",command=self.customize_border) # Restored
+        cust_menu.add_separator()
+        cust_menu.add_command(label="Reset to Default",command=self.reset_customization)
+        self.customize_shown = False
+
         menu.add_separator()
         menu.add_command(label="About",command=self.show_about)
         menu.add_command(label="Exit",command=self.on_closing)
+        self._sync_customize_menu()
+
+    def _interface_names(self):
+        """ Filtered NICs as the collector's source sees them, so a replayed trace lists its own interfaces. """
+        try: return sorted(n for n in self.collector.source.pernic()[0] if self.collector.nic_sampler.matches(n))
+        except Exception: return []
+
+    def _sync_customize_menu(self):
+        """ Show the Customize cascade only for the customizable theme: the one part of the menu a theme change touches. """
+        menu, want = self.context_menu, self.current_theme == "customizable"
+        if menu is None or want == self.customize_shown: return
+        if want: menu.insert_cascade(menu.index("Top Talkers...") + 1, label="Customize", menu=self.customize_menu)
+        else: menu.delete("Customize")
+        self.customize_shown = want
 
     def setup_events(self):
         for widget in [self.root, self.main_frame, self.label]:
@@ -224,41 +321,101 @@ class NetworkOverlay:
         self.current_theme = theme_name
         self.config["theme"] = theme_name
         if theme_name == "customizable": self._setup_themes()
-        self.save_config(); self.setup_ui()
+        self.save_config(); self.apply_theme()
 
     # --- Core Functionality ---
-    def maintain_topmost(self):
-        while self.update_running:
-            try:
-                if self.config.get("always_on_top", True): self.root.attributes("-topmost", True)
-                time.sleep(1)
-            except tk.TclError: break
+    def watch_topmost(self):
+        """ Keep the overlay on top from the Tk loop: react to focus/visibility/map events instead of polling. """
+        self.topmost_wakeups, self._topmost_delay, self._topmost_job, self._topmost_pending = 0, TOPMOST_MIN_MS, None, False
+        for seq in ("<FocusOut>", "<Visibility>", "<Map>"): self.root.bind(seq, self._on_zorder_event, add="+")
+        self._on_zorder_event(); self._schedule_topmost_check()
+
+    def _on_zorder_event(self, e=None):
+        # Events arrive from every child widget too; coalesce a burst into one re-assert.
+        if self._topmost_pending or not self.config.get("always_on_top", True): return
+        self._topmost_pending = True
+        self.root.after_idle(self._reassert_topmost)
+
+    def _raise_window(self):
+        # -topmost alone doesn't bring back a window another one already covers; lift() does.
+        self.root.attributes("-topmost", True); self.root.lift()
+
+    def _reassert_topmost(self):
+        self._topmost_pending = False; self.topmost_wakeups += 1
+        try: self._raise_window()
+        except tk.TclError: return
+        self._topmost_delay = TOPMOST_MIN_MS
+        self._schedule_topmost_check()
+
+    def _topmost_check(self):
+        # Re-assert on every backoff tick: the -topmost flag only echoes our own setting, and an unfocused overlay on
+        # Windows rarely gets the FocusOut/Visibility events that would say it was covered.
+        self._topmost_job = None; self.topmost_wakeups += 1
+        try: self._raise_window()
+        except tk.TclError: return
+        self._topmost_delay = min(self._topmost_delay * 2, TOPMOST_MAX_MS)
+        self._schedule_topmost_check()
+
+    def _schedule_topmost_check(self):
+        if self._topmost_job: self.root.after_cancel(self._topmost_job); self._topmost_job = None
+        if self.update_running and self.config.get("always_on_top", True):
+            self._topmost_job = self.root.after(self._topmost_delay, self._topmost_check)
 
     def update_throughput(self):
-        while self.update_running:
-            try:
-                io = psutil.net_io_counters()
-                sent_s = (io.bytes_sent - self.prev_bytes_sent) / self.update_interval
-                recv_s = (io.bytes_recv - self.prev_bytes_recv) / self.update_interval
-                self.prev_bytes_sent, self.prev_bytes_recv = io.bytes_sent, io.bytes_recv
-                
-                theme = self.themes[self.current_theme]
-                up_icon = theme.get('up_icon','↑') if self.current_theme == "customizable" else "Up:"
-                down_icon = theme.get('down_icon','↓') if self.current_theme == "customizable" else "Dn:"
-                text = f"{up_icon} {self.format_speed(sent_s)}\n{down_icon} {self.format_speed(recv_s)}"
-                self.root.after(0, lambda: self.safe_update_label(text))
-            except Exception: break
-            time.sleep(self.update_interval)
-
-    def format_speed(self, s):
-        if s<1024: return f"{s:.1f} B/s"
-        if s<1024**2: return f"{s/1024:.1f} KB/s"
-        if s<1024**3: return f"{s/1024**2:.1f} MB/s"
-        return f"{s/1024**3:.1f} GB/s"
-
-    def safe_update_label(self, text):
+        # The sampler thread only drops each reading in the mailbox; Tk picks it up in drain_mailbox.
+        self.collector.run(self.mailbox.post, first_interval=FIRST_SAMPLE_S)
+
+    def drain_mailbox(self):
+        """ Runs on the Tk loop every half interval: shows the newest reading, drops stale ones. """
+        if not self.update_running: return
+        r, missed = self.mailbox.take()
+        if r is not None:
+            self.last_reading = r
+            self.safe_update_label(self._format_reading(r), r.sent_s, r.recv_s, missed)
+            if self.alerts.active and self._alert_job is None: self._alert_tick()
+        # Poll quickly until the first reading is on screen, then every half interval.
+        self.root.after(max(50, int(self.collector.current_interval * 500)) if self.mailbox.seen else 20, self.drain_mailbox)
+
+    def _format_reading(self, r):
+        up_icon, down_icon = self.icons
+        if self.aggregator:
+            rows, f = self.aggregator.hosts(), self.format_speed
+            lines = [f"All {len(rows)}: {up_icon} {f(sum(x[1] for x in rows))}  {down_icon} {f(sum(x[2] for x in rows))}"]
+            return "\n".join(lines + [f"{n}: {up_icon} {f(u)}  {down_icon} {f(d)}" for n,u,d,_ in rows[:self.config.get("fleet_top_n",5)]])
+        if self.collector.mode == "total" and self.config.get("show_stats") and r.stats:
+            f = self.format_speed
+            return "\n".join(f"{icon} {f(st['now'])} / {f(st['avg'])} / {f(st['peak'])}" for icon, st in ((up_icon, r.stats["up"]), (down_icon, r.stats["down"])))
+        if self.collector.mode == "total": return f"{up_icon} {self.format_speed(r.sent_s)}\n{down_icon} {self.format_speed(r.recv_s)}"
+        return "\n".join(f"{n}: {up_icon} {self.format_speed(u)}  {down_icon} {self.format_speed(d)}" for n,u,d in r.rows) or "No interface"
+
+    def format_speed(self, s): return format_speed(s)
+    def format_size(self, b): return format_size(b)
+
+    def safe_update_label(self, text, sent_s=0.0, recv_s=0.0, missed=1):
+        try:
+            if text == self.shown_text: self.ui_frames["skipped"] += 1
+            elif self.label and self.label.winfo_exists():
+                self.label.config(text=text); self.shown_text = text; self.ui_frames["drawn"] += 1
+            if self.sparkline:
+                # The collector already put dropped frames in the history: one rebuild shows them all.
+                if missed > 1: self.sparkline.redraw()
+                else: self.sparkline.push(sent_s, recv_s)
+        except tk.TclError: pass
+
+    def _alert_tick(self):
+        """ While any alert is firing, blink (or hold) the alert colors; restores the theme once all have resolved. """
+        firing = bool(self.alerts.active) and self.update_running
+        on = firing and (not self._alert_on or not self.config.get("alert_flash", True))
+        if on != self._alert_on: self._paint_alert(on)
+        self._alert_job = self.root.after(ALERT_BLINK_MS, self._alert_tick) if firing else None
+
+    def _paint_alert(self, on):
+        theme = self.themes[self.current_theme]
+        bg = self.config.get("alert_bg") if on else self._theme_bg(theme)
         try:
-            if self.label and self.label.winfo_exists(): self.label.config(text=text)
+            for w in filter(None, (self.root, self.main_frame, self.label, self.sparkline and self.sparkline.canvas)): w.config(bg=bg)
+            if self.label: self.label.config(fg=self.config.get("alert_fg") if on else theme["fg"])
+            self._alert_on = on
         except tk.TclError: pass
 
     # --- Event Handlers ---
@@ -269,11 +426,17 @@ class NetworkOverlay:
     def stop_drag(self, e):
         if self.dragging: self.dragging=False; self.save_config()
     def show_context_menu(self, e):
+        if self.context_menu is None: self.context_menu = tk.Menu(self.root, tearoff=0); self.setup_context_menu()
         try: self.context_menu.tk_popup(e.x_root,e.y_root)
         finally: self.context_menu.grab_release()
     def set_positioning(self, m):
         self.positioning_mode=m; self.config["positioning"]=m; self.position_overlay(); self.save_config()
 
+    def set_nic_mode(self, mode, name=None):
+        self.config["nic_mode"]=self.collector.mode=mode
+        if name: self.config["nic_name"]=self.collector.nic_name=name
+        self.save_config()
+
     # --- Settings and Customization Dialogs (Restored) ---
     def set_update_interval(self):
         d=tk.Toplevel(self.root); d.title("Update Interval"); d.transient(self.root); d.grab_set()
@@ -283,11 +446,55 @@ class NetworkOverlay:
         def a():
             try:
                 v=float(iv.get());
-                if 0.1<=v<=10: self.update_interval=v;self.config["update_interval"]=v;self.save_config();d.destroy()
+                if self.config.validate("update_interval",v): self.update_interval=self.collector.interval=v;self.config["update_interval"]=v;self.save_config();d.destroy()
                 else: messagebox.showerror("Error","Must be 0.1–10", parent=d)
             except: messagebox.showerror("Error","Invalid", parent=d)
         tk.Button(d,text="Apply",command=a).pack(pady=5); d.geometry("250x120")
 
+    def toggle_adaptive_interval(self):
+        enabled = not self.config.get("adaptive_interval", False)
+        self.config["adaptive_interval"] = enabled
+        self.collector.set_adaptive(enabled, slow=self.config.get("adaptive_max_interval", 2))
+        self.save_config(); self.setup_context_menu()
+
+    def set_nic_filters(self):
+        d=tk.Toplevel(self.root); d.title("Interface Filters"); d.transient(self.root); d.grab_set()
+        tk.Label(d,text="Include (globs, comma separated; empty = all):").pack(pady=5)
+        iv=tk.StringVar(value=self.config.get("nic_include","")); tk.Entry(d,textvariable=iv,width=40).pack(pady=5)
+        tk.Label(d,text="Exclude (e.g. lo, veth*, docker*):").pack(pady=5)
+        ev=tk.StringVar(value=self.config.get("nic_exclude","")); tk.Entry(d,textvariable=ev,width=40).pack(pady=5)
+        tk.Label(d,text="Top N:").pack(pady=5); nv=tk.IntVar(value=self.config.get("nic_top_n",3))
+        tk.Scale(d,from_=1,to=10,orient="horizontal",variable=nv).pack(pady=5,fill="x",padx=20)
+        def a():
+            self.config.update({"nic_include":iv.get(),"nic_exclude":ev.get(),"nic_top_n":nv.get()})
+            self.collector.top_n=nv.get(); self.collector.set_filters(parse_patterns(iv.get()),parse_patterns(ev.get()))
+            self.save_config(); self.setup_context_menu(); d.destroy()
+        tk.Button(d,text="Apply",command=a).pack(pady=10); d.geometry("350x300")
+
+    def set_alerts(self):
+        d=tk.Toplevel(self.root); d.title("Alerts"); d.transient(self.root); d.grab_set()
+        tk.Label(d,text="One rule per line, e.g.  quiet: down < 10 KB/s for 30s   or   up > 50 MB/s",justify="left").pack(pady=5,padx=10,anchor="w")
+        rt=tk.Text(d,width=50,height=6); rt.pack(padx=10,fill="both",expand=True); rt.insert("1.0","\n".join(self.config.get("alert_rules") or []))
+        tk.Label(d,text="Run command (optional):").pack(pady=(8,2)); cv=tk.StringVar(value=self.config.get("alert_command") or "")
+        tk.Entry(d,textvariable=cv,width=50).pack(padx=10)
+        tk.Label(d,text="Send to socket (host:port or Unix path, optional):").pack(pady=(8,2)); sv=tk.StringVar(value=self.config.get("alert_socket") or "")
+        tk.Entry(d,textvariable=sv,width=50).pack(padx=10)
+        fv=tk.BooleanVar(value=self.config.get("alert_flash",True)); tk.Checkbutton(d,text="Flash",variable=fv).pack(pady=5)
+        bg_var=[self.config.get("alert_bg")]; fg_var=[self.config.get("alert_fg")]
+        cf=tk.Frame(d); cf.pack(pady=5)
+        b1=tk.Button(cf,text="Alert Background",bg=bg_var[0],command=lambda:self._choose_color(bg_var,b1,"Alert Background")); b1.pack(side="left",padx=5)
+        b2=tk.Button(cf,text="Alert Text",bg=fg_var[0],command=lambda:self._choose_color(fg_var,b2,"Alert Text")); b2.pack(side="left",padx=5)
+        def a():
+            lines=[l.strip() for l in rt.get("1.0","end").splitlines() if l.strip()]
+            rules,errors=parse_rules(lines)
+            if errors: return messagebox.showerror("Error","\n".join(errors), parent=d)
+            self.config.update({"alert_rules":lines,"alert_command":cv.get().strip() or None,"alert_socket":sv.get().strip() or None,
+                                "alert_flash":fv.get(),"alert_bg":bg_var[0],"alert_fg":fg_var[0]})
+            self.alerts.command,self.alerts.socket_addr=self.config["alert_command"],self.config["alert_socket"]
+            self.alerts.set_rules(rules); self._paint_alert(False)
+            self.save_config(); self.setup_context_menu(); d.destroy()
+        tk.Button(d,text="Apply",command=a).pack(pady=10); d.geometry("460x420")
+
     def set_opacity(self):
         d=tk.Toplevel(self.root); d.title("Opacity"); d.transient(self.root); d.grab_set()
         tk.Label(d,text="Opacity (0.1–1.0):").pack(pady=5)
@@ -302,6 +509,7 @@ class NetworkOverlay:
         tk.Button(d,text="Apply",command=a).pack(pady=10); d.geometry("300x150")
         
     def _choose_color(self, var, btn, title):
+        import tkinter.colorchooser as colorchooser
         color = colorchooser.askcolor(title=f"Choose {title}", color=var[0])[1]
         if color: var[0] = color; btn.config(bg=color)
 
@@ -336,9 +544,10 @@ class NetworkOverlay:
         tk.Button(d,text="Apply",command=a).pack(pady=10); d.geometry("350x250")
 
     def customize_font(self):
+        import tkinter.ttk as ttk
         d=tk.Toplevel(self.root); d.title("Customize Font & Style"); d.transient(self.root); d.grab_set()
         tk.Label(d,text="Font Family:").pack(pady=5); fv=tk.StringVar(value=self.config.get("custom_font","Arial"))
-        ttk.Combobox(d,textvariable=fv,values=sorted(tkfont.families())).pack(pady=5)
+        ttk.Combobox(d,textvariable=fv,values=self.resources.families()).pack(pady=5)
         tk.Label(d,text="Font Size:").pack(pady=5); sv=tk.IntVar(value=self.config.get("custom_size",10))
         tk.Scale(d,from_=6,to=24,orient="horizontal",variable=sv).pack(pady=5,fill="x",padx=20)
         tk.Label(d,text="Style:").pack(pady=5); sv2=tk.StringVar(value=self.config.get("custom_style","normal"))
@@ -357,7 +566,7 @@ class NetworkOverlay:
         tk.Scale(d,from_=0,to=5,orient="horizontal",variable=bv).pack(pady=5,fill="x",padx=20)
         tk.Label(d,text="Border Style:").pack(pady=5); rv=tk.StringVar(value=self.config.get("custom_relief","flat"))
         f2=tk.Frame(d); f2.pack(pady=5)
-        for i,r in enumerate(["flat","raised","sunken","solid","ridge","groove"]):
+        for i,r in enumerate(RELIEFS):
             tk.Radiobutton(f2,text=r.title(),variable=rv,value=r).grid(row=i//3,column=i%3,sticky="w")
         def a():
             self.config.update({"custom_border":bv.get(),"custom_relief":rv.get()})
@@ -366,6 +575,7 @@ class NetworkOverlay:
         tk.Button(d,text="Apply",command=a).pack(pady=15); d.geometry("350x280")
     
     def set_background(self):
+        import tkinter.filedialog as filedialog
         fp = filedialog.askopenfilename(title="Select Background Image", filetypes=[("Image files","*.png *.jpg *.jpeg")])
         if fp:
             self.config["background_image"]=fp; self.save_config()
@@ -382,9 +592,104 @@ class NetworkOverlay:
         new_state = not self.config.get("always_on_top", True)
         self.config["always_on_top"] = new_state
         self.root.attributes("-topmost", new_state); self.save_config()
+        self._topmost_delay = TOPMOST_MIN_MS; self._schedule_topmost_check()
         
+    def toggle_graph(self):
+        self.config["show_graph"] = not self.config.get("show_graph", False)
+        self.save_config(); self.apply_theme()
+
+    def toggle_stats(self):
+        self.config["show_stats"] = not self.config.get("show_stats", False); self.save_config()
+        self.collector.want_stats = self.config["show_stats"] or self.metrics_server is not None
+
+    def toggle_trace_recording(self):
+        if self.config.get("trace_record"):
+            self.collector.set_source(PsutilSource()); self.config["trace_record"] = None
+        else:
+            import tkinter.filedialog as filedialog
+            fp = filedialog.asksaveasfilename(title="Record Trace To", defaultextension=".nettrace", filetypes=[("Network traces","*.nettrace")])
+            if not fp: return
+            try: self.collector.set_source(RecordingSource(PsutilSource(), fp))
+            except Exception as e: return messagebox.showerror("Error", f"Cannot record to {fp}: {e}")
+            self.config["trace_record"] = fp
+        self.save_config(); self.setup_context_menu()
+
+    def _start_metrics_server(self):
+        from metrics_server import DEFAULT_PORT, MetricsServer  # asyncio is the single most expensive import; only pay for it when serving
+        try: self.metrics_server = MetricsServer(self.collector, port=self.config.get("metrics_port") or DEFAULT_PORT).start(); return True
+        except Exception as e: self.metrics_server = None; print(f"Warning: Metrics server not started. {e}"); return False
+
+    def toggle_metrics_server(self):
+        if self.metrics_server:
+            self.metrics_server.stop(); self.metrics_server = None; self.collector.per_nic = False
+            self.collector.want_stats = bool(self.config.get("show_stats"))
+            self.config["metrics_port"] = None; self.save_config()
+            return messagebox.showinfo("Metrics Server", "Metrics server stopped.")
+        from metrics_server import DEFAULT_PORT
+        self.config["metrics_port"] = self.config.get("metrics_port") or DEFAULT_PORT
+        if not self._start_metrics_server(): return messagebox.showerror("Error", f"Could not listen on port {self.config['metrics_port']}.")
+        self.save_config()
+        messagebox.showinfo("Metrics Server", f"Serving http://127.0.0.1:{self.metrics_server.port}/metrics\nand /metrics.json")
+
+    def _start_fleet(self):
+        from fleet import Aggregator, PushSender, parse_address  # asyncio: only loaded once multi-host is in use
+        c = self.config
+        try:
+            if c.get("fleet_listen"):
+                self.aggregator = Aggregator(self.collector, *parse_address(c["fleet_listen"]), stale_after=c.get("fleet_stale_seconds",15), name=c.get("fleet_name")).start()
+            if c.get("fleet_push"):
+                self.push_sender = PushSender(self.collector, parse_address(c["fleet_push"]), c.get("fleet_transport","udp"), c.get("fleet_name")).start()
+            return True
+        except (OSError, ValueError) as e: self._stop_fleet(); print(f"Warning: Multi-host view not started. {e}"); return False
+
+    def _stop_fleet(self):
+        if self.aggregator: self.aggregator.stop(); self.aggregator = None
+        if self.push_sender: self.push_sender.close(); self.push_sender = None
+
+    def set_multi_host(self):
+        d=tk.Toplevel(self.root); d.title("Multi-Host View"); d.transient(self.root); d.grab_set()
+        tk.Label(d,text="Show other hosts, listening on (port = this machine only; empty = off):").pack(pady=5)
+        lv=tk.StringVar(value=self.config.get("fleet_listen") or ""); tk.Entry(d,textvariable=lv,width=40).pack(pady=5)
+        tk.Label(d,text="Senders are not authenticated: only listen on a LAN address (e.g. 192.168.1.5:9718) of a trusted network.",wraplength=380,fg="gray").pack()
+        tk.Label(d,text="Push this host's readings to (host:port; empty = off):").pack(pady=5)
+        pv=tk.StringVar(value=self.config.get("fleet_push") or ""); tk.Entry(d,textvariable=pv,width=40).pack(pady=5)
+        tv=tk.StringVar(value=self.config.get("fleet_transport","udp")); f2=tk.Frame(d); f2.pack(pady=5)
+        for t in ("udp","tcp"): tk.Radiobutton(f2,text=t.upper(),variable=tv,value=t).pack(side="left",padx=5)
+        def a():
+            self._stop_fleet()
+            self.config.update({"fleet_listen":lv.get().strip() or None,"fleet_push":pv.get().strip() or None,"fleet_transport":tv.get()})
+            if not self._start_fleet(): messagebox.showerror("Error","Could not start the multi-host view; check the addresses.", parent=d)
+            else: d.destroy()
+            self.save_config(); self.setup_context_menu(); self.apply_theme()
+        tk.Button(d,text="Apply",command=a).pack(pady=10); d.geometry("420x280")
+
+    def show_usage(self):
+        if not self.traffic_log: return messagebox.showerror("Error", "Traffic log is not available.")
+        lines = [f"{name.title() if name=='today' else 'This Month'}:\n  ↑ {self.format_size(s)}   ↓ {self.format_size(r)}   Σ {self.format_size(s+r)}" for name,(s,r) in self.traffic_log.usage().items()]
+        messagebox.showinfo("Data Usage", "\n\n".join(lines))
+
+    def show_top_talkers(self, count=10, refresh_ms=2000):
+        from process_view import TopTalkers
+        d=tk.Toplevel(self.root); d.title("Top Talkers"); d.transient(self.root)
+        talkers=TopTalkers()
+        tk.Label(d,text=f"Source: {'ss per-socket counters (TCP only, UDP/QUIC not counted)' if talkers.source=='ss' else 'process I/O (approximate)'}").pack(pady=(8,2))
+        lbl=tk.Label(d,text="Scanning...",font=("Consolas",9),justify="left",anchor="w"); lbl.pack(padx=10,pady=5,fill="both",expand=True)
+        def tick():
+            if not d.winfo_exists(): return
+            rows = talkers.refresh()[:count]  # never blocks: scans run in the worker pool
+            if rows: lbl.config(text="\n".join([f"{'PID':>7}  {'Process':<20} {'Up':>11} {'Down':>11}"] + [f"{t.pid:>7}  {t.name[:20]:<20} {self.format_speed(t.sent_s):>11} {self.format_speed(t.recv_s):>11}" for t in rows]))
+            elif talkers.scans > 1: lbl.config(text="No process traffic.")
+            d.after(refresh_ms, tick)
+        def close(): talkers.close(); d.destroy()
+        d.protocol("WM_DELETE_WINDOW", close)
+        tk.Button(d,text="Close",command=close).pack(pady=5)
+        tick(); d.geometry("480x300")
+
     def show_about(self):
-        messagebox.showinfo("About Network Overlay", "Network Overlay v2.1\nA customizable desktop network monitor.\n\nDeveloper: kndnsow")
+        f = self.ui_frames
+        stats = f"UI frames: {f['drawn']} drawn, {f['skipped']} unchanged, {self.mailbox.dropped} dropped\nAlways-on-top wakeups: {self.topmost_wakeups}"
+        if self.alerts.active: stats += "\n\nFiring: " + ", ".join(f"{r.name} ({describe(r)})" for r in self.alerts.active)
+        messagebox.showinfo("About Network Overlay", f"Network Overlay v2.1\nA customizable desktop network monitor.\n\nDeveloper: kndnsow\n\n{stats}")
 
     def toggle_auto_start(self):
         if not WINDOWS_REGISTRY_AVAILABLE: return messagebox.showerror("Error", "Auto-start is only on Windows.")
@@ -399,28 +704,35 @@ class NetworkOverlay:
         return sys.executable if getattr(sys,'frozen',False) else f'"{sys.executable}" "{os.path.abspath(__file__)}"'
 
     def _add_to_startup(self):
+        import winreg
         key_path=r"Software\Microsoft\Windows\CurrentVersion\Run"
         with winreg.OpenKey(winreg.HKEY_CURRENT_USER,key_path,0,winreg.KEY_SET_VALUE) as k:
             winreg.SetValueEx(k,"NetworkOverlay",0,winreg.REG_SZ,self._get_executable_path())
 
     def _remove_from_startup(self):
+        import winreg
         key_path=r"Software\Microsoft\Windows\CurrentVersion\Run"
         with winreg.OpenKey(winreg.HKEY_CURRENT_USER,key_path,0,winreg.KEY_SET_VALUE) as k:
             try: winreg.DeleteValue(k,"NetworkOverlay")
             except FileNotFoundError: pass
 
     def on_closing(self):
-        self.update_running = False; self.save_config()
+        self.update_running = False; self.collector.stop(); self.save_config(); self.config.close()
+        if self.metrics_server: self.metrics_server.stop()
+        self.alerts.close(); self._stop_fleet()
+        if hasattr(self.collector.source, "close"): self.collector.source.close()
+        if self.traffic_log: self.traffic_log.close()
         if self.lock_file.exists():
             try: self.lock_file.unlink()
             except OSError: pass
         self.root.destroy()
     
     def save_config(self):
+        """ Record the window position and queue a background write; returns at once and skips unchanged configs. """
         try:
             if self.root.winfo_exists(): self.config["x"], self.config["y"] = self.root.winfo_x(), self.root.winfo_y()
-            with open(self.config_file, 'w') as f: json.dump(self.config, f, indent=2)
-        except Exception: pass
+        except tk.TclError: pass
+        self.config.save()
             
     def _check_single_instance(self):
         if self.lock_file.exists():
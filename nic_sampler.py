@@ -0,0 +1,137 @@
+import fnmatch
+import heapq
+from array import array
+
+from rate_engine import MAX_PLAUSIBLE_RATE, WRAP_32, counter_delta
+from sources import PsutilSource
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+class NicSampler:
+    """Per-interface rates from net_io_counters(pernic=True), computed for all NICs in one batched pass.
+
+    Counters live in preallocated buffers (NumPy when available, `array` otherwise) indexed by
+    interface position; the index is only rebuilt when the set of interfaces changes, and interfaces that
+    survive a rebuild keep their counters, so only newly appeared ones read 0 while they get a baseline.
+    """
+
+    def __init__(self, include=(), exclude=(), read=None, capacity=256, max_rate=MAX_PLAUSIBLE_RATE):
+        self.include, self.exclude = list(include), list(exclude)
+        # read() -> ({iface: counters}, monotonic t_ns), e.g. a counter source's pernic
+        self.read, self.max_rate = read or PsutilSource().pernic, max_rate
+        self.names, self._keys, self.t_ns, self.elapsed = [], None, None, 0.0
+        self._fresh = ()  # indexes of interfaces that appeared since the last sample
+        self._allocate(capacity)
+
+    # --- Buffers and Filtering ---
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        if NUMPY_AVAILABLE:
+            self.prev = np.zeros((2, capacity), dtype=np.int64)  # row 0: sent, row 1: recv
+            self.rates = np.zeros((2, capacity), dtype=np.float64)
+        else:
+            self.prev = [array("Q", bytes(8 * capacity)), array("Q", bytes(8 * capacity))]
+            self.rates = [array("d", bytes(8 * capacity)), array("d", bytes(8 * capacity))]
+
+    def matches(self, name):
+        if self.include and not any(fnmatch.fnmatchcase(name, p) for p in self.include): return False
+        return not any(fnmatch.fnmatchcase(name, p) for p in self.exclude)
+
+    def set_filters(self, include=(), exclude=()):
+        self.include, self.exclude = list(include), list(exclude)
+        self._keys = None; self.t_ns = None  # forces a re-index and a fresh baseline
+
+    def _reindex(self, keys):
+        old = {name: i for i, name in enumerate(self.names)}
+        kept = [(int(self.prev[0][i]), int(self.prev[1][i])) for i in range(len(self.names))]  # copied before a resize
+        self._keys = keys
+        self.names = [n for n in keys if self.matches(n)]
+        if len(self.names) > self.capacity: self._allocate(max(len(self.names), 2 * self.capacity))
+        fresh = []
+        for j, name in enumerate(self.names):
+            i = old.get(name)
+            if i is None: fresh.append(j)
+            else: self.prev[0][j], self.prev[1][j] = kept[i]
+        self._fresh = fresh
+
+    # --- Sampling ---
+    def _fill(self, counters, n):
+        if NUMPY_AVAILABLE:
+            cur = np.fromiter((v for name in self.names for v in counters[name][:2]), dtype=np.int64, count=2 * n)
+            return cur.reshape(n, 2).T
+        return [array("Q", (counters[name].bytes_sent for name in self.names)),
+                array("Q", (counters[name].bytes_recv for name in self.names))]
+
+    def sample(self):
+        """ Read all interfaces and recompute every rate. Returns False while establishing a baseline. """
+        counters, t_ns = self.read()
+        keys = tuple(counters)
+        if keys != self._keys: self._reindex(keys)
+        n = len(self.names)
+        cur = self._fill(counters, n)
+        prev_t, self.t_ns = self.t_ns, t_ns
+        fresh, self._fresh = self._fresh, ()
+        if prev_t is None or t_ns <= prev_t:
+            self._store(cur, n); self._zero(n)
+            return False
+        self.elapsed = elapsed = (t_ns - prev_t) / 1e9
+        if NUMPY_AVAILABLE:
+            prev = self.prev[:, :n]
+            delta = cur - prev
+            back = delta < 0
+            if back.any():
+                wrapped = back & (prev >= WRAP_32 - WRAP_32 // 4) & (prev < WRAP_32)  # same guess as counter_delta
+                delta = np.where(wrapped, delta + WRAP_32, np.where(back, 0, delta))
+            delta[delta > self.max_rate * elapsed] = 0  # counter reset
+            np.divide(delta, elapsed, out=self.rates[:, :n])
+        else:
+            for row in (0, 1):
+                self.rates[row][:n] = array("d", [(counter_delta(p, c, elapsed, self.max_rate) or 0) / elapsed
+                                                  for p, c in zip(self.prev[row], cur[row])])
+        for j in fresh: self.rates[0][j] = self.rates[1][j] = 0.0  # no previous counters yet
+        self._store(cur, n)
+        return True
+
+    def _store(self, cur, n):
+        if NUMPY_AVAILABLE: self.prev[:, :n] = cur
+        else: self.prev[0][:n], self.prev[1][:n] = cur[0], cur[1]
+
+    def _zero(self, n):
+        if NUMPY_AVAILABLE: self.rates[:, :n] = 0
+        else: self.rates[0][:n], self.rates[1][:n] = array("d", bytes(8 * n)), array("d", bytes(8 * n))
+
+    # --- Queries ---
+    def get(self, name):
+        """ (name, sent_s, recv_s) for one interface, or None if it's missing or filtered out. """
+        try: i = self.names.index(name)
+        except ValueError: return None
+        return name, float(self.rates[0][i]), float(self.rates[1][i])
+
+    def top(self, count):
+        """ The `count` busiest interfaces by combined rate, busiest first. """
+        n = len(self.names)
+        if NUMPY_AVAILABLE:
+            total = self.rates[0, :n] + self.rates[1, :n]
+            idx = np.argsort(-total, kind="stable")[:count]
+        else:
+            idx = heapq.nlargest(count, range(n), key=lambda i: self.rates[0][i] + self.rates[1][i])
+        return [(self.names[i], float(self.rates[0][i]), float(self.rates[1][i])) for i in idx]
+
+    def counters(self):
+        """ [(name, bytes_sent, bytes_recv), ...] as of the last sample. """
+        n = len(self.names)
+        return [(self.names[i], int(self.prev[0][i]), int(self.prev[1][i])) for i in range(n)]
+
+    def rows(self):
+        """ [(name, sent_s, recv_s), ...] for every matching interface, in index order. """
+        n = len(self.names)
+        return [(self.names[i], float(self.rates[0][i]), float(self.rates[1][i])) for i in range(n)]
+
+    def total(self):
+        """ Summed (sent_s, recv_s) over all matching interfaces. """
+        n = len(self.names)
+        return float(sum(self.rates[0][:n])), float(sum(self.rates[1][:n]))
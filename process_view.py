@@ -0,0 +1,110 @@
+import re
+import shutil
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+Talker = namedtuple("Talker", "pid name sent_s recv_s sockets")
+
+SS_PATH = shutil.which("ss") if sys.platform.startswith("linux") else None
+_ADDR = re.compile(r"^(\[?[0-9A-Fa-f:.%*\w-]+\]?(?:%[\w.-]+)?):(\d+|\*)$")  # [fe80::1]%eth0:22 keeps its scope
+_PID = re.compile(r'\("([^"]*)",pid=(\d+)')
+_BYTES = re.compile(r"\bbytes_(sent|received):(\d+)")
+_LOOPBACK = ("127.", "[::1]", "::1", "[::ffff:127.")
+
+def _parse_ss(text, include_loopback):
+    """ `ss -tinpH` output -> {(local, peer, pid): (name, bytes_sent, bytes_received)}
+
+    A socket shared by several processes (e.g. forked workers) is charged to the first one ss lists, so its
+    bytes are never counted twice. Sockets without a `users:` field (other users' processes, when not root)
+    are skipped.
+    """
+    sockets, header = {}, None
+    for line in text.splitlines():
+        if not line[:1].isspace():
+            header = line; continue
+        if header is None: continue
+        addrs = [t for t in header.split() if _ADDR.match(t)]
+        owner = _PID.search(header)
+        counts = dict(_BYTES.findall(line))
+        header = None
+        if len(addrs) < 2 or not owner or not counts: continue
+        if not include_loopback and addrs[0].startswith(_LOOPBACK) and addrs[1].startswith(_LOOPBACK): continue
+        sockets[(addrs[0], addrs[1], int(owner.group(2)))] = (owner.group(1), int(counts.get("sent", 0)), int(counts.get("received", 0)))
+    return sockets
+
+class TopTalkers:
+    """Per-process bandwidth attribution, scanned in a background worker pool on demand.
+
+    On Linux with iproute2, byte counts come from the kernel's per-socket TCP counters (`ss -tinp`), so
+    rates are exact for TCP, and UDP traffic (including QUIC) is not counted at all. Elsewhere it falls back to psutil: processes owning inet sockets are ranked
+    by their I/O counters, which is approximate (it includes file I/O). Process names are cached per
+    (pid, create_time) and evicted as soon as a pid disappears.
+    """
+
+    def __init__(self, include_loopback=False, max_workers=1):
+        self.include_loopback = include_loopback
+        self.source = "ss" if SS_PATH else "psutil-io"
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="top-talkers")
+        self.future, self.latest, self.scans = None, [], 0
+        self._prev, self._prev_t = {}, None
+        self._names = {}  # pid -> (create_time, name)
+
+    # --- Scheduling (caller thread, never blocks) ---
+    def refresh(self):
+        """ Kick off a scan if none is running; returns the most recent completed results. """
+        if self.future is not None and self.future.done():
+            try: self.latest = self.future.result()
+            except Exception as e: print(f"Warning: Top talkers scan failed. {e}")
+            self.future = None
+        if self.future is None: self.future = self.pool.submit(self.scan)
+        return self.latest
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Scanning (worker thread) ---
+    def _name(self, pid, fallback=""):
+        cached = self._names.get(pid)
+        try:
+            proc = psutil.Process(pid)
+            ctime = proc.create_time()
+            if cached and cached[0] == ctime: return cached[1]
+            name = proc.name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied): ctime, name = None, fallback
+        self._names[pid] = (ctime, name or fallback or str(pid))
+        return self._names[pid][1]
+
+    def _counters(self):
+        """ {socket_key: (pid, name_hint, sent, recv)} from the best available source. """
+        if SS_PATH:
+            out = subprocess.run([SS_PATH, "-tinpH"], capture_output=True, text=True, timeout=5).stdout
+            return {k: (k[2], *v) for k, v in _parse_ss(out, self.include_loopback).items()}
+        counters = {}
+        for pid in {c.pid for c in psutil.net_connections(kind="inet") if c.pid}:
+            try: io = psutil.Process(pid).io_counters()
+            except (psutil.NoSuchProcess, psutil.AccessDenied): continue
+            sent, recv = getattr(io, "write_chars", io.write_bytes), getattr(io, "read_chars", io.read_bytes)
+            counters[pid] = (pid, "", sent, recv)
+        return counters
+
+    def scan(self):
+        now, counters = time.monotonic(), self._counters()
+        prev, prev_t = self._prev, self._prev_t
+        self._prev, self._prev_t = counters, now  # sockets that vanished are evicted here
+        alive = {v[0] for v in counters.values()}
+        for pid in [p for p in self._names if p not in alive]: del self._names[pid]
+        self.scans += 1
+        if prev_t is None: return []
+        elapsed, per_pid = max(now - prev_t, 1e-3), {}
+        for key, (pid, hint, sent, recv) in counters.items():
+            old = prev.get(key)
+            d_sent, d_recv = (max(sent - old[2], 0), max(recv - old[3], 0)) if old else (0, 0)
+            acc = per_pid.setdefault(pid, [hint, 0, 0, 0]); acc[1] += d_sent; acc[2] += d_recv; acc[3] += 1
+        talkers = [Talker(pid, self._name(pid, hint), s / elapsed, r / elapsed, n) for pid, (hint, s, r, n) in per_pid.items()]
+        talkers.sort(key=lambda t: t.sent_s + t.recv_s, reverse=True)
+        return talkers
@@ -0,0 +1,115 @@
+import time
+import threading
+from collections import namedtuple
+
+# Network counters are 32-bit on some platforms/drivers and 64-bit elsewhere.
+WRAP_32 = 2**32
+WRAP_64 = 2**64
+# A delta larger than this (bytes/s) cannot be real traffic; it means the counter was reset.
+MAX_PLAUSIBLE_RATE = 100 * 1024**3
+
+Rate = namedtuple("Rate", "sent_s recv_s elapsed")
+
+def counter_delta(prev, cur, elapsed, max_rate=MAX_PLAUSIBLE_RATE, wrap=None):
+    """ Bytes moved between two counter reads, or None if the counter was reset.
+
+    `wrap` is the counter's range when known (WRAP_32/WRAP_64). Otherwise a counter below 2**32 may be either
+    width, and since a reset of a 64-bit counter is far more common than a 32-bit wrap, it only counts as a wrap
+    from the top quarter of the 32-bit range.
+    """
+    if cur >= prev:
+        delta = cur - prev
+    else:
+        # Went backwards: a 32/64-bit wrap only if we were near the top, otherwise a reset
+        # (NIC down/up, driver reload).
+        if wrap is None:
+            wrap = WRAP_32 if prev < WRAP_32 else WRAP_64
+            if wrap == WRAP_32 and prev < WRAP_32 - WRAP_32 // 4: return None
+        if prev < wrap // 2: return None
+        delta = cur + wrap - prev
+    return delta if delta <= max_rate * max(elapsed, 1e-3) else None
+
+def timed_read(read):
+    """ Call read() and return (result, monotonic ns at the midpoint of the call). """
+    t0 = time.monotonic_ns()
+    value = read()
+    return value, (t0 + time.monotonic_ns()) // 2
+
+class RateEngine:
+    """Computes up/down rates from real elapsed time between timestamped counter reads."""
+
+    def __init__(self, max_rate=MAX_PLAUSIBLE_RATE):
+        self.max_rate = max_rate
+        self.prev = None  # (t_ns, bytes_sent, bytes_recv)
+        self.resets = 0
+        self.wrap = None  # WRAP_64 once a counter has been seen above 2**32
+
+    def update(self, sent, recv, t_ns=None):
+        """ Feed one counter read; returns a Rate, or None while (re)establishing a baseline. """
+        if t_ns is None: t_ns = time.monotonic_ns()
+        prev, self.prev = self.prev, (t_ns, sent, recv)
+        if prev is None: return None
+        elapsed = (t_ns - prev[0]) / 1e9
+        if elapsed <= 0: self.prev = prev; return None
+        if self.wrap is None and max(sent, recv, prev[1], prev[2]) >= WRAP_32: self.wrap = WRAP_64
+        d_sent = counter_delta(prev[1], sent, elapsed, self.max_rate, self.wrap)
+        d_recv = counter_delta(prev[2], recv, elapsed, self.max_rate, self.wrap)
+        if d_sent is None or d_recv is None:
+            self.resets += 1
+            return None
+        return Rate(d_sent / elapsed, d_recv / elapsed, elapsed)
+
+    def sample(self, read):
+        """ Read counters via read() (psutil.net_io_counters-like) and update. """
+        io, t_ns = timed_read(read)
+        return self.update(io.bytes_sent, io.bytes_recv, t_ns)
+
+    def reset(self):
+        self.prev = None
+
+class AdaptiveInterval:
+    """Picks the next sampling interval from activity: `fast` while rates move, exponential back-off to `slow` when quiet.
+
+    Rates stay exact across the changing intervals because RateEngine always divides by the real elapsed time.
+    The first sample that moves snaps straight back to `fast`, but a burst that starts mid-sleep is only seen when
+    that sleep ends, so `slow` bounds the detection latency on a quiet link (about slow / 2 on average).
+    """
+
+    def __init__(self, fast=0.1, slow=2.0, factor=2.0, threshold=0.5, floor=4096.0):
+        self.fast, self.factor, self.threshold, self.floor = fast, factor, threshold, floor
+        self.slow = max(slow, fast)
+        self.interval, self.last = fast, None
+
+    def update(self, sent_s, recv_s):
+        """ Feed the latest rates; returns the interval to wait before the next sample. """
+        last, self.last = self.last, (sent_s, recv_s)
+        # Relative change in either direction; `floor` keeps idle-link noise from counting as activity.
+        active = last is None or any(abs(new - old) > self.threshold * max(old, new, self.floor) for new, old in zip(self.last, last))
+        self.interval = self.fast if active else min(max(self.interval * self.factor, self.fast), self.slow)
+        return self.interval
+
+class Ticker:
+    """Fires at absolute monotonic deadlines (start + k*interval) so sampling doesn't drift."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.deadline = None
+        self.ticks = self.missed = 0
+        self._stop = threading.Event()
+
+    def wait(self):
+        """ Sleep until the next deadline. Returns the lateness in ns, or None once stopped. """
+        step = int(self.interval * 1e9)
+        now = time.monotonic_ns()
+        if self.deadline is None: self.deadline = now
+        self.deadline += step
+        if now > self.deadline:
+            # Starved for more than a whole interval: skip the missed ticks instead of bursting.
+            behind = (now - self.deadline) // step + 1
+            self.missed += behind; self.deadline += behind * step
+        if self._stop.wait((self.deadline - now) / 1e9): return None
+        self.ticks += 1
+        return time.monotonic_ns() - self.deadline
+
+    def stop(self):
+        self._stop.set()
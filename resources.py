@@ -0,0 +1,110 @@
+import math
+import os
+import tkinter as tk
+from collections import OrderedDict
+
+ORIGINAL_MAX = 1024  # decoded background images are reduced to this on their longest side; the overlay is never larger
+
+class ResourceCache:
+    """Fonts, background images and the font-family list, created once and reused across theme changes.
+
+    Fonts are named tkfont.Font objects keyed by (family, size, style). Images are decoded once per file and
+    scaled once per (file, size); both the decoded originals and the scaled PhotoImages live in one LRU bounded
+    by `max_bytes` (RGBA pixel bytes). The image most recently handed out is pinned and never evicted, not even
+    to make room for decoding the next one, because the label is still showing it (Tk frees an image as soon as
+    its Python object is collected). Likewise the newest font is never the one evicted.
+    """
+
+    def __init__(self, root, max_bytes=16 * 1024**2, max_fonts=32):
+        self.root, self.max_bytes, self.max_fonts = root, max_bytes, max_fonts
+        self.fonts, self.images, self.bytes = OrderedDict(), OrderedDict(), 0
+        self.hits = self.misses = 0
+        self.pinned = None  # key of the image on display
+        self._families, self._warned = None, set()
+
+    # --- Fonts ---
+    def font(self, family, size=10, style="normal"):
+        key = (family, int(size), style or "normal")
+        f = self.fonts.get(key)
+        if f is not None: self.fonts.move_to_end(key); self.hits += 1; return f
+        self.misses += 1
+        import tkinter.font as tkfont  # on first use, so importing the GUI module stays cheap
+        f = self.fonts[key] = tkfont.Font(root=self.root, family=family, size=int(size),
+                                          weight="bold" if "bold" in key[2] else "normal", slant="italic" if "italic" in key[2] else "roman")
+        while len(self.fonts) > self.max_fonts: self.fonts.popitem(last=False)
+        return f
+
+    def families(self):
+        """ Sorted, de-duplicated font families; enumerated once (on first call or by prefetch_families). """
+        if self._families is None:
+            import tkinter.font as tkfont
+            self._families = sorted(set(tkfont.families(self.root)), key=str.casefold)
+        return self._families
+
+    def prefetch_families(self, delay_ms=2000):
+        # Tk can only enumerate fonts on its own thread, so do it once the loop is idle, well after the first paint.
+        self.root.after(delay_ms, lambda: self.root.after_idle(self.families))
+
+    # --- Images ---
+    def _remember(self, key, value, size):
+        self.images[key] = (value, size); self.bytes += size
+        for old in [k for k in self.images if k != key and k != self.pinned]:  # oldest first
+            if self.bytes <= self.max_bytes: break
+            self.bytes -= self.images.pop(old)[1]
+
+    def _lookup(self, key):
+        entry = self.images.get(key)
+        if entry is None: return None
+        self.images.move_to_end(key); self.hits += 1
+        return entry[0]
+
+    def _original(self, path, stamp):
+        key = ("src", path, stamp)
+        img = self._lookup(key)
+        if img is None:
+            from PIL import Image
+            with Image.open(path) as src:
+                src.draft("RGB", (ORIGINAL_MAX, ORIGINAL_MAX))  # JPEG: decode at reduced scale
+                img = src.convert("RGBA")
+            img.thumbnail((ORIGINAL_MAX, ORIGINAL_MAX))
+            self._remember(key, img, img.width * img.height * 4)
+        return img
+
+    def image(self, path, size):
+        """ PhotoImage of `path` covering `size` (w, h), or None if it can't be loaded. Decoded/scaled at most once. """
+        if not path: return None
+        try: stamp = os.stat(path).st_mtime_ns
+        except OSError as e: return self._warn(path, e)
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        key = ("fit", path, stamp, size)
+        photo = self._lookup(key)
+        if photo is not None: self.pinned = key; return photo
+        self.misses += 1
+        try:
+            from PIL import ImageOps, ImageTk
+            original = self._original(path, stamp)
+            # The scaled PIL image is dropped right after conversion; only the Tk copy is kept.
+            photo = ImageTk.PhotoImage(ImageOps.fit(original, size), master=self.root)
+        except ImportError:
+            photo = self._tk_image(path, size)
+        except Exception as e: return self._warn(path, e)
+        if photo is None: return None
+        self._remember(key, photo, size[0] * size[1] * 4)
+        src = ("src", path, stamp)
+        if src in self.images: self.images.move_to_end(src, last=False)  # already scaled: the original goes first when memory is tight
+        self.pinned = key
+        return photo
+
+    def _tk_image(self, path, size):
+        """ Without Pillow: PNG/GIF through Tk, shrunk by an integer factor (Tk can't resample). """
+        try: img = tk.PhotoImage(master=self.root, file=path)
+        except tk.TclError as e: return self._warn(path, e)
+        factor = max(1, math.ceil(img.width() / size[0]), math.ceil(img.height() / size[1]))
+        return img.subsample(factor) if factor > 1 else img
+
+    def _warn(self, path, error):
+        if path not in self._warned: self._warned.add(path); print(f"Warning: Could not load background image {path}. {error}")
+        return None
+
+    def clear(self):
+        self.images.clear(); self.bytes, self.pinned = 0, None
@@ -0,0 +1,194 @@
+"""Pluggable counter sources (live psutil, recorded trace) and the compact binary trace format.
+
+Trace file layout (little-endian):
+    header   32 bytes: b"NOTRACE\\0", u32 version, u32 record size (32), i64 wall-clock ns, i64 monotonic ns at start
+    records  32 bytes each: i64 t_ns (monotonic), u32 iface, u32 reserved, u64 bytes_sent, u64 bytes_recv
+Interface names are declared in-band before first use: a record with t_ns == -1 carries the iface index, the
+name length and the first 16 name bytes; following records with t_ns == -2 carry 24 more bytes each. All records
+of one snapshot share the same t_ns, so a replay reproduces exactly what the collector saw.
+"""
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+import psutil
+
+from rate_engine import timed_read
+
+Counters = namedtuple("Counters", "bytes_sent bytes_recv")
+
+MAGIC, VERSION = b"NOTRACE\0", 1
+HEADER = struct.Struct("<8sIIqq")
+RECORD = struct.Struct("<qIIQQ")
+NAME_HEAD, NAME_MORE = struct.Struct("<qII16s"), struct.Struct("<q24s")
+T_NAME, T_NAME_MORE = -1, -2
+
+# --- Sources ---
+class PsutilSource:
+    """Live counters straight from psutil; tick() is a no-op and every read hits the OS."""
+
+    def tick(self): pass
+    def total(self): return timed_read(psutil.net_io_counters)
+    def pernic(self): return timed_read(lambda: psutil.net_io_counters(pernic=True))
+    def time(self): return time.time()
+    def monotonic(self): return time.monotonic()
+
+class TraceSource:
+    """Replays a trace file snapshot by snapshot: tick() advances, total()/pernic() return the current one.
+
+    tick() raises EOFError at the end of the trace.
+    """
+
+    def __init__(self, path):
+        self.reader = TraceReader(path)
+        self._snapshots = self.reader.snapshots()
+        self.t_ns, self.counters = None, {}
+
+    def tick(self):
+        try: self.t_ns, rows = next(self._snapshots)
+        except StopIteration: raise EOFError("end of trace") from None
+        self.counters = {name: Counters(s, r) for name, s, r in rows}
+
+    def total(self):
+        return Counters(sum(c.bytes_sent for c in self.counters.values()), sum(c.bytes_recv for c in self.counters.values())), self.t_ns
+
+    def pernic(self): return self.counters, self.t_ns
+    def time(self): return self.reader.wall_time(self.t_ns or self.reader.start_mono_ns)
+    def monotonic(self): return (self.t_ns or 0) / 1e9
+
+    def close(self):
+        self._snapshots.close(); self.reader.close()  # the generator holds a view into the mapping
+
+class RecordingSource:
+    """Wraps another source and appends every per-interface snapshot it sees to a trace file.
+
+    One pernic read per tick is recorded; total() is derived from that same snapshot so the trace and the
+    live display always agree.
+    """
+
+    def __init__(self, inner, path):
+        self.inner, self.writer = inner, TraceWriter(path)
+        self.t_ns, self.counters = None, {}
+
+    def tick(self):
+        self.inner.tick()
+        self.counters, self.t_ns = self.inner.pernic()
+        self.writer.write(self.t_ns, self.counters)
+
+    def total(self):
+        return Counters(sum(c.bytes_sent for c in self.counters.values()), sum(c.bytes_recv for c in self.counters.values())), self.t_ns
+
+    def pernic(self): return self.counters, self.t_ns
+    def time(self): return self.inner.time()
+    def monotonic(self): return self.inner.monotonic()
+
+    def close(self): self.writer.close()
+
+# --- Trace File ---
+class TraceWriter:
+    """Buffered appender for the trace format; declares interface names on first sight.
+
+    Appending to an existing trace (a later run, possibly after a reboot) keeps its header: new timestamps are
+    mapped onto the header's monotonic timeline through the wall clock, so t_ns keeps increasing and
+    wall_time() stays right for the appended part. A partial record left by a crash is cut off first, so
+    appended records stay aligned.
+    """
+
+    def __init__(self, path, buffering=1 << 16):
+        self.path = str(path)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        keep = size - (size - HEADER.size) % RECORD.size if size >= HEADER.size else 0
+        if keep != size:
+            print(f"Warning: Trace {self.path} ends in a partial record, dropping its last {size - keep} bytes.")
+            os.truncate(self.path, keep)
+        fresh = keep == 0
+        self.names, self.offset = {}, 0
+        if not fresh:
+            reader = TraceReader(self.path)
+            try:
+                self.names, last = reader.name_index(), reader.last_t_ns()
+                now = time.monotonic_ns()
+                self.offset = reader.start_mono_ns + (time.time_ns() - reader.start_wall_ns) - now
+                if last is not None: self.offset = max(self.offset, last + 1 - now)  # wall clock went backwards
+            finally: reader.close()
+        self.f = open(self.path, "ab", buffering=buffering)
+        if fresh: self.f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time_ns(), time.monotonic_ns()))
+        self.records = 0
+
+    def _declare(self, name):
+        idx = self.names[name] = len(self.names)
+        raw = name.encode("utf-8")
+        out = [NAME_HEAD.pack(T_NAME, idx, len(raw), raw[:16])]
+        out += [NAME_MORE.pack(T_NAME_MORE, raw[i:i + 24]) for i in range(16, len(raw), 24)]
+        self.f.write(b"".join(out))
+        return idx
+
+    def write(self, t_ns, counters):
+        """ Append one snapshot: {iface: obj with bytes_sent/bytes_recv} taken at monotonic t_ns. """
+        pack, buf, t_ns = RECORD.pack, [], t_ns + self.offset
+        for name, c in counters.items():
+            idx = self.names.get(name)
+            if idx is None: idx = self._declare(name)
+            buf.append(pack(t_ns, idx, 0, c.bytes_sent, c.bytes_recv))
+        self.f.write(b"".join(buf)); self.records += len(buf)
+
+    def flush(self): self.f.flush()
+    def close(self): self.f.close()
+
+class TraceReader:
+    """Memory-maps a trace file; records are decoded lazily, straight from the mapping."""
+
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, self.start_wall_ns, self.start_mono_ns = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or size != RECORD.size: raise ValueError(f"{path}: not a network overlay trace")
+        if version != VERSION: raise ValueError(f"{path}: unsupported trace version {version}")
+        self.count = (len(self.mm) - HEADER.size) // RECORD.size
+        self.names = {}  # idx -> name, filled while iterating (names are declared before use)
+
+    def __len__(self): return self.count
+
+    def wall_time(self, t_ns):
+        return (self.start_wall_ns + t_ns - self.start_mono_ns) / 1e9
+
+    def records(self):
+        """ Yields (t_ns, name, bytes_sent, bytes_recv) for every data record. """
+        pending, end = None, HEADER.size + self.count * RECORD.size
+        for t_ns, idx, extra, sent, recv in RECORD.iter_unpack(memoryview(self.mm)[HEADER.size:end]):
+            if t_ns >= 0:
+                yield t_ns, self.names[idx], sent, recv
+            elif t_ns == T_NAME:
+                raw = struct.pack("<QQ", sent, recv)[:extra]
+                pending = [idx, extra, bytearray(raw)]
+                if len(raw) >= extra: self.names[idx] = raw.decode("utf-8"); pending = None
+            elif t_ns == T_NAME_MORE and pending:
+                pending[2] += struct.pack("<IIQQ", idx, extra, sent, recv)[:pending[1] - len(pending[2])]
+                if len(pending[2]) >= pending[1]: self.names[pending[0]] = pending[2].decode("utf-8"); pending = None
+
+    def snapshots(self):
+        """ Yields (t_ns, [(name, bytes_sent, bytes_recv), ...]) grouped by timestamp. """
+        t_cur, rows = None, []
+        for t_ns, name, sent, recv in self.records():
+            if t_ns != t_cur and rows:
+                yield t_cur, rows
+                rows = []
+            t_cur = t_ns; rows.append((name, sent, recv))
+        if rows: yield t_cur, rows
+
+    def last_t_ns(self):
+        """ Timestamp of the last data record, or None for an empty trace (scans backwards from the end). """
+        for i in range(self.count - 1, -1, -1):
+            t_ns = RECORD.unpack_from(self.mm, HEADER.size + i * RECORD.size)[0]
+            if t_ns >= 0: return t_ns
+        return None
+
+    def name_index(self):
+        """ {name: idx} for every declared interface (walks the whole file). """
+        for _ in self.records(): pass
+        return {name: idx for idx, name in self.names.items()}
+
+    def close(self):
+        self.mm.close(); self.f.close()
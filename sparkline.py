@@ -0,0 +1,56 @@
+import tkinter as tk
+from collections import deque
+
+class Sparkline:
+    """Scrolling up/down area graph on a Tk Canvas, drawn one column per sample.
+
+    Each push() shifts the existing items left by one column and adds the newest one, so the
+    per-tick cost doesn't depend on the graph width. A full redraw from the History only happens
+    when the vertical scale has to change.
+    """
+
+    def __init__(self, parent, history, width=120, height=28, bg="#000000", up_color="#FF8C00", down_color="#00BFFF"):
+        self.history, self.width, self.height = history, width, height
+        self.up_color, self.down_color = up_color, down_color
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg=bg, highlightthickness=0, bd=0)
+        self.columns = deque()  # [(down_item, up_item), ...] oldest first
+        self.scale, self.prev_up_y, self.pushes = 1024.0, height, 0
+        self.redraw()
+
+    def _y(self, v):
+        return self.height - min(v / self.scale, 1.0) * (self.height - 1)
+
+    def _add_column(self, x, up, down):
+        c = self.canvas
+        down_item = c.create_line(x, self.height, x, self._y(down), fill=self.down_color, tags="col")
+        up_y = self._y(up)
+        up_item = c.create_line(x - 1, self.prev_up_y, x, up_y, fill=self.up_color, tags="col")
+        self.prev_up_y = up_y
+        self.columns.append((down_item, up_item))
+
+    def redraw(self):
+        """ Rebuild every column from the history (used on create and when the scale changes). """
+        self.canvas.delete("col"); self.columns.clear(); self.prev_up_y = self.height
+        self.scale = max(1024.0, self.history.peak(self.width) * 1.25)
+        x = self.width - min(len(self.history), self.width)
+        for _, ups, downs in self.history.window(self.width):
+            for up, down in zip(ups, downs): self._add_column(x, up, down); x += 1
+
+    def push(self, up, down):
+        """ Append the newest sample (already stored in the history) as one new column. """
+        self.pushes += 1
+        # Rescale up immediately; rescale down only once per full width, and only if far below.
+        if max(up, down) > self.scale or (self.pushes % self.width == 0 and self.history.peak(self.width) * 4 < self.scale and self.scale > 1024):
+            return self.redraw()
+        if len(self.columns) >= self.width:
+            for item in self.columns.popleft(): self.canvas.delete(item)
+        self.canvas.move("col", -1, 0)
+        self._add_column(self.width - 1, up, down)
+
+    def restyle(self, bg, up_color, down_color):
+        """ Recolor in place (theme change); the columns are rebuilt from the history. """
+        self.canvas.config(bg=bg); self.up_color, self.down_color = up_color, down_color
+        self.redraw()
+
+    def pack(self, **kw):
+        self.canvas.pack(**kw)
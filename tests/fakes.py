@@ -0,0 +1,43 @@
+"""Counter sources for tests: no psutil calls, deterministic timestamps."""
+import threading
+import time
+
+from sources import Counters
+
+S = 10**9
+
+class ScriptedSource:
+    """ Steps through scripted {iface: (sent, recv)} snapshots, one second apart. """
+
+    def __init__(self, *snapshots):
+        self.snapshots, self.i = [{n: Counters(*v) for n, v in s.items()} for s in snapshots], -1
+
+    def tick(self): self.i += 1
+    def pernic(self): return self.snapshots[self.i], self.i * S
+    def total(self):
+        c = self.snapshots[self.i].values()
+        return Counters(sum(x.bytes_sent for x in c), sum(x.bytes_recv for x in c)), self.i * S
+    def time(self): return 1_700_000_000.0 + self.i
+    def monotonic(self): return float(self.i)
+
+class SyntheticSource:
+    """ Endless live-like source: `ifaces` interfaces moving `rate` bytes/s each, on the real clock. Counts reads. """
+
+    def __init__(self, ifaces=("eth0", "wlan0"), rate=1_000_000):
+        self.ifaces, self.rate, self.reads = ifaces, rate, 0
+        self._lock = threading.Lock()
+
+    def tick(self): pass
+
+    def pernic(self):
+        with self._lock: self.reads += 1
+        t_ns = time.monotonic_ns()
+        v = int(t_ns / 1e9 * self.rate)
+        return {n: Counters(v, 2 * v) for n in self.ifaces}, t_ns
+
+    def total(self):
+        counters, t_ns = self.pernic()  # one read, like psutil.net_io_counters()
+        return Counters(sum(c.bytes_sent for c in counters.values()), sum(c.bytes_recv for c in counters.values())), t_ns
+
+    def time(self): return time.time()
+    def monotonic(self): return time.monotonic()
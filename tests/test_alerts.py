@@ -0,0 +1,101 @@
+import json
+import socket
+import subprocess
+import threading
+
+import pytest
+
+from alerts import AlertEngine, describe, parse_rule, parse_rules
+
+def test_parse_rule_fields_and_units():
+    r = parse_rule("quiet: down < 10 KB/s for 30s")
+    assert (r.name, r.metric, r.above, r.inclusive, r.threshold, r.hold) == ("quiet", 1, False, False, 10 * 1024, 30)
+    r = parse_rule("upload >= 1.5mb for 2 min")
+    assert (r.name, r.metric, r.above, r.inclusive, r.threshold, r.hold) == ("upload >= 1.5mb for 2 min", 0, True, True, 1.5 * 1024**2, 120)
+    assert parse_rule("total <= 2 GB/s for 1h")[2:5] == (False, 2 * 1024**3, 3600)
+    assert parse_rule("up > 100").threshold == 100 and parse_rule("up > 100").hold == 0
+    assert describe(parse_rule("up >= 1 KB")) == "up >= 1.0 KB/s"
+
+@pytest.mark.parametrize("text", ["", "sideways > 1", "up = 5", "up >> 5", "up > 5 TB", "up > 5 for ever", "up > -1"])
+def test_parse_rule_rejects(text):
+    with pytest.raises(ValueError): parse_rule(text)
+
+def test_parse_rules_collects_errors():
+    rules, errors = parse_rules(["# comment", "", "up > 1", "up ? 2"])
+    assert [r.text for r in rules] == ["up > 1"] and len(errors) == 1 and "up ? 2" in errors[0]
+
+@pytest.mark.parametrize("rule, value, fires", [("up > 100", 100, False), ("up >= 100", 100, True), ("up < 100", 100, False),
+                                                ("up <= 100", 100, True), ("up >= 100", 99.99, False), ("up <= 100", 100.01, False)])
+def test_inclusive_operators_compare_inclusively(rule, value, fires):
+    assert bool(AlertEngine(rules=[rule]).evaluate(0.0, value, 0)) == fires
+
+def test_hold_time_then_resolve():
+    e, seen = AlertEngine(rules=["slow: down < 100 for 3s"]), []
+    e.handlers.append(lambda rule, on, v: seen.append((rule.name, on, v)))
+    assert e.evaluate(0.0, 0, 50) == () and e.evaluate(2.9, 0, 50) == () and e.active == ()
+    (rule, on, v), = e.evaluate(3.0, 0, 40)
+    assert on and v == 40 and e.active == (rule,) and e.fired == 1
+    assert e.evaluate(10.0, 0, 10) == ()  # already firing: no repeat
+    (_, on, v), = e.evaluate(11.0, 0, 500)
+    assert not on and e.active == ()
+    assert seen == [("slow", True, 40), ("slow", False, 500)]
+
+def test_interrupted_condition_restarts_the_hold():
+    e = AlertEngine(rules=["total > 10 for 5s"])
+    e.evaluate(0.0, 20, 0); e.evaluate(4.0, 0, 0)  # drops out before the hold elapses: no transition
+    assert e.evaluate(6.0, 20, 0) == () and e.evaluate(10.9, 20, 0) == ()
+    assert e.evaluate(11.0, 20, 0)[0][1] is True
+
+def test_set_rules_resets_state():
+    e = AlertEngine(rules=["up > 1"])
+    e.evaluate(0.0, 5, 0)
+    assert e.active
+    e.set_rules(["down > 1"])
+    assert e.active == () and [r.text for r in e.rules] == ["down > 1"]
+    assert e.evaluate(1.0, 5, 0) == ()
+
+def test_command_hook_gets_event_environment(monkeypatch):
+    calls = []
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kw: calls.append((cmd, kw["env"])))
+    e = AlertEngine(rules=["hot: up > 1"], command="notify-me")
+    e.evaluate(0.0, 5, 0, wall=123.0)
+    e._pool.shutdown(wait=True)
+    (cmd, env), = calls
+    assert cmd == "notify-me"
+    assert env["NETWORK_OVERLAY_ALERT_RULE"] == "hot" and env["NETWORK_OVERLAY_ALERT_STATE"] == "firing"
+    assert env["NETWORK_OVERLAY_ALERT_VALUE"] == "5" and env["NETWORK_OVERLAY_ALERT_T"] == "123.0"
+
+def test_socket_hook_sends_one_datagram_per_transition():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as rx:
+        rx.bind(("127.0.0.1", 0)); rx.settimeout(5)
+        e = AlertEngine(rules=["hot: up > 1"], socket_addr=f"127.0.0.1:{rx.getsockname()[1]}")
+        e.evaluate(0.0, 5, 0, wall=1.0); e.evaluate(1.0, 0, 0, wall=2.0)
+        e._pool.shutdown(wait=True)
+        events = [json.loads(rx.recv(4096)) for _ in range(2)]
+    assert [(ev["rule"], ev["state"], ev["metric"], ev["t"]) for ev in events] == [("hot", "firing", "up", 1.0), ("hot", "resolved", "up", 2.0)]
+
+def test_unreachable_socket_only_warns(capsys, tmp_path):
+    e = AlertEngine(rules=["up > 1"], socket_addr=str(tmp_path / "nobody.sock"))
+    e._deliver({"rule": "x"})
+    assert "unreachable" in capsys.readouterr().out
+
+def test_failing_handler_does_not_stop_evaluation(capsys):
+    e = AlertEngine(rules=["up > 1"])
+    e.handlers.append(lambda *a: 1 / 0)
+    assert e.evaluate(0.0, 5, 0) and e.active
+    assert "handler failed" in capsys.readouterr().out
+
+def test_set_rules_during_evaluation():
+    """ The sampling thread evaluates while the Tk thread swaps rule sets of different sizes. """
+    e, errors, stop = AlertEngine(rules=["up > 1"]), [], threading.Event()
+    def sample():
+        t = 0.0
+        while not stop.is_set():
+            t += 1
+            try: e.evaluate(t, t % 7, t % 3)
+            except Exception as exc: errors.append(exc); return
+    worker = threading.Thread(target=sample); worker.start()
+    try:
+        for i in range(2000): e.set_rules([f"up > {j % 5}" for j in range(i % 9)])
+    finally: stop.set(); worker.join()
+    assert not errors
@@ -0,0 +1,78 @@
+import threading
+
+from collector import Collector, Mailbox
+from fakes import ScriptedSource
+
+class RecordingLog:
+    def __init__(self): self.rows = []
+    def record(self, t, sent, recv): self.rows.append((sent, recv))
+
+TRAFFIC = ({"eth0": (0, 0), "lo": (0, 0), "docker0": (0, 0)},
+           {"eth0": (1000, 2000), "lo": (500, 500), "docker0": (300, 300)},
+           {"eth0": (3000, 6000), "lo": (900, 900), "docker0": (600, 600)})
+
+def logged(mode):
+    log = RecordingLog()
+    c = Collector(mode=mode, nic_name="eth0", exclude=["lo", "docker*"], traffic_log=log, source=ScriptedSource(*TRAFFIC))
+    readings = [c.sample() for _ in TRAFFIC]
+    return log.rows, readings
+
+def test_usage_counts_filtered_interfaces_in_every_mode():
+    rows, readings = logged("total")
+    assert rows == [(1000.0, 2000.0), (2000.0, 4000.0)]
+    assert readings[-1].sent_s == 2000 + 400 + 300  # the total view still shows everything
+    assert logged("top")[0] == rows and logged("single")[0] == rows
+
+class FlickeringMode(Collector):
+    """ Its mode changes on every read, as if the Tk thread switched it between any two lines of sample(). """
+
+    modes = iter(["total", "top"] * 10)
+
+    @property
+    def mode(self): return next(self.modes)
+
+    @mode.setter
+    def mode(self, value): pass
+
+def test_mode_switch_mid_sample_is_harmless():
+    c = FlickeringMode(source=ScriptedSource(*TRAFFIC))
+    for _ in TRAFFIC: c.sample()
+
+class FlakySource(ScriptedSource):
+    def __init__(self, *snapshots, fail_at=()):
+        super().__init__(*snapshots); self.fail_at = set(fail_at)
+
+    def tick(self):
+        super().tick()
+        if self.i in self.fail_at: raise OSError(28, "No space left on device")
+        if self.i >= len(self.snapshots): raise EOFError("end of script")
+
+def test_transient_errors_do_not_stop_sampling(capsys):
+    snapshots = [{"eth0": (k * 100, k * 100)} for k in range(8)]
+    c = Collector(interval=0.001, source=FlakySource(*snapshots, fail_at=(2, 3, 5)))
+    readings = []
+    c.run(readings.append)
+    assert len(readings) == 5 and c.errors == 3
+    assert capsys.readouterr().out.count("Sampling failed") == 2  # repeated errors are reported once
+
+def test_mailbox_latest_value_wins():
+    box = Mailbox()
+    assert box.take() == (None, 0)
+    box.post("a"); box.post("b"); box.post("c")
+    assert box.take() == ("c", 3) and box.dropped == 2
+    assert box.take() == (None, 0)
+    box.post("d")
+    assert box.take() == ("d", 1) and (box.posted, box.seen, box.dropped) == (4, 4, 2)
+
+def test_mailbox_concurrent_post_and_take():
+    box, n, got = Mailbox(), 50_000, []
+    producer = threading.Thread(target=lambda: [box.post(i) for i in range(1, n + 1)])
+    producer.start()
+    while producer.is_alive() or box.seen < n:
+        value, missed = box.take()
+        if missed: got.append((value, missed))
+    producer.join()
+    values = [v for v, _ in got]
+    assert values == sorted(set(values)) and values[-1] == n  # never stale, never repeated, ends on the newest
+    assert sum(m for _, m in got) == n and box.dropped == n - len(got)
+    assert all(v - m == prev for (v, m), prev in zip(got, [0] + values))  # each missed count spans exactly the gap
@@ -0,0 +1,69 @@
+import json
+import os
+
+from config_store import ConfigStore
+
+DEFAULTS = {"theme": "modern", "x": 50, "y": None, "show_graph": False, "alert_rules": [], "name": "a",
+            "update_interval": 1, "custom_opacity": 0.9, "custom_size": 10}
+CHOICES = {"theme": ("modern", "glass", "customizable")}
+RANGES = {"update_interval": (0.1, 10), "custom_opacity": (0.1, 1.0), "custom_size": (6, 72)}
+
+def store(path, **kw):
+    return ConfigStore(path, DEFAULTS, {"y": (int, float)}, choices=CHOICES, ranges=RANGES, **kw)
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+def test_invalid_values_fall_back_to_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    write_json(path, {"theme": "foo", "x": "12", "y": 7.5, "show_graph": 1, "alert_rules": ["up > 1", 3], "extra": True})
+    c = store(path)
+    assert c["theme"] == "modern" and c["x"] == 50 and c["show_graph"] is False and c["alert_rules"] == []
+    assert c["y"] == 7.5 and c["extra"] is True
+
+def test_valid_choice_loads(tmp_path):
+    path = tmp_path / "config.json"
+    write_json(path, {"theme": "glass", "x": 3.0})
+    c = store(path)
+    assert (c["theme"], c["x"]) == ("glass", 3.0)
+
+def test_corrupt_file_keeps_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert store(path)["theme"] == "modern"
+
+def test_saves_are_debounced_into_one_atomic_write(tmp_path):
+    path = tmp_path / "config.json"
+    c = store(path, delay=60)
+    for x in range(50): c["x"] = x; c.save()
+    assert c.writes == 0 and not path.exists()
+    c.close()
+    assert c.writes == 1 and json.loads(path.read_text())["x"] == 49
+    assert os.listdir(tmp_path) == ["config.json"]  # no temp file left behind
+
+def test_unchanged_values_do_not_write(tmp_path):
+    c = store(tmp_path / "config.json", delay=0)
+    c["x"] = 50
+    assert c.save() is False
+
+def test_stale_snapshot_never_replaces_a_newer_one(tmp_path):
+    path = tmp_path / "config.json"
+    c = store(path, delay=60)
+    c["x"] = 1; c.save(); older = c._pending
+    c["x"] = 2; c.flush()  # takes and writes the newer snapshot first...
+    c._write(*older)        # ...then the writer thread gets to the one it had already taken
+    assert json.loads(path.read_text())["x"] == 2 and c.writes == 1
+    c.close()
+
+def test_out_of_range_numbers_fall_back(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text('{"update_interval": 0, "custom_opacity": 7, "custom_size": NaN}', encoding="utf-8")
+    c = store(path)
+    assert (c["update_interval"], c["custom_opacity"], c["custom_size"]) == (1, 0.9, 10)
+
+def test_range_bounds_are_inclusive(tmp_path):
+    path = tmp_path / "config.json"
+    write_json(path, {"update_interval": 0.1, "custom_opacity": 1, "custom_size": 72})
+    c = store(path)
+    assert (c["update_interval"], c["custom_opacity"], c["custom_size"]) == (0.1, 1, 72)
+    assert not c.validate("update_interval", -1) and not c.validate("update_interval", 10.5) and c.validate("update_interval", 2)
@@ -0,0 +1,131 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from fleet import MAX_BATCH, Aggregator, PushSender, decode_batch, encode_batch, parse_address
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- Addresses and wire format ---
+@pytest.mark.parametrize("text, expected", [
+    ("9718", ("127.0.0.1", 9718)), (":9000", ("127.0.0.1", 9000)), ("box", ("box", 9718)), ("10.0.0.2:80", ("10.0.0.2", 80)),
+    ("[::1]:9000", ("::1", 9000)), ("[::]", ("::", 9718)), (" [fe80::1%eth0]:1 ", ("fe80::1%eth0", 1)),
+])
+def test_parse_address(text, expected):
+    assert parse_address(text) == expected
+
+@pytest.mark.parametrize("text", ["::1", "fe80::1:9718", "[::1", "[::1]x", "[]:80", "host:http", "host:70000"])
+def test_parse_address_rejects(text):
+    with pytest.raises(ValueError): parse_address(text)
+
+def test_batch_roundtrip_and_validation():
+    samples = [(1700000000.5 + i, 1024.0 * i, 2048.0) for i in range(MAX_BATCH)]
+    data = encode_batch("web-1".encode(), 7, samples)
+    assert decode_batch(data) == ("web-1", 7, samples)
+    for bad in (data[:10], b"XXXX" + data[4:], data + b"\0", data[:-1]):
+        with pytest.raises(ValueError): decode_batch(bad)
+
+# --- Aggregator bookkeeping ---
+def test_sequence_gaps_count_as_lost_and_restarts_do_not():
+    agg = Aggregator(name="local")
+    for seq in (0, 1, 4, 5): agg.ingest(encode_batch(b"a", seq, [(0.0, 1.0, 2.0)]))
+    agg.ingest(encode_batch(b"a", 1 << 20, [(0.0, 1.0, 2.0)]))  # sender restarted with another sequence
+    assert agg.state["a"].lost == 2 and agg.batches == 5
+    assert not agg.ingest(b"garbage") and agg.malformed == 1
+
+def test_buffers_and_host_count_are_bounded():
+    agg = Aggregator(buffer=4, max_hosts=3)
+    for i in range(10): agg.ingest(encode_batch(b"a", i, [(float(i), 1.0, 1.0)] * 3))
+    assert len(agg.state["a"].samples) == 4
+    for n in (b"b", b"c", b"d"): agg.ingest(encode_batch(n, 0, [(0.0, 1.0, 1.0)]))
+    assert sorted(agg.state) == ["a", "b", "c"] and agg.rejected == 1
+
+def test_silent_hosts_expire():
+    agg = Aggregator(stale_after=10)
+    agg.ingest(encode_batch(b"old", 0, [(0.0, 5.0, 5.0)]))
+    agg.state["old"].last_seen -= 11
+    agg.ingest(encode_batch(b"new", 0, [(0.0, 1.0, 3.0)]))
+    assert agg.expire() == 1 and [h[0] for h in agg.hosts()] == ["new"]
+    assert agg.totals() == (1.0, 3.0, 1)
+
+# --- On localhost, end to end ---
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end: return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture
+def aggregator():
+    agg = Aggregator(port=0, stale_after=30, name="local").start()
+    yield agg
+    agg.stop()
+
+def test_simulated_senders_over_udp_and_tcp(aggregator):
+    senders = [PushSender(address=("127.0.0.1", aggregator.port), transport="udp" if i % 2 else "tcp", name=f"sim-{i}", batch_size=8)
+               for i in range(40)]
+    for rnd in range(5):
+        for i, s in enumerate(senders):
+            for k in range(8): s.add(rnd * 8 + k, 100.0 * i, 10.0)
+            assert s.flush()
+    expected = 40 * 5 * 8
+    assert wait_for(lambda: aggregator.samples == expected), (aggregator.samples, expected)
+    assert len(aggregator.hosts()) == 40 and aggregator.totals()[0] == sum(100.0 * i for i in range(40))
+    assert all(h.lost == 0 for h in aggregator.state.values())
+    assert all(s.connects == 1 for s in senders)  # one socket per sender, reused for every batch
+    for s in senders: s.close()
+
+def test_sender_keeps_samples_while_the_aggregator_is_down():
+    s = PushSender(address=("127.0.0.1", 1), transport="tcp", name="offline", max_pending=5)
+    for k in range(8): s.add(k, 1.0, 1.0)
+    assert not s.flush() and len(s.pending) == 5 and s.dropped == 3
+    s.close()
+
+def test_failed_flush_counts_samples_that_no_longer_fit():
+    s = PushSender(address=("127.0.0.1", 1), name="offline", batch_size=4, max_pending=6)
+    for k in range(6): s.add(k, 1.0, 1.0)
+    def send(data):  # the sampler keeps adding while the batch is in flight
+        for k in range(6, 9): s.add(k, 1.0, 1.0)
+        return False
+    s._send = send
+    assert not s.flush()
+    assert [p[0] for p in s.pending] == [3, 4, 5, 6, 7, 8]  # oldest dropped first, nothing newer lost
+    assert s.dropped == 3 and len(s.pending) + s.dropped == 9
+    s.close()
+
+def test_udp_bind_failure_releases_the_tcp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as tcp, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as taken:
+        tcp.bind(("127.0.0.1", 0)); port = tcp.getsockname()[1]  # a port free for TCP...
+        taken.bind(("127.0.0.1", port)); tcp.close()  # ...but not for UDP
+        with pytest.raises(OSError): Aggregator(port=port).start()
+    agg = Aggregator(port=port).start()  # binds again only if the failed attempt closed its TCP server
+    assert agg.port == port
+    agg.stop()
+
+def test_headless_collectors_push_without_the_gui_lock(aggregator, tmp_path):
+    home = tmp_path / "home"; home.mkdir()
+    (home / ".network_overlay.lock").write_text(str(os.getpid()))  # as if an overlay were running
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+    cmd = [sys.executable, os.path.join(ROOT, "network_overlay.py"), "--headless", "--interval", "0.05", "--count", "12",
+           "--push", f"127.0.0.1:{aggregator.port}", "--quiet"]
+    procs = [subprocess.Popen(cmd + ["--name", f"collector-{i}", "--push-transport", t], env=env) for i, t in enumerate(("udp", "tcp", "udp"))]
+    assert [p.wait(20) for p in procs] == [0, 0, 0]
+    assert wait_for(lambda: {"collector-0", "collector-1", "collector-2"} <= set(aggregator.state))
+
+def test_headless_aggregate_mode_prints_hosts():
+    probe = Aggregator(port=0).start(); port = probe.port; probe.stop()  # a free port
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "network_overlay.py"), "--headless", "--aggregate", str(port),
+                             "--interval", "0.1", "--count", "15", "--name", "hub"], stdout=subprocess.PIPE, text=True)
+    time.sleep(0.5)
+    sender = PushSender(address=("127.0.0.1", port), name="edge")
+    for k in range(3): sender.add(time.time(), 500.0, 700.0); sender.flush(); time.sleep(0.1)
+    out, _ = proc.communicate(timeout=20)
+    sender.close()
+    last = json.loads(out.splitlines()[-1])
+    assert set(last["hosts"]) == {"hub", "edge"} and last["hosts"]["edge"] == {"up": 500.0, "down": 700.0}
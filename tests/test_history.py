@@ -0,0 +1,108 @@
+import pytest
+
+import sparkline
+from history import History
+
+def flat(history, n=None):
+    return [tuple(zip(t, up, down)) for t, up, down in history.window(n)]
+
+def fill(history, count, start=0):
+    for i in range(start, start + count): history.append(float(i), 10.0 * i, 100.0 * i)
+
+# --- History ---
+def test_window_before_wrap():
+    h = History(5); fill(h, 3)
+    assert len(h) == 3 and flat(h) == [((0.0, 0.0, 0.0), (1.0, 10.0, 100.0), (2.0, 20.0, 200.0))]
+    assert h.latest() == (2.0, 20.0, 200.0)
+
+def test_wraparound_keeps_chronological_order():
+    h = History(5); fill(h, 8)
+    assert len(h) == 5 and h.head == 3
+    segments = h.window()
+    assert len(segments) == 2  # [3..4] then [0..2]
+    assert [t for seg in segments for t in seg[0]] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert [u for seg in segments for u in seg[1]] == [30.0, 40.0, 50.0, 60.0, 70.0]
+    assert [t for seg in h.window(2) for t in seg[0]] == [6.0, 7.0]
+    assert [t for seg in h.window(4) for t in seg[0]] == [4.0, 5.0, 6.0, 7.0]
+    assert h.latest() == (7.0, 70.0, 700.0)
+
+def test_exact_capacity_is_one_segment():
+    h = History(4); fill(h, 4)
+    assert h.head == 0 and [list(seg[0]) for seg in h.window()] == [[0.0, 1.0, 2.0, 3.0]]
+
+def test_window_larger_than_count_and_empty():
+    h = History(4)
+    assert h.window() == [] and h.latest() is None and h.peak() == 0.0
+    fill(h, 2)
+    assert [list(seg[0]) for seg in h.window(100)] == [[0.0, 1.0]]
+
+def test_peak_and_clear():
+    h = History(4); fill(h, 6)
+    assert h.peak() == 500.0 and h.peak(1) == 500.0
+    h.append(6.0, 9999.0, 0.0)
+    assert h.peak(1) == 9999.0
+    h.clear()
+    assert len(h) == 0 and h.window() == []
+
+# --- Sparkline (stub canvas) ---
+class StubCanvas:
+    """ Tracks line items and their x positions the way a Tk canvas would. """
+
+    def __init__(self, parent=None, **kw): self.items, self.next_id, self.bg = {}, 1, kw.get("bg")
+    def create_line(self, x0, y0, x1, y1, fill=None, tags=None):
+        self.items[self.next_id] = [x0, y0, x1, y1, fill, tags]; self.next_id += 1
+        return self.next_id - 1
+    def delete(self, item):
+        for k in [k for k, v in self.items.items() if item in (k, v[5])]: del self.items[k]
+    def move(self, tag, dx, dy):
+        for v in self.items.values():
+            if v[5] == tag: v[0] += dx; v[2] += dx
+    def config(self, bg=None): self.bg = bg
+    def pack(self, **kw): pass
+
+    def columns(self, color):
+        """ {x: top y} of the items drawn in one color. """
+        return {v[2]: v[3] for v in self.items.values() if v[4] == color}
+
+@pytest.fixture
+def graph(monkeypatch):
+    monkeypatch.setattr(sparkline.tk, "Canvas", StubCanvas)
+    def make(history, width=10, height=28): return sparkline.Sparkline(None, history, width=width, height=height)
+    return make
+
+def push(history, graph, up, down):
+    history.append(0.0, up, down); graph.push(up, down)
+
+def test_sparkline_scrolls_one_column_per_sample(graph):
+    h = History(100); g = graph(h, width=4)
+    for _ in range(6): push(h, g, 100.0, 200.0)
+    down = g.canvas.columns(g.down_color)
+    assert sorted(down) == [0, 1, 2, 3] and len(g.columns) == 4 and len(g.canvas.items) == 8  # old columns deleted
+
+def test_sparkline_y_scale(graph):
+    h = History(100); g = graph(h, height=28)
+    assert g.scale == 1024.0
+    assert g._y(0) == 28 and g._y(1024.0) == 1 and g._y(512.0) == pytest.approx(14.5) and g._y(1e9) == 1  # clipped
+
+def test_sparkline_rescales_up_at_once(graph):
+    h = History(100); g = graph(h)
+    for _ in range(3): push(h, g, 100.0, 100.0)
+    push(h, g, 0.0, 10_000.0)
+    assert g.scale == pytest.approx(12_500.0)  # peak * 1.25
+    assert g.canvas.columns(g.down_color)[9] == pytest.approx(g._y(10_000.0)) and len(g.columns) == 4
+
+def test_sparkline_rescales_down_only_after_a_full_width(graph):
+    h = History(100); g = graph(h, width=10)
+    push(h, g, 0.0, 100_000.0)
+    big = g.scale
+    for i in range(8): push(h, g, 0.0, 100.0)
+    assert g.scale == big  # still within the width that holds the spike
+    for i in range(20): push(h, g, 0.0, 100.0)
+    assert g.scale == 1024.0  # spike scrolled out, next full-width check rescaled
+
+def test_sparkline_redraw_after_dropped_frames(graph):
+    h = History(100); g = graph(h, width=6)
+    for i in range(3): push(h, g, 0.0, 100.0 * i)
+    for i in range(4): h.append(0.0, 0.0, 500.0)  # frames the UI never saw
+    g.redraw()
+    assert sorted(g.canvas.columns(g.down_color)) == [0, 1, 2, 3, 4, 5] and len(g.columns) == 6
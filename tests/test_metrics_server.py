@@ -0,0 +1,73 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from collector import Collector, Reading
+from fakes import SyntheticSource
+from metrics_server import MetricsServer
+
+@pytest.fixture
+def served():
+    source = SyntheticSource()
+    collector = Collector(0.02, source=source)
+    server = MetricsServer(collector, port=0).start()
+    ticks = []
+    thread = threading.Thread(target=collector.run, args=(ticks.append,), daemon=True); thread.start()
+    while server.publishes < 3: time.sleep(0.01)
+    yield collector, server, source, ticks, thread
+    collector.stop(); thread.join(5); server.stop()
+
+async def _get(port, paths):
+    """ One keep-alive connection issuing GETs in sequence; returns [(latency_s, status, body), ...]. """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    results = []
+    for path in paths:
+        t0 = time.perf_counter()
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+        body = await reader.readexactly(length)
+        results.append((time.perf_counter() - t0, head.split(b" ", 2)[1], body))
+    writer.close()
+    return results
+
+def test_endpoints_serve_the_latest_tick(served):
+    collector, server, _, _, _ = served
+    (_, status, text), (_, _, raw), (_, missing, _) = asyncio.run(_get(server.port, ["/metrics", "/metrics.json?x=1", "/nope"]))
+    assert (status, missing) == (b"200", b"404")
+    assert 'network_overlay_transmit_bytes_per_second{interface="eth0"}' in text.decode()
+    assert "network_overlay_displayed_receive_bytes_per_second" in text.decode()
+    doc = json.loads(raw)
+    assert set(doc["interfaces"]) == {"eth0", "wlan0"} and doc["interfaces"]["eth0"]["down"] > 0
+
+def test_scrape_storm_adds_no_counter_reads_and_stays_fast(served):
+    collector, server, source, ticks, thread = served
+    clients, per_client = 40, 50
+    async def storm():
+        return await asyncio.gather(*(_get(server.port, ["/metrics" if i % 2 else "/metrics.json"] * per_client) for i in range(clients)))
+    ticks_before, t0 = len(ticks), time.perf_counter()
+    results = [r for conn in asyncio.run(storm()) for r in conn]
+    wall = time.perf_counter() - t0
+    collector.stop(); thread.join(5)
+    latencies = sorted(r[0] for r in results)
+    assert all(r[1] == b"200" for r in results) and server.requests >= clients * per_client
+    # Two OS reads per tick (system total + per interface), however many requests were served.
+    assert source.reads == 2 * len(ticks)
+    # The sampling loop kept its pace during the storm.
+    assert len(ticks) - ticks_before >= 0.5 * wall / collector.interval
+    assert statistics.median(latencies) < 0.02 and latencies[int(len(latencies) * 0.99)] < 0.25
+
+class OddNames:
+    def rows(self): return [('a"b\\c', 1.0, 2.0)]
+    def counters(self): return [('a"b\\c', 10, 20)]
+
+def test_labels_are_escaped():
+    server = MetricsServer()
+    server.collector = SimpleNamespace(per_nic=True, nic_sampler=OddNames())
+    server.publish(Reading(1.0, 1.0, 2.0, 1.0, []))
+    assert 'interface="a\\"b\\\\c"} 1.0' in server._responses["/metrics"].decode()
@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+import pytest
+
+import nic_sampler
+from nic_sampler import NicSampler
+
+Io = namedtuple("Io", "bytes_sent bytes_recv")
+S = 10**9
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy": pytest.importorskip("numpy")
+    monkeypatch.setattr(nic_sampler, "NUMPY_AVAILABLE", request.param == "numpy")
+    return request.param
+
+class Script:
+    """ A read() that returns the next scripted ({iface: Io}, t_ns) snapshot. """
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+
+    def __call__(self):
+        return self.snapshots.pop(0)
+
+def snap(t, **ifaces):
+    return {name: Io(*v) for name, v in ifaces.items()}, t * S
+
+def test_rates_per_interface(backend):
+    s = NicSampler(read=Script(snap(0, eth0=(0, 0), lo=(0, 0)), snap(2, eth0=(2000, 4000), lo=(100, 100))))
+    assert s.sample() is False
+    assert s.sample() is True
+    assert s.rows() == [("eth0", 1000.0, 2000.0), ("lo", 50.0, 50.0)]
+    assert s.elapsed == 2.0
+
+def test_interface_churn_keeps_surviving_baselines(backend):
+    s = NicSampler(read=Script(snap(0, lo=(0, 0), eth0=(0, 0)),
+                               snap(1, lo=(10, 10), eth0=(1000, 3000)),
+                               snap(2, eth0=(2000, 6000), wlan0=(5 * 10**9, 7 * 10**9)),
+                               snap(3, eth0=(3000, 9000), wlan0=(5 * 10**9 + 500, 7 * 10**9 + 700))))
+    s.sample(); s.sample()
+    assert s.sample() is True and s.elapsed == 1.0
+    assert s.rows() == [("eth0", 1000.0, 3000.0), ("wlan0", 0.0, 0.0)]  # eth0 unaffected; wlan0 baselines
+    assert s.total() == (1000.0, 3000.0)
+    s.sample()
+    assert s.rows() == [("eth0", 1000.0, 3000.0), ("wlan0", 500.0, 700.0)]
+
+def test_churn_across_a_buffer_resize(backend):
+    many = {f"veth{i}": (0, 0) for i in range(6)}
+    s = NicSampler(capacity=2, read=Script(snap(0, eth0=(0, 0)), snap(1, eth0=(100, 200), **many)))
+    s.sample(); s.sample()
+    assert s.get("eth0") == ("eth0", 100.0, 200.0)
+    assert s.get("veth5") == ("veth5", 0.0, 0.0)
+
+def test_filters_and_top(backend):
+    s = NicSampler(exclude=["lo"], read=Script(snap(0, lo=(0, 0), a=(0, 0), b=(0, 0)), snap(1, lo=(9, 9), a=(1, 1), b=(5, 5))))
+    s.sample(); s.sample()
+    assert s.get("lo") is None
+    assert s.top(1) == [("b", 5.0, 5.0)]
+
+def test_reset_reads_zero(backend):
+    s = NicSampler(read=Script(snap(0, eth0=(10**6, 10**6)), snap(1, eth0=(10, 10)), snap(2, eth0=(110, 210))))
+    s.sample(); s.sample()
+    assert s.get("eth0") == ("eth0", 0.0, 0.0)
+    s.sample()
+    assert s.get("eth0") == ("eth0", 100.0, 200.0)
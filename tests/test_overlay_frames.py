@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from network_overlay import NetworkOverlay
+
+class FakeSparkline:
+    def __init__(self): self.pushed, self.redraws = [], 0
+    def push(self, up, down): self.pushed.append((up, down))
+    def redraw(self): self.redraws += 1
+
+class FakeLabel:
+    def __init__(self): self.text = None
+    def winfo_exists(self): return True
+    def config(self, text): self.text = text
+
+def overlay():
+    return SimpleNamespace(shown_text=None, label=FakeLabel(), sparkline=FakeSparkline(), ui_frames={"drawn": 0, "skipped": 0})
+
+def test_one_frame_pushes_one_column():
+    o = overlay()
+    NetworkOverlay.safe_update_label(o, "a", 10.0, 20.0, missed=1)
+    assert o.sparkline.pushed == [(10.0, 20.0)] and o.sparkline.redraws == 0 and o.label.text == "a"
+
+def test_dropped_frames_redraw_once():
+    o = overlay()
+    NetworkOverlay.safe_update_label(o, "a", 10.0, 20.0, missed=7)
+    assert o.sparkline.pushed == [] and o.sparkline.redraws == 1
+
+def test_unchanged_text_is_not_redrawn():
+    o = overlay()
+    NetworkOverlay.safe_update_label(o, "a"); NetworkOverlay.safe_update_label(o, "a")
+    assert o.ui_frames == {"drawn": 1, "skipped": 1}
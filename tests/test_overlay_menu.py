@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from network_overlay import NetworkOverlay
+
+class FakeMenu:
+    """ Just enough of tk.Menu for label lookups, inserts and deletes. """
+
+    def __init__(self, labels): self.labels = list(labels)
+    def index(self, label): return self.labels.index(label)
+    def insert_cascade(self, index, label, menu): self.labels.insert(index, label)
+    def delete(self, label): self.labels.remove(label)
+
+def overlay(theme, labels=("Settings", "Data Usage...", "Top Talkers...", "About", "Exit")):
+    return SimpleNamespace(context_menu=FakeMenu(labels), customize_menu=object(), customize_shown=False, current_theme=theme)
+
+def test_customize_cascade_follows_the_theme():
+    o = overlay("modern")
+    sync = lambda: NetworkOverlay._sync_customize_menu(o)
+    sync(); assert "Customize" not in o.context_menu.labels
+    o.current_theme = "customizable"; sync(); sync()
+    assert o.context_menu.labels == ["Settings", "Data Usage...", "Top Talkers...", "Customize", "About", "Exit"]
+    o.current_theme = "glass"; sync()
+    assert "Customize" not in o.context_menu.labels and not o.customize_shown
+
+def test_no_menu_yet_is_a_no_op():
+    o = SimpleNamespace(context_menu=None, current_theme="customizable")
+    NetworkOverlay._sync_customize_menu(o)
+
+def test_interface_names_come_from_the_collector_source():
+    source = SimpleNamespace(pernic=lambda: ({"trace0": None, "lo": None, "eth9": None}, 0))
+    collector = SimpleNamespace(source=source, nic_sampler=SimpleNamespace(matches=lambda n: n != "lo"))
+    assert NetworkOverlay._interface_names(SimpleNamespace(collector=collector)) == ["eth9", "trace0"]
@@ -0,0 +1,55 @@
+import network_overlay
+from network_overlay import TOPMOST_MAX_MS, TOPMOST_MIN_MS, NetworkOverlay
+
+class FakeRoot:
+    """ Records the window calls and keeps after() jobs in a list instead of a Tk event loop. """
+
+    def __init__(self): self.calls, self.jobs = [], []
+    def attributes(self, name, value=None): self.calls.append(("attributes", name, value))
+    def lift(self): self.calls.append(("lift",))
+    def after(self, ms, fn): self.jobs.append((ms, fn)); return len(self.jobs)
+    def after_idle(self, fn): self.jobs.append((0, fn)); return len(self.jobs)
+    def after_cancel(self, job): self.jobs[job - 1] = None
+
+    def run_next(self):
+        """ Run the oldest pending job; returns its delay. """
+        i = next(i for i, j in enumerate(self.jobs) if j)
+        (ms, fn), self.jobs[i] = self.jobs[i], None
+        fn(); return ms
+
+def overlay():
+    o = NetworkOverlay.__new__(NetworkOverlay)  # no window: just the z-order logic
+    o.root, o.config, o.update_running = FakeRoot(), {"always_on_top": True}, True
+    o.topmost_wakeups, o._topmost_delay, o._topmost_job, o._topmost_pending = 0, TOPMOST_MIN_MS, None, False
+    return o
+
+def test_every_backoff_tick_reasserts_and_doubles():
+    o = overlay()
+    o._schedule_topmost_check()
+    delays = [o.root.run_next() for _ in range(12)]
+    assert delays[:4] == [TOPMOST_MIN_MS, 2 * TOPMOST_MIN_MS, 4 * TOPMOST_MIN_MS, 8 * TOPMOST_MIN_MS]
+    assert max(delays) == TOPMOST_MAX_MS
+    assert o.topmost_wakeups == 12
+    assert o.root.calls.count(("attributes", "-topmost", True)) == 12 and o.root.calls.count(("lift",)) == 12
+
+def test_zorder_events_coalesce_and_reset_the_backoff():
+    o = overlay()
+    o._topmost_delay = TOPMOST_MAX_MS
+    for _ in range(5): o._on_zorder_event()
+    assert sum(1 for j in o.root.jobs if j) == 1
+    o.root.run_next()
+    assert o.topmost_wakeups == 1 and o._topmost_delay == TOPMOST_MIN_MS and ("lift",) in o.root.calls
+    assert o.root.run_next() == TOPMOST_MIN_MS  # the backoff restarts from the minimum
+
+def test_disabled_always_on_top_stops_the_checks():
+    o = overlay()
+    o.config["always_on_top"] = False
+    o._on_zorder_event(); o._schedule_topmost_check()
+    assert not any(o.root.jobs)
+
+def test_tcl_error_ends_the_loop():
+    o = overlay()
+    def gone(*a): raise network_overlay.tk.TclError("window destroyed")
+    o.root.lift = gone
+    o._topmost_check()
+    assert o.topmost_wakeups == 1 and not any(o.root.jobs)
@@ -0,0 +1,97 @@
+import pytest
+
+import process_view
+from process_view import TopTalkers, _parse_ss
+
+# `ss -tinpH`: one header line per socket, then its indented TCP_INFO line.
+SS_OUTPUT = """\
+ESTAB 0      0      192.168.1.5:22 10.0.0.2:51234 users:(("sshd",pid=812,fd=4))
+\t cubic wscale:7,7 rto:204 rtt:1.2/0.4 mss:1448 bytes_sent:5000 bytes_acked:5000 bytes_received:1200 segs_out:40
+ESTAB 0      0      [2001:db8::5]:443 [2001:db8::9]:60100 users:(("nginx",pid=100,fd=6),("nginx",pid=101,fd=6))
+\t cubic wscale:7,7 rto:204 bytes_sent:90000 bytes_acked:90000 bytes_received:300
+ESTAB 0      0      [fe80::1]%eth0:22 [fe80::2]%eth0:40000 users:(("sshd",pid=813,fd=5))
+\t cubic bytes_received:64
+ESTAB 0      0      10.0.0.5:5432 10.0.0.7:40000
+\t cubic wscale:7,7 bytes_sent:777 bytes_received:888
+ESTAB 0      0      127.0.0.1:48271 127.0.0.1:41580 users:(("redis",pid=55,fd=10))
+\t bbr bytes_sent:10 bytes_received:20
+ESTAB 0      0      [::ffff:127.0.0.1]:8080 [::ffff:127.0.0.1]:50000 users:(("java",pid=56,fd=9))
+\t bbr bytes_sent:30 bytes_received:40
+SYN-SENT 0   1      10.0.0.5:41000 93.184.216.34:443 users:(("curl",pid=900,fd=3))
+ESTAB 0      0      10.0.0.5:41001 93.184.216.34:443 users:(("curl",pid=901,fd=3))
+\t cubic wscale:7,7 rto:204 unacked:1
+"""
+
+def test_parse_ss_ipv4_ipv6_and_owners():
+    sockets = _parse_ss(SS_OUTPUT, include_loopback=False)
+    assert sockets == {
+        ("192.168.1.5:22", "10.0.0.2:51234", 812): ("sshd", 5000, 1200),
+        ("[2001:db8::5]:443", "[2001:db8::9]:60100", 100): ("nginx", 90000, 300),  # shared socket: first pid only
+        ("[fe80::1]%eth0:22", "[fe80::2]%eth0:40000", 813): ("sshd", 0, 64),
+    }  # no users: field, loopback, no info line and no byte counters are all skipped
+
+def test_parse_ss_loopback_on_request():
+    sockets = _parse_ss(SS_OUTPUT, include_loopback=True)
+    assert sockets[("127.0.0.1:48271", "127.0.0.1:41580", 55)] == ("redis", 10, 20)
+    assert sockets[("[::ffff:127.0.0.1]:8080", "[::ffff:127.0.0.1]:50000", 56)] == ("java", 30, 40)
+
+def test_parse_ss_ignores_orphan_info_lines():
+    assert _parse_ss("\t cubic bytes_sent:1\n", include_loopback=True) == {}
+
+class Scans:
+    """ Feeds TopTalkers.scan scripted counters at scripted times. """
+
+    def __init__(self, monkeypatch, talkers, steps):
+        self.steps = iter(steps)
+        monkeypatch.setattr(talkers, "_counters", self.counters)
+        monkeypatch.setattr(process_view.time, "monotonic", lambda: self.t)
+
+    def counters(self):
+        return self.current
+
+    def next(self, talkers):
+        self.t, self.current = next(self.steps)
+        return talkers.scan()
+
+@pytest.fixture
+def talkers():
+    t = TopTalkers()
+    yield t
+    t.close()
+
+GONE = 2**22 + 12345  # above any real pid, so names come from the ss hint
+
+def test_top_talkers_per_pid_deltas_and_order(monkeypatch, talkers):
+    a, b = ("a:1", "x:1", GONE), ("a:2", "x:2", GONE)
+    c = ("b:1", "y:1", GONE + 1)
+    scans = Scans(monkeypatch, talkers, [
+        (10.0, {a: (GONE, "web", 100, 1000), b: (GONE, "web", 0, 0), c: (GONE + 1, "db", 50, 50)}),
+        (12.0, {a: (GONE, "web", 300, 1400), b: (GONE, "web", 200, 0), c: (GONE + 1, "db", 5050, 50),
+                ("b:2", "y:2", GONE + 1): (GONE + 1, "db", 10**9, 10**9)}),  # new socket: no delta yet
+    ])
+    assert scans.next(talkers) == []  # first scan only sets the baseline
+    top = scans.next(talkers)
+    assert [(t.pid, t.name, t.sent_s, t.recv_s, t.sockets) for t in top] == [
+        (GONE + 1, "db", 2500.0, 0.0, 2),
+        (GONE, "web", 200.0, 200.0, 2),
+    ]
+    assert talkers.scans == 2
+
+def test_top_talkers_counter_reset_is_not_negative(monkeypatch, talkers):
+    key = ("a:1", "x:1", GONE)
+    scans = Scans(monkeypatch, talkers, [(0.0, {key: (GONE, "web", 500, 500)}), (1.0, {key: (GONE, "web", 100, 700)})])
+    scans.next(talkers)
+    (t,) = scans.next(talkers)
+    assert (t.sent_s, t.recv_s) == (0.0, 200.0)
+
+def test_name_cache_evicted_when_pid_disappears(monkeypatch, talkers):
+    a, b = ("a:1", "x:1", GONE), ("b:1", "y:1", GONE + 1)
+    scans = Scans(monkeypatch, talkers, [
+        (0.0, {a: (GONE, "web", 0, 0), b: (GONE + 1, "db", 0, 0)}),
+        (1.0, {a: (GONE, "web", 1, 0), b: (GONE + 1, "db", 1, 0)}),
+        (2.0, {a: (GONE, "web", 2, 0)}),
+    ])
+    scans.next(talkers); scans.next(talkers)
+    assert set(talkers._names) == {GONE, GONE + 1}
+    assert [t.pid for t in scans.next(talkers)] == [GONE]
+    assert set(talkers._names) == {GONE} and set(talkers._prev) == {a}
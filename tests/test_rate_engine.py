@@ -0,0 +1,142 @@
+import pytest
+
+import rate_engine
+from rate_engine import WRAP_32, WRAP_64, AdaptiveInterval, RateEngine, Ticker, counter_delta
+
+# --- counter_delta ---
+def test_forward_delta():
+    assert counter_delta(1000, 4000, 1.0) == 3000
+
+def test_32bit_wrap():
+    assert counter_delta(WRAP_32 - 100, 50, 1.0) == 150
+
+def test_64bit_wrap():
+    assert counter_delta(WRAP_64 - 100, 50, 1.0) == 150
+
+def test_reset_low_in_range_is_not_a_wrap():
+    assert counter_delta(10**6, 10, 1.0) is None
+    assert counter_delta(2**40, 10, 1.0) is None
+
+def test_64bit_reset_between_2_31_and_2_32_is_not_booked_as_wrap():
+    # Could be a 32-bit counter 1.2 GB from wrapping, but far more likely a 64-bit counter that was reset.
+    assert counter_delta(3 * 10**9, 10, 1.0) is None
+
+def test_known_width_overrides_the_guess():
+    assert counter_delta(3 * 10**9, 10, 1.0, wrap=WRAP_32) == WRAP_32 - 3 * 10**9 + 10
+    assert counter_delta(WRAP_32 - 100, 50, 1.0, wrap=WRAP_64) is None
+
+def test_implausible_delta_is_a_reset():
+    assert counter_delta(0, 10**12, 1.0, max_rate=10**9) is None
+    assert counter_delta(WRAP_32 - 100, 10**9, 0.001, max_rate=10**9) is None
+
+# --- RateEngine ---
+S = 10**9  # ns per second
+
+def test_first_read_is_baseline():
+    e = RateEngine()
+    assert e.update(100, 200, 0) is None
+    r = e.update(1100, 2200, 2 * S)
+    assert (r.sent_s, r.recv_s, r.elapsed) == (500, 1000, 2.0)
+
+def test_rate_across_32bit_wrap():
+    e = RateEngine()
+    e.update(WRAP_32 - 1000, 0, 0)
+    assert e.update(1000, 0, S).sent_s == 2000
+
+def test_non_positive_elapsed_keeps_the_old_baseline():
+    e = RateEngine()
+    e.update(0, 0, 5 * S)
+    assert e.update(100, 100, 5 * S) is None
+    assert e.update(100, 100, 4 * S) is None
+    r = e.update(1000, 2000, 6 * S)
+    assert (r.sent_s, r.recv_s, r.elapsed) == (1000, 2000, 1.0)
+
+def test_reset_rebaselines():
+    e = RateEngine()
+    e.update(10**6, 10**6, 0)
+    assert e.update(10, 10, S) is None
+    assert e.resets == 1
+    r = e.update(510, 1010, 2 * S)
+    assert (r.sent_s, r.recv_s) == (500, 1000)
+
+def test_wide_counter_makes_reset_unambiguous():
+    e = RateEngine()
+    e.update(5 * 10**9, WRAP_32 - 100, 0)
+    e.update(5 * 10**9, WRAP_32 - 50, S)
+    assert e.update(5 * 10**9, 10, 2 * S) is None and e.resets == 1
+
+# --- Ticker ---
+class FakeClock:
+    """ Stands in for time.monotonic_ns and the Ticker's stop event; sleeping just advances the clock. """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, seconds):
+        self.now += max(0, round(seconds * 1e9)); return False
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(rate_engine.time, "monotonic_ns", c)
+    return c
+
+def make_ticker(clock, interval):
+    t = Ticker(interval); t._stop = clock
+    return t
+
+def test_ticks_land_on_absolute_deadlines(clock):
+    t = make_ticker(clock, 0.1)
+    t.wait()  # the grid starts at the first call
+    for k in range(2, 7):
+        clock.now += 3 * 10**6  # work inside the tick must not push the next deadline back
+        assert t.wait() == 0
+        assert clock.now == k * 100 * 10**6
+    assert (t.ticks, t.missed) == (6, 0)
+
+def test_missed_ticks_are_skipped_not_burst(clock):
+    t = make_ticker(clock, 0.1)
+    t.wait()
+    clock.now += 350 * 10**6  # stalled for 3.5 intervals
+    assert t.wait() == 0
+    assert clock.now == 500 * 10**6  # next deadline still on the original grid
+    assert t.missed == 3 and t.ticks == 2
+    t.wait()
+    assert clock.now == 600 * 10**6
+
+def test_stop_ends_wait():
+    t = Ticker(10.0)
+    t.stop()
+    assert t.wait() is None
+
+# --- AdaptiveInterval ---
+def test_adaptive_backs_off_while_idle():
+    a = AdaptiveInterval(fast=0.1, slow=2.0)
+    steps = [a.update(100.0, 100.0) for _ in range(8)]
+    assert steps[0] == 0.1  # the first sample has nothing to compare with
+    assert steps[1:6] == pytest.approx([0.2, 0.4, 0.8, 1.6, 2.0]) and steps[6:] == [2.0, 2.0]
+
+def test_adaptive_idle_noise_below_the_floor_stays_quiet():
+    a = AdaptiveInterval(fast=0.1, slow=2.0)
+    for rate in (0.0, 1500.0, 0.0, 1800.0, 200.0, 2000.0, 0.0): a.update(rate, 0.0)
+    assert a.interval == 2.0
+
+def test_adaptive_snaps_back_on_the_first_burst_sample():
+    a = AdaptiveInterval(fast=0.1, slow=2.0)
+    for _ in range(10): a.update(0.0, 1000.0)
+    assert a.interval == 2.0
+    assert a.update(0.0, 500_000.0) == 0.1  # one moving sample is enough
+    assert a.update(0.0, 500_000.0) == pytest.approx(0.2)  # steady burst: back off again
+    assert a.update(0.0, 1000.0) == 0.1  # and the drop at its end counts as movement too
+
+def test_adaptive_clamps():
+    assert AdaptiveInterval(fast=0.5, slow=0.1).slow == 0.5  # a ceiling below the floor is raised to it
+    a = AdaptiveInterval(fast=0.5, slow=4.0, factor=0.5)  # a shrinking factor still never goes below fast
+    for _ in range(5): a.update(0.0, 0.0)
+    assert a.interval == 0.5
+    a = AdaptiveInterval(fast=0.1, slow=3.0, factor=10.0)
+    for _ in range(3): a.update(0.0, 0.0)
+    assert a.interval == 3.0
@@ -0,0 +1,82 @@
+import tkinter.font
+
+import pytest
+
+from resources import ResourceCache
+
+Image = pytest.importorskip("PIL.Image")
+ImageTk = pytest.importorskip("PIL.ImageTk")
+
+class FakeFont:
+    def __init__(self, root=None, **options): self.options = options
+
+class FakePhoto:
+    """ Stands in for ImageTk.PhotoImage, which needs a display. """
+    def __init__(self, image, master=None): self.size = image.size
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(tkinter.font, "Font", FakeFont)
+    monkeypatch.setattr(ImageTk, "PhotoImage", FakePhoto)
+    return lambda **kw: ResourceCache(None, **kw)
+
+def picture(tmp_path, name, size=(64, 64)):
+    path = tmp_path / name
+    Image.new("RGB", size, (200, 40, 40)).save(path)
+    return str(path)
+
+# --- Fonts ---
+def test_font_hits_and_options(cache):
+    c = cache()
+    f = c.font("Arial", 10, "bold italic")
+    assert c.font("Arial", 10.0, "bold italic") is f and (c.hits, c.misses) == (1, 1)
+    assert f.options == {"family": "Arial", "size": 10, "weight": "bold", "slant": "italic"}
+    assert c.font("Arial", 10, None) is c.font("Arial", 10, "normal")
+
+def test_font_lru_evicts_the_least_recently_used(cache):
+    c = cache(max_fonts=2)
+    a, b = c.font("A"), c.font("B")
+    assert c.font("A") is a  # A is now the most recent
+    c.font("C")
+    assert list(c.fonts) == [("A", 10, "normal"), ("C", 10, "normal")]
+    assert c.font("B") is not b and c.misses == 4
+
+# --- Images ---
+def test_image_is_scaled_once_per_size(cache, tmp_path):
+    c, path = cache(), picture(tmp_path, "bg.png")
+    photo = c.image(path, (40, 20))
+    assert photo.size == (40, 20) and c.image(path, (40, 20)) is photo
+    assert c.image(path, (30, 30)).size == (30, 30)
+    assert sum(1 for k in c.images if k[0] == "src") == 1  # decoded once for both sizes
+    assert c.image(path, (40, 20)) is photo and c.hits >= 2
+
+def test_image_lru_evicts_oldest_first(cache):
+    c = cache(max_bytes=300)
+    for k in "abc": c._remember(k, k, 100)
+    assert c._lookup("a") == "a"  # now the most recent
+    c._remember("d", "d", 100)
+    assert list(c.images) == ["c", "a", "d"] and c.bytes == 300
+
+def test_pinned_image_is_never_evicted(cache):
+    c = cache(max_bytes=200)
+    c._remember("a", "a", 100); c.pinned = "a"
+    c._remember("b", "b", 100); c._remember("c", "c", 100)
+    assert list(c.images) == ["a", "c"]
+    c._remember("big", "big", 500)  # over budget on its own: only what is neither pinned nor new goes
+    assert list(c.images) == ["a", "big"] and c.bytes == 600
+
+def test_decoding_the_next_image_never_evicts_the_shown_one(cache, tmp_path):
+    one, two = picture(tmp_path, "one.png", (200, 200)), picture(tmp_path, "two.png", (200, 200))
+    c = cache(max_bytes=200 * 200 * 4 + 100)
+    shown = c.image(one, (8, 8))
+    key = c.pinned
+    c._original(two, 0)  # what image(two) does first: its decode alone overflows the budget
+    assert key in c.images and c.images[key][0] is shown
+    assert not any(k[:2] == ("src", one) for k in c.images)  # the unpinned original went instead
+    nxt = c.image(two, (8, 8))
+    assert c.pinned != key and c.images[c.pinned][0] is nxt
+
+def test_missing_image_warns_once(cache, tmp_path, capsys):
+    c = cache()
+    assert c.image(str(tmp_path / "nope.png"), (10, 10)) is None and c.image(str(tmp_path / "nope.png"), (10, 10)) is None
+    assert capsys.readouterr().out.count("Could not load") == 1
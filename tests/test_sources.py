@@ -0,0 +1,75 @@
+import time
+
+import sources
+from sources import Counters, TraceReader, TraceSource, TraceWriter
+
+def snapshots(path):
+    reader = TraceReader(path)
+    try: return [(t, sorted(rows)) for t, rows in reader.snapshots()], reader
+    finally: reader.close()
+
+def test_roundtrip_with_long_names(tmp_path):
+    path, name = tmp_path / "t.trace", "veth" + "x" * 60
+    w = TraceWriter(path)
+    w.write(1000, {"eth0": Counters(1, 2), name: Counters(3, 4)})
+    w.write(2000, {"eth0": Counters(5, 6), name: Counters(7, 8)})
+    w.close()
+    assert snapshots(path)[0] == [(1000, [("eth0", 1, 2), (name, 3, 4)]), (2000, [("eth0", 5, 6), (name, 7, 8)])]
+
+def test_append_after_reboot_keeps_time_increasing(tmp_path, monkeypatch):
+    path = tmp_path / "t.trace"
+    w = TraceWriter(path)
+    t0 = time.monotonic_ns()
+    w.write(t0, {"eth0": Counters(100, 100)}); w.write(t0 + 10**9, {"eth0": Counters(200, 200)})
+    w.close()
+    wall_first = TraceReader(path).wall_time(t0)
+    # "Reboot": the monotonic clock restarts near zero while the wall clock has moved on by an hour.
+    later_wall, fresh_mono = time.time_ns() + 3600 * 10**9, 5 * 10**9
+    monkeypatch.setattr(sources.time, "time_ns", lambda: later_wall)
+    monkeypatch.setattr(sources.time, "monotonic_ns", lambda: fresh_mono)
+    w = TraceWriter(path)
+    w.write(fresh_mono, {"eth0": Counters(10, 10), "wlan0": Counters(1, 1)})
+    w.close()
+    rows, reader = snapshots(path)
+    times = [t for t, _ in rows]
+    assert times == sorted(times) and len(set(times)) == 3
+    assert rows[-1][1] == [("eth0", 10, 10), ("wlan0", 1, 1)]
+    assert abs(reader.wall_time(times[0]) - wall_first) < 1e-6
+    assert abs(reader.wall_time(times[-1]) - later_wall / 1e9) < 1e-3
+
+def test_append_never_goes_backwards_when_the_wall_clock_does(tmp_path, monkeypatch):
+    path = tmp_path / "t.trace"
+    w = TraceWriter(path); t0 = time.monotonic_ns(); w.write(t0, {"eth0": Counters(1, 1)}); w.close()
+    monkeypatch.setattr(sources.time, "time_ns", lambda: 0)
+    w = TraceWriter(path); w.write(time.monotonic_ns(), {"eth0": Counters(2, 2)}); w.close()
+    times = [t for t, _ in snapshots(path)[0]]
+    assert times[1] > times[0]
+
+def test_trace_source_replays_in_order(tmp_path):
+    path = tmp_path / "t.trace"
+    w = TraceWriter(path)
+    for k in range(3): w.write(k * 10**9, {"eth0": Counters(k, 2 * k)})
+    w.close()
+    src = TraceSource(path)
+    seen = []
+    try:
+        while True: src.tick(); seen.append(src.total()[0])
+    except EOFError: pass
+    src.close()
+    assert seen == [Counters(0, 0), Counters(1, 2), Counters(2, 4)]
+
+def test_append_cuts_a_torn_record_first(tmp_path, capsys):
+    path = tmp_path / "t.trace"
+    w = TraceWriter(path); w.write(1000, {"eth0": Counters(1, 1)}); w.close()
+    with open(path, "ab") as f: f.write(b"\x07" * 13)  # crash mid-record
+    w = TraceWriter(path); w.write(time.monotonic_ns(), {"eth0": Counters(2, 2), "wlan0": Counters(3, 3)}); w.close()
+    assert "partial record" in capsys.readouterr().out
+    assert (path.stat().st_size - sources.HEADER.size) % sources.RECORD.size == 0
+    rows = snapshots(path)[0]
+    assert [r for _, r in rows] == [[("eth0", 1, 1)], [("eth0", 2, 2), ("wlan0", 3, 3)]]
+
+def test_torn_header_starts_over(tmp_path):
+    path = tmp_path / "t.trace"
+    path.write_bytes(sources.MAGIC + b"\x01\x00")
+    w = TraceWriter(path); w.write(5, {"eth0": Counters(1, 2)}); w.close()
+    assert snapshots(path)[0] == [(5, [("eth0", 1, 2)])]
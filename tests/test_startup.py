@@ -0,0 +1,39 @@
+"""Start-up budget: the limits bench.py startup reports against, enforced."""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import pytest
+
+import bench
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("PIL", "numpy", "asyncio", "winreg", "tkinter.colorchooser", "tkinter.filedialog", "tkinter.font", "tkinter.ttk",
+            "tkinter.simpledialog", "fleet", "metrics_server", "process_view", "concurrent.futures")
+
+def test_gui_module_defers_heavy_imports():
+    probe = f"import sys, network_overlay; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    assert out == ""
+
+def test_import_time_within_budget():
+    subprocess.run([sys.executable, "-m", "compileall", "-q", ROOT], check=True)  # time imports, not compilation
+    imports, _ = bench.import_times(5)
+    assert statistics.median(imports) <= bench.BUDGET_IMPORT_MS
+
+def test_headless_first_reading_within_budget():
+    script, times = os.path.join(ROOT, "network_overlay.py"), []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, script, "--headless", "--count", "1", "--interval", "0.05"], stdout=subprocess.PIPE, text=True)
+        line = proc.stdout.readline(); times.append((time.perf_counter() - t0) * 1e3)
+        proc.wait(10)
+        assert line.startswith("{")
+    assert statistics.median(times) <= bench.BUDGET_FIRST_MS
+
+def test_first_paint_within_budget():
+    firsts, why = bench.first_paint_times(3)
+    if why: pytest.skip(f"overlay can't start here: {why}")
+    assert statistics.median(firsts) <= bench.BUDGET_FIRST_MS
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from stats import Ewma, LogHistogram, RateStats, WindowStats
+
+REL_ERR = 0.02
+
+def reference(values, q):
+    """ The sample the sketch's rank convention picks: sorted(values)[floor(q * (n - 1))]. """
+    return sorted(values)[int(q * (len(values) - 1))]
+
+def close(estimate, exact, rel_err=REL_ERR):
+    return abs(estimate - exact) <= rel_err * exact + 1e-9
+
+# --- LogHistogram ---
+def test_quantiles_within_relative_error():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(12, 2) for _ in range(20000)]
+    h = LogHistogram(REL_ERR)
+    for v in values: h.add(v)
+    qs = (0.0, 0.01, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0)
+    for q, est in zip(qs, h.quantiles(qs)):
+        assert close(est, reference(values, q)), q
+
+def test_matches_numpy_percentile():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(2)
+    values = [rng.uniform(1e3, 1e8) for _ in range(5000)]
+    h = LogHistogram(REL_ERR)
+    for v in values: h.add(v)
+    exact = np.percentile(values, [50, 95, 99], method="lower")
+    assert all(close(e, x) for e, x in zip(h.quantiles((0.5, 0.95, 0.99)), exact))
+
+def test_sub_byte_values_land_in_the_zero_bucket():
+    h = LogHistogram()
+    for v in [0.0] * 60 + [0.5] * 10 + [1000.0] * 30: h.add(v)
+    assert h.quantiles((0.5, 0.7)) == [0.0, 0.0]
+    assert all(close(v, 1000.0) for v in h.quantiles((0.71, 0.99)))
+    assert LogHistogram().quantiles((0.5,)) == [0.0]
+
+# --- WindowStats ---
+def test_old_slices_expire():
+    w = WindowStats(window=60, slots=6)
+    for t in range(0, 10): w.add(t, 1e6)
+    for t in range(60, 70): w.add(t, 10.0)
+    assert w.peak(69) == 10.0 and close(w.quantiles(69, (0.99,))[0], 10.0)
+    assert w.peak(200) == 0.0 and w.quantiles(200) == [0.0, 0.0, 0.0]
+    assert w.total.n == 0 and not w.total.counts
+
+def test_aggregate_matches_the_live_slices():
+    rng, w, seen = random.Random(3), WindowStats(window=30, slots=6), []
+    t = 0.0
+    for _ in range(3000):
+        t += rng.expovariate(2.0)
+        v = rng.choice([0.0, rng.lognormvariate(10, 3)])
+        w.add(t, v); seen.append((int(t // 5), v))
+        if rng.random() < 0.05:
+            newest = int(t // 5)
+            live = [v for sid, v in seen if newest - sid < 6]
+            assert w.peak(t) == max(live)
+            for q, est in zip((0.5, 0.95, 0.99), w.quantiles(t)):
+                exact = reference(live, q)
+                assert est == 0.0 if exact < 1.0 else close(est, exact)
+            assert w.total.n == len(live)
+
+# --- Ewma ---
+def test_ewma_step_response():
+    e = Ewma(half_life=5.0)
+    e.add(0.0, 0.0)
+    assert e.add(5.0, 100.0) == pytest.approx(50.0)  # one half-life: half way
+    for t in range(6, 60): e.add(float(t), 100.0)
+    assert e.value == pytest.approx(100.0, rel=1e-3)
+
+def test_ewma_does_not_depend_on_the_sampling_rate():
+    fast, slow = Ewma(2.0), Ewma(2.0)
+    fast.add(0, 0.0); slow.add(0, 0.0)
+    for i in range(1, 101): fast.add(i * 0.1, 10.0)
+    for i in range(1, 3): slow.add(i * 5.0, 10.0)
+    assert fast.value == pytest.approx(slow.value)
+
+def test_rate_stats_snapshot():
+    s = RateStats(window=60, half_life=1)
+    for t in range(30): s.add(float(t), 1000.0, 4000.0)
+    snap = s.snapshot()
+    assert snap["up"]["now"] == 1000.0 and snap["down"]["peak"] == 4000.0
+    assert close(snap["down"]["p95"], 4000.0) and snap["up"]["avg"] == pytest.approx(1000.0)
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from traffic_log import TrafficLog, day_key
+
+def test_records_roll_up_and_persist(tmp_path):
+    path, t = tmp_path / "traffic.db", time.time()
+    log = TrafficLog(path)
+    log.record(t, 100.4, 200.6); log.record(t, 50, 50)
+    assert log.usage(t)["today"] == (150, 251)
+    log.close()
+    reopened = TrafficLog(path)
+    assert reopened.usage(t) == {"today": (150, 251), "month": (150, 251)}
+    assert reopened.db.execute("SELECT COUNT(*) FROM samples").fetchone()[0] == 2
+    reopened.close()
+
+def test_writer_prunes_old_samples_at_start(tmp_path):
+    path, now = tmp_path / "traffic.db", time.time()
+    TrafficLog(path).close()
+    with sqlite3.connect(path) as db:
+        db.executemany("INSERT INTO samples VALUES (?, ?, ?)", [(now - 40 * 86400, 1, 1), (now - 86400, 2, 2)])
+    log = TrafficLog(path, retention_days=31)
+    log.close()  # joins the writer, which prunes before its first wait
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT sent FROM samples").fetchall() == [(2,)]
+
+def test_prune_uses_the_index(tmp_path):
+    log = TrafficLog(tmp_path / "traffic.db")
+    plan = " ".join(row[-1] for row in log.db.execute("EXPLAIN QUERY PLAN DELETE FROM samples WHERE t < 0"))
+    assert "samples_t" in plan
+    log.close()
+
+def test_prune_keeps_the_rollups(tmp_path):
+    log = TrafficLog(tmp_path / "traffic.db", retention_days=1)
+    t = time.time()  # recent, so the writer's own start-up prune leaves it alone
+    log.record(t, 10, 20); log.flush()
+    assert log.prune(now=t + 3 * 86400) == 1
+    assert log.db.execute("SELECT COUNT(*) FROM samples").fetchone()[0] == 0
+    assert log.usage(t)["today"] == (10, 20) and day_key(t) in log.totals
+    log.close()
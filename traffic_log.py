@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (t REAL NOT NULL, sent INTEGER NOT NULL, recv INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS samples_t ON samples (t);
+CREATE TABLE IF NOT EXISTS totals (period TEXT PRIMARY KEY, sent INTEGER NOT NULL, recv INTEGER NOT NULL);
+"""
+
+def day_key(t): return time.strftime("%Y-%m-%d", time.localtime(t))
+def month_key(t): return time.strftime("%Y-%m", time.localtime(t))
+
+class TrafficLog:
+    """Append-only SQLite (WAL) log of per-interval byte counts with incrementally maintained daily/monthly totals.
+
+    record() only appends to an in-memory batch and bumps the in-memory rollups; a background writer
+    commits the batch every `batch_size` samples or `flush_seconds`, whichever comes first, so neither
+    the sampling thread nor the Tk thread ever waits on the disk. The writer also drops samples older than
+    `retention_days`, when it starts and then every `prune_seconds`.
+    """
+
+    def __init__(self, path, batch_size=60, flush_seconds=30.0, retention_days=31, prune_seconds=3600.0):
+        self.path, self.batch_size, self.flush_seconds = str(path), batch_size, flush_seconds
+        self.retention, self.prune_seconds = retention_days * 86400, prune_seconds
+        self.lock = threading.Lock()
+        self.pending, self.dirty_periods = [], set()
+        self.totals = {}  # period -> [sent, recv]
+        self.flushes = 0
+        self._wake, self._closed = threading.Event(), False
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL"); self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        for period, sent, recv in self.db.execute("SELECT period, sent, recv FROM totals"): self.totals[period] = [sent, recv]
+        self._writer = threading.Thread(target=self._run, daemon=True); self._writer.start()
+
+    # --- Recording ---
+    def record(self, t, sent, recv):
+        """ Log `sent`/`recv` bytes transferred in the interval ending at wall-clock time t. """
+        sent, recv = round(sent), round(recv)
+        with self.lock:
+            self.pending.append((t, sent, recv))
+            for key in (day_key(t), month_key(t)):
+                total = self.totals.setdefault(key, [0, 0]); total[0] += sent; total[1] += recv
+                self.dirty_periods.add(key)
+            if len(self.pending) >= self.batch_size: self._wake.set()
+
+    def usage(self, t=None):
+        """ {"today": (sent, recv), "month": (sent, recv)} straight from the in-memory rollups. """
+        t = time.time() if t is None else t
+        with self.lock:
+            return {name: tuple(self.totals.get(key, (0, 0))) for name, key in (("today", day_key(t)), ("month", month_key(t)))}
+
+    # --- Background Writer ---
+    def _run(self):
+        next_prune = 0.0
+        while True:
+            if time.monotonic() >= next_prune: self.prune(); next_prune = time.monotonic() + self.prune_seconds
+            if self._closed: return
+            self._wake.wait(self.flush_seconds); self._wake.clear()
+            self.flush()
+
+    def prune(self, now=None):
+        """ Delete samples past the retention period (an index range scan on t). """
+        try:
+            with self.db: return self.db.execute("DELETE FROM samples WHERE t < ?", ((now or time.time()) - self.retention,)).rowcount
+        except sqlite3.Error as e: print(f"Traffic log prune error: {e}")
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+            rollups = [(k, *self.totals[k]) for k in self.dirty_periods]; self.dirty_periods = set()
+        if not batch and not rollups: return
+        try:
+            with self.db:
+                self.db.executemany("INSERT INTO samples VALUES (?, ?, ?)", batch)
+                self.db.executemany("INSERT INTO totals VALUES (?, ?, ?) ON CONFLICT(period) DO UPDATE SET sent=excluded.sent, recv=excluded.recv", rollups)
+            self.flushes += 1
+        except sqlite3.Error as e: print(f"Traffic log write error: {e}")
+
+    def close(self):
+        """ Stop the writer and flush whatever is still pending. """
+        if self._closed: return
+        self._closed = True; self._wake.set(); self._writer.join(timeout=5)
+        self.flush(); self.db.close()